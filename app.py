@@ -1,11 +1,15 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-from utils import sidebar_options
+from components.metrics import tracer
+from components.ratelimit import rate_limit_owner
+from utils import sidebar_options, start_metrics_exporters
 
 if __name__ == "__main__":
     st.set_page_config(
         page_title="GPTsummary", layout="wide", page_icon="resources/summary.png"
     )
+    start_metrics_exporters()
     sidebar_options()
 
     # Create pages
@@ -27,4 +31,7 @@ if __name__ == "__main__":
 
     page = st.navigation([video_page, document_page, book_page])
 
-    page.run()
+    # Share the provider quotas fairly between sessions
+    ctx = get_script_run_ctx()
+    with tracer.request(), rate_limit_owner(ctx.session_id if ctx else "default"):
+        page.run()
@@ -0,0 +1,96 @@
+"""
+Summarize many YouTube videos, webpages, texts or PDFs without the UI.
+
+Usage:
+    python batch.py manifest.jsonl --output results.jsonl --provider Groq \
+        --model llama3-70b-8192 --requests-per-minute 30
+"""
+import argparse
+import os
+import sys
+
+from components.batch import BatchRunner, read_manifest
+from components.cache import SQLiteCache
+from components.llm import MODELS, create_llm
+from components.pdf import extract_text
+from components.ratelimit import get_quota, set_quota
+from components.summarizer import Summarizer
+from components.summarizer.utils import get_doc_string, get_youtube_subtitle_string
+from resources.prompts import (
+    get_book_system_prompt,
+    get_webpage_summary_prompt,
+    get_youtube_system_prompt,
+)
+
+SYSTEM_PROMPTS = {
+    "youtube": get_youtube_system_prompt,
+    "url": get_webpage_summary_prompt,
+    "text": get_webpage_summary_prompt,
+    "pdf": get_book_system_prompt,
+}
+
+FETCHERS = {
+    "youtube": get_youtube_subtitle_string,
+    "url": get_doc_string,
+    "text": get_doc_string,
+    "pdf": extract_text,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("manifest", help="JSONL or CSV file with type, source and optional id")
+    parser.add_argument("--output", required=True, help="JSONL file the results are appended to")
+    parser.add_argument("--provider", choices=list(MODELS), default="Gemini")
+    parser.add_argument("--model", help="Defaults to the first model of the provider")
+    parser.add_argument("--language", default="English")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--summarize-workers", type=int, default=4)
+    parser.add_argument("--requests-per-minute", type=float, help="Provider request quota")
+    parser.add_argument("--tokens-per-minute", type=float, help="Provider token quota")
+    parser.add_argument("--cache-dir", help="Cache fetched texts and summaries in this directory")
+    args = parser.parse_args()
+
+    try:
+        items = read_manifest(args.manifest)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    model_name = args.model or MODELS[args.provider][0]
+    # Each flag overrides its part of the model's default quota.
+    if args.requests_per_minute or args.tokens_per_minute:
+        requests, tokens = get_quota(args.provider, model_name)
+        set_quota(
+            args.provider,
+            model_name,
+            args.requests_per_minute or requests,
+            args.tokens_per_minute or tokens,
+        )
+    llm = create_llm(args.provider, model_name)
+    cache = (
+        SQLiteCache(os.path.join(args.cache_dir, "cache.sqlite"))
+        if args.cache_dir
+        else None
+    )
+    summarizers = {
+        source_type: Summarizer(
+            llm=llm,
+            system_prompt=get_prompt(args.language),
+            language=args.language,
+            cache=cache,
+        )
+        for source_type, get_prompt in SYSTEM_PROMPTS.items()
+    }
+    runner = BatchRunner(
+        summarizers=summarizers,
+        fetchers=FETCHERS,
+        fetch_workers=args.fetch_workers,
+        summarize_workers=args.summarize_workers,
+    )
+    runner.run(items, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import random
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
+
+import fitz
+
+WORDS = (
+    "the model learns patterns from data and the speaker explains how training"
+    " works step by step with examples results and key takeaways for the audience"
+).split()
+
+
+def make_text(n_words: int, words_per_line: int = 12, seed: int = 0) -> str:
+    """
+    Return deterministic filler text, e.g. a long transcript.
+
+    The words are drawn at random from a fixed seed, so the lines don't repeat
+    and preprocessing doesn't shrink the text like it would a repeated one.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for start in range(0, n_words, words_per_line):
+        count = min(words_per_line, n_words - start)
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(count)))
+    return "\n".join(lines)
+
+
+def make_pdf(n_pages: int, words_per_page: int = 400) -> bytes:
+    """Return a PDF with `n_pages` pages of filler text."""
+    with fitz.open() as pdf_doc:
+        for page_num in range(n_pages):
+            page = pdf_doc.new_page()
+            text = make_text(words_per_page, seed=page_num)
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text)
+        return pdf_doc.tobytes()
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    body = b""
+
+    def do_GET(self):
+        if self.delay:
+            threading.Event().wait(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def local_site(n_urls: int, delay: float = 0.05, n_words: int = 1000) -> Iterator[List[str]]:
+    """
+    Serve synthetic webpages from a local HTTP server.
+
+    Args:
+        n_urls (int): The number of page URLs to return.
+        delay (float): The simulated server latency per request, in seconds.
+        n_words (int): The number of words per page.
+
+    Yields:
+        List[str]: The URLs of the pages.
+    """
+    body = f"<html><body><nav>Home | About</nav><p>{make_text(n_words)}</p></body></html>"
+    handler = type(
+        "PageHandler", (_PageHandler,), {"delay": delay, "body": body.encode("utf-8")}
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        yield [f"{base_url}/page/{i}" for i in range(n_urls)]
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,55 @@
+"""
+Measure how many concurrent diagram sessions one process handles with the
+async driver, using a fake LLM with simulated latency.
+
+Usage:
+    python -m benchmarks.diagram_throughput --sessions 200 --concurrency 1 10 50 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from loguru import logger
+
+from benchmarks.fake_llm import FakeChatModel
+from components.mermaid import DiagramGenerator, agenerate_diagrams
+
+SAMPLE_TEXT = "A short summary with a few main ideas and their supporting details."
+
+
+def run(sessions: int, concurrency: int, latency: float) -> dict:
+    llm = FakeChatModel(latency=latency, tokens_per_second=1000)
+    generator = DiagramGenerator(
+        llm=llm, language="English", examples_filepath="resources/mermaid_examples.json"
+    )
+    texts = [SAMPLE_TEXT] * sessions
+
+    start = time.perf_counter()
+    results = asyncio.run(agenerate_diagrams(generator, texts, concurrency))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "llm_latency_s": latency,
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(sessions / elapsed, 2),
+        "completed": sum(1 for result in results if result.get("mermaid_code")),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    logger.remove()
+    for concurrency in args.concurrency:
+        print(json.dumps(run(args.sessions, concurrency, args.latency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+FAKE_MERMAID_CODE = '```mermaid\nmindmap\n  root(("Summary"))\n    A["Key point"]\n    B["Another point"]\n```'
+
+
+def fake_response(prompt: str, output_tokens: int) -> str:
+    """Return a plausible answer to the prompts used in this repo."""
+    if "determine the most suitable type of diagram" in prompt:
+        return '{"diagram_type": "Mindmap"}'
+    if "Mermaid" in prompt:
+        return FAKE_MERMAID_CODE
+    return " ".join(f"word{i % 100}" for i in range(output_tokens))
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A deterministic chat model that simulates the latency of a real provider.
+
+    `latency_jitter` adds a random delay of up to that many seconds and
+    `error_rate` makes that share of calls fail; both are seeded.
+    """
+
+    model_name: str = "fake-model"
+    latency: float = 0.5
+    latency_jitter: float = 0.0
+    tokens_per_second: float = 200.0
+    output_tokens: int = 200
+    error_rate: float = 0.0
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    def _first_token_delay(self) -> float:
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise RuntimeError(f"{self.model_name}: injected error")
+        return self.latency + self._rng.random() * self.latency_jitter
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _respond(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = fake_response(prompt, self.output_tokens)
+        words = text.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _duration(self, tokens: List[str]) -> float:
+        return self._first_token_delay() + len(tokens) / self.tokens_per_second
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._respond(messages)
+        time.sleep(self._duration(tokens))
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._respond(messages)
+        await asyncio.sleep(self._duration(tokens))
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self._first_token_delay())
+        for token in self._respond(messages):
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self._first_token_delay())
+        for token in self._respond(messages):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
@@ -0,0 +1,86 @@
+import fnmatch
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from components.cache.redis_cache import DELETE_IF_SCRIPT, RENEW_SCRIPT
+
+
+class FakeRedis:
+    """
+    An in-process stand-in for `redis.Redis`, with the commands `RedisCache`
+    uses, so the shared result store can be exercised without a server.
+
+    Like the real client, values are returned as bytes. `eval` only runs the
+    Lua scripts of `RedisCache`, reimplemented in Python.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key)
+
+    def set(
+        self,
+        key: str,
+        value: Union[str, bytes],
+        ex: Optional[int] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+    ) -> Optional[bool]:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        expires_at = None
+        if px is not None:
+            expires_at = time.monotonic() + px / 1000
+        elif ex is not None:
+            expires_at = time.monotonic() + ex
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            self._data[key] = (value, expires_at)
+            return True
+
+    def pttl(self, key: str) -> int:
+        with self._lock:
+            if self._live(key) is None:
+                return -2
+            expires_at = self._data[key][1]
+            if expires_at is None:
+                return -1
+            return max(0, int((expires_at - time.monotonic()) * 1000))
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def eval(self, script: str, numkeys: int, key: str, *args: str) -> int:
+        expected = args[0].encode("utf-8")
+        with self._lock:
+            if self._live(key) != expected:
+                return 0
+            if script == DELETE_IF_SCRIPT:
+                del self._data[key]
+            elif script == RENEW_SCRIPT:
+                expires_at = time.monotonic() + int(args[1]) / 1000 if args[1] else None
+                self._data[key] = (expected, expires_at)
+            else:
+                raise NotImplementedError("Unknown script")
+            return 1
+
+    def scan_iter(self, match: str = "*") -> Iterator[str]:
+        with self._lock:
+            keys = [key for key in self._data if fnmatch.fnmatchcase(key, match)]
+        yield from keys
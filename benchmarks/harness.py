@@ -0,0 +1,76 @@
+import resource
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the q-th percentile (0-100) of the values, interpolating linearly."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(
+    fn: Callable[[], Any], iterations: int = 5, warmup: int = 1
+) -> Dict[str, float]:
+    """
+    Call a function repeatedly and report its latency, throughput and memory.
+
+    Peak memory is the largest Python heap usage seen by tracemalloc during a
+    call; `max_rss_mb` is the peak resident size of the whole process so far.
+
+    Args:
+        fn (Callable[[], Any]): The function to benchmark.
+        iterations (int): The number of measured calls.
+        warmup (int): The number of calls made before measuring.
+
+    Returns:
+        Dict[str, float]: The latency percentiles (seconds), throughput and memory.
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    peak_bytes = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        tracemalloc.start()
+        call_start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_start)
+        peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "iterations": iterations,
+        "mean_s": round(statistics.mean(latencies), 4),
+        "p50_s": round(percentile(latencies, 50), 4),
+        "p90_s": round(percentile(latencies, 90), 4),
+        "p99_s": round(percentile(latencies, 99), 4),
+        "throughput_per_s": round(iterations / elapsed, 3),
+        "peak_heap_mb": round(peak_bytes / 2**20, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+    }
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    metric: str = "p50_s",
+    tolerance: float = 0.2,
+) -> List[str]:
+    """Return the scenarios whose metric grew by more than `tolerance` over the baseline."""
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get(name, {}).get(metric)
+        if previous and stats[metric] > previous * (1 + tolerance):
+            regressions.append(f"{name}: {metric} {previous} -> {stats[metric]}")
+
+    return regressions
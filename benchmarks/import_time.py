@@ -0,0 +1,132 @@
+"""
+Measure the import time of the app entry point and of the modules every page
+imports, with `python -X importtime` in fresh interpreters. Prints one JSON
+object with the median time per module and its slowest imports.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget app=500  # exits 1 over budget
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Module -> maximum median import time, in milliseconds. Streamlit alone takes
+# about 250 ms; the app and page modules must not import LangChain, the
+# provider SDKs, LangGraph or PyMuPDF, which would add a second or more.
+BUDGETS_MS: Dict[str, float] = {
+    "app": 700,
+    "utils": 700,
+    "components.jobs.panel": 600,
+    "components.mermaid": 600,
+}
+# The settings require these; dummy values are enough to import the modules.
+REQUIRED_ENV = (
+    "TAVILY_API_KEY",
+    "GOOGLE_API_KEY",
+    "YI_API_KEY",
+    "YI_BASE_URL",
+    "GROQ_API_KEY",
+    "GROQ_BASE_URL",
+)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, str, float]]:
+    """Return the (depth, module, cumulative ms) of each line of `-X importtime`."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip(), int(cumulative) / 1000))
+    return entries
+
+
+def measure_import(module: str) -> List[Tuple[int, str, float]]:
+    """Import a module in a fresh interpreter and return its import time tree."""
+    env = {name: "benchmark" for name in REQUIRED_ENV}
+    env.update(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(process.stderr)
+
+
+def run(module: str, runs: int, top: int) -> dict:
+    totals = []
+    children: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        entries = measure_import(module)
+        # Children are listed before their parent, one level deeper.
+        index = next(i for i, entry in enumerate(entries) if entry[1] == module)
+        depth = entries[index][0]
+        totals.append(entries[index][2])
+        for i in range(index - 1, -1, -1):
+            if entries[i][0] <= depth:
+                break
+            if entries[i][0] == depth + 1:
+                children.setdefault(entries[i][1], []).append(entries[i][2])
+
+    slowest = sorted(
+        ((name, statistics.median(times)) for name, times in children.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return {
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "slowest_imports_ms": {name: round(ms, 1) for name, ms in slowest[:top]},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="MODULE=MS",
+        help="Override the budget of a module",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for budget in args.budget:
+        module, ms = budget.split("=")
+        budgets[module] = float(ms)
+
+    results = {module: run(module, args.runs, args.top) for module in args.modules}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    over = [
+        f"{module}: {result['median_ms']} ms > {budgets[module]} ms"
+        for module, result in results.items()
+        if module in budgets and result["median_ms"] > budgets[module]
+    ]
+    for line in over:
+        print(f"Over budget: {line}", file=sys.stderr)
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare the latency of a single slow, flaky provider with the router over
+several fake providers, with and without hedged requests.
+
+Usage:
+    python -m benchmarks.router --calls 200
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.harness import percentile
+from components.router import RouterChatModel
+
+
+def make_providers(output_tokens: int = 5) -> dict:
+    return {
+        "slow-flaky": FakeChatModel(
+            model_name="slow-flaky",
+            latency=0.2,
+            latency_jitter=0.8,
+            error_rate=0.1,
+            output_tokens=output_tokens,
+            seed=1,
+        ),
+        "fast": FakeChatModel(
+            model_name="fast",
+            latency=0.1,
+            latency_jitter=0.3,
+            error_rate=0.02,
+            output_tokens=output_tokens,
+            seed=2,
+        ),
+        "steady": FakeChatModel(
+            model_name="steady",
+            latency=0.25,
+            latency_jitter=0.05,
+            output_tokens=output_tokens,
+            seed=3,
+        ),
+    }
+
+
+def run(llm, calls: int, concurrency: int) -> dict:
+    def call(_) -> float:
+        start = time.perf_counter()
+        try:
+            llm.invoke("Summarize this.")
+        except Exception:
+            return float("nan")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(calls)))
+    latencies = [latency for latency in results if latency == latency]
+
+    return {
+        "errors": calls - len(latencies),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    logger.remove()
+    scenarios = {
+        "single_provider": make_providers()["slow-flaky"],
+        "router": RouterChatModel(backends=make_providers(), hedge=False),
+        "router_hedged": RouterChatModel(backends=make_providers(), hedge=True),
+    }
+    for name, llm in scenarios.items():
+        print(json.dumps({"scenario": name, **run(llm, args.calls, args.concurrency)}))
+
+
+if __name__ == "__main__":
+    main()
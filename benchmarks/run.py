@@ -0,0 +1,120 @@
+"""
+End-to-end benchmarks of the summarize, fetch, PDF and diagram pipelines,
+using a fake LLM with simulated latency and synthetic corpora. Prints one
+JSON object with latency percentiles, throughput and peak memory per scenario.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json  # exits 1 on regressions
+"""
+import argparse
+import io
+import json
+import sys
+from typing import Callable, Dict
+
+from loguru import logger
+
+from benchmarks.corpora import local_site, make_pdf, make_text
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.harness import find_regressions, measure
+from components.mermaid import DiagramGenerator
+from components.pdf import extract_text, spooled_pdf
+from components.summarizer import Summarizer
+from components.summarizer.chunking import split_text_stable
+from components.summarizer.preprocess import preprocess
+from components.summarizer.utils import get_doc_string
+from resources.prompts import get_youtube_system_prompt
+
+
+def summarize_scenario(
+    llm: FakeChatModel, n_words: int, min_chunks: int = 1
+) -> Callable[[], str]:
+    summarizer = Summarizer(
+        llm=llm,
+        system_prompt=get_youtube_system_prompt("English"),
+        language="English",
+        chunk_tokens=8_000,
+    )
+    text = make_text(n_words)
+    # The scenario must measure what it's named after: e.g. a long transcript
+    # that preprocessing shrinks to a single chunk wouldn't exercise map-reduce.
+    prepared = preprocess(text, summarizer.model_name, summarizer.max_input_tokens).text
+    chunks = len(split_text_stable(prepared, summarizer.chunk_tokens))
+    if chunks < min_chunks:
+        raise ValueError(
+            f"The {n_words}-word text is {chunks} chunk(s) after preprocessing, "
+            f"expected at least {min_chunks}"
+        )
+    return lambda: summarizer.summarize(text)
+
+
+def pdf_scenario(n_pages: int) -> Callable[[], str]:
+    data = make_pdf(n_pages)
+
+    def run() -> str:
+        with spooled_pdf(io.BytesIO(data)) as path:
+            return extract_text(path)
+
+    return run
+
+
+def diagram_scenario(llm: FakeChatModel) -> Callable[[], dict]:
+    generator = DiagramGenerator(
+        llm=llm, language="English", examples_filepath="resources/mermaid_examples.json"
+    )
+    graph = generator.build_graph()
+    text = make_text(300)
+    return lambda: graph.invoke({"text": text})
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    llm = FakeChatModel(latency=args.latency, tokens_per_second=args.tokens_per_second)
+    results = {}
+
+    def bench(name: str, fn: Callable) -> None:
+        logger.info(f"Running {name}")
+        results[name] = measure(fn, iterations=args.iterations)
+
+    bench("summarize_transcript_5k_words", summarize_scenario(llm, 5_000))
+    bench("summarize_transcript_100k_words", summarize_scenario(llm, 100_000, min_chunks=10))
+    bench("extract_pdf_500_pages", pdf_scenario(500))
+    bench("diagram_graph", diagram_scenario(llm))
+    with local_site(args.urls, delay=args.url_delay) as urls:
+        bench(f"get_doc_string_{args.urls}_urls", lambda: get_doc_string("\n".join(urls)))
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--urls", type=int, default=30)
+    parser.add_argument("--url-delay", type=float, default=0.1)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO", filter=lambda record: record["name"] == "__main__")
+
+    results = run_benchmarks(args)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = find_regressions(results, json.load(file), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
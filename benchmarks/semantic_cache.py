@@ -0,0 +1,84 @@
+"""
+Measure the hit rate and lookup latency of the near-duplicate summary cache
+with many cached texts.
+
+Half of the lookups are edited copies of cached texts (a few words replaced),
+which should hit; the other half are new texts, which should miss.
+
+Usage:
+    python -m benchmarks.semantic_cache --entries 100000 --lookups 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from components.cache import SemanticCache
+
+VOCABULARY = [f"w{i}" for i in range(20_000)]
+
+
+def make_doc(rng: random.Random, n_words: int) -> list:
+    return rng.choices(VOCABULARY, k=n_words)
+
+
+def edit(rng: random.Random, words: list, fraction: float) -> list:
+    """Replace a fraction of the words, in short runs like edited sentences."""
+    words = list(words)
+    for _ in range(max(1, int(len(words) * fraction / 3))):
+        start = rng.randrange(len(words))
+        words[start : start + 3] = make_doc(rng, 3)
+    return words
+
+
+def run(
+    entries: int, lookups: int, n_words: int, edit_fraction: float, threshold: float
+) -> dict:
+    rng = random.Random(0)
+    cache = SemanticCache(threshold=threshold, max_entries=entries)
+    docs = []
+
+    start = time.perf_counter()
+    for i in range(entries):
+        words = make_doc(rng, n_words)
+        if i < lookups:
+            docs.append(words)
+        cache.add(" ".join(words), "benchmark", f"key-{i}")
+    index_seconds = time.perf_counter() - start
+
+    near_hits = new_hits = 0
+    for i in range(lookups // 2):
+        text = " ".join(edit(rng, docs[i], edit_fraction))
+        near_hits += cache.lookup(text, "benchmark") == f"key-{i}"
+        text = " ".join(make_doc(rng, n_words))
+        new_hits += cache.lookup(text, "benchmark") is not None
+
+    return {
+        "entries": entries,
+        "words_per_text": n_words,
+        "edited_fraction": edit_fraction,
+        "threshold": threshold,
+        "index_us_per_entry": round(index_seconds / entries * 1e6, 1),
+        "near_duplicate_hit_rate": round(near_hits / (lookups // 2), 4),
+        "false_hit_rate": round(new_hits / (lookups // 2), 4),
+        **cache.stats.as_dict(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--edit-fraction", type=float, default=0.02)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    result = run(
+        args.entries, args.lookups, args.words, args.edit_fraction, args.threshold
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
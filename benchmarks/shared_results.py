@@ -0,0 +1,155 @@
+"""
+Measure how many LLM calls the shared result store saves when many sessions
+request the same summary at once, and how long the sessions wait.
+
+Each session is a thread of one of several worker processes, like the sessions
+of several app replicas. They share a SQLite result store, or with
+`--backend redis` a Redis server (`--redis-url`) or, in a single process, an
+in-memory stand-in.
+
+Usage:
+    python -m benchmarks.shared_results --sessions 50 --processes 4
+    python -m benchmarks.shared_results --backend redis --processes 1
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+from loguru import logger
+
+from benchmarks.fake_redis import FakeRedis
+from components.cache import BaseCache, RedisCache, SingleFlight, SQLiteCache
+
+
+def make_cache(backend: str, path: str, redis_url: Optional[str]) -> BaseCache:
+    if backend == "sqlite":
+        return SQLiteCache(path)
+    if redis_url:
+        return RedisCache.from_url(redis_url)
+    return RedisCache(FakeRedis())
+
+
+def worker(
+    cache: BaseCache,
+    sessions: int,
+    keys: int,
+    latency: float,
+    shared: bool,
+    calls,
+    latencies: list,
+) -> None:
+    store = SingleFlight(cache, poll_interval=0.05)
+
+    def summarize() -> str:
+        with calls.get_lock():
+            calls.value += 1
+        time.sleep(latency)
+        return "summary"
+
+    def session(i: int) -> None:
+        start = time.perf_counter()
+        if shared:
+            store.do(f"summary:{i % keys}", summarize)
+        else:
+            summarize()
+        latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _process(backend, path, redis_url, *args) -> None:
+    logger.remove()
+    latencies: List[float] = []
+    worker(make_cache(backend, path, redis_url), *args[:-1], latencies)
+    args[-1].extend(latencies)
+
+
+def run(
+    backend: str,
+    sessions: int,
+    processes: int,
+    keys: int,
+    latency: float,
+    shared: bool,
+    redis_url: Optional[str],
+) -> dict:
+    if backend == "redis" and not redis_url and processes > 1:
+        raise ValueError("The in-memory Redis stand-in only works with 1 process")
+
+    with tempfile.TemporaryDirectory() as tmp, multiprocessing.Manager() as manager:
+        path = os.path.join(tmp, "results.sqlite")
+        if redis_url:
+            make_cache(backend, path, redis_url).clear()
+        calls = multiprocessing.Value("i", 0)
+        latencies = manager.list()
+        per_process = sessions // processes
+        args = (per_process, keys, latency, shared, calls, latencies)
+
+        start = time.perf_counter()
+        if processes == 1:
+            _process(backend, path, redis_url, *args)
+        else:
+            workers = [
+                multiprocessing.Process(
+                    target=_process, args=(backend, path, redis_url, *args)
+                )
+                for _ in range(processes)
+            ]
+            for process in workers:
+                process.start()
+            for process in workers:
+                process.join()
+        elapsed = time.perf_counter() - start
+        waits = sorted(latencies)
+
+    return {
+        "backend": backend,
+        "shared": shared,
+        "sessions": per_process * processes,
+        "processes": processes,
+        "distinct_requests": keys,
+        "llm_latency_s": latency,
+        "llm_calls": calls.value,
+        "elapsed_s": round(elapsed, 3),
+        "wait_p50_s": round(statistics.median(waits), 3),
+        "wait_p95_s": round(waits[int(len(waits) * 0.95) - 1], 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["sqlite", "redis"], default="sqlite")
+    parser.add_argument("--redis-url", help="A Redis server instead of the stand-in")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=1, help="Distinct requests")
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    results = [
+        run(
+            args.backend,
+            args.sessions,
+            args.processes,
+            args.keys,
+            args.latency,
+            shared,
+            args.redis_url,
+        )
+        for shared in (False, True)
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
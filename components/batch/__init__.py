@@ -0,0 +1,4 @@
+from .manifest import ManifestItem, read_manifest
+from .runner import BatchRunner, BatchStats
+
+__all__ = ["BatchRunner", "BatchStats", "ManifestItem", "read_manifest"]
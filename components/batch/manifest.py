@@ -0,0 +1,95 @@
+import csv
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple, Union
+
+from loguru import logger
+
+from components.cache import make_key
+
+SOURCE_TYPES = ("youtube", "url", "text", "pdf")
+
+
+@dataclass
+class ManifestItem:
+    id: str
+    type: str
+    source: str
+
+
+def _to_item(row: Union[str, dict], line_number: int) -> ManifestItem:
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number}: invalid JSON: {e}") from e
+    if not isinstance(row, dict):
+        raise ValueError(f"Line {line_number}: expected an object with type and source")
+    source_type = str(row.get("type") or "").strip().lower()
+    source = str(row.get("source") or "").strip()
+    if source_type not in SOURCE_TYPES:
+        raise ValueError(
+            f"Line {line_number}: unknown type {source_type!r}, expected one of {SOURCE_TYPES}"
+        )
+    if not source:
+        raise ValueError(f"Line {line_number}: missing source")
+    item_id = str(row.get("id") or "").strip() or make_key(source_type, source)
+
+    return ManifestItem(id=item_id, type=source_type, source=source)
+
+
+def _read_rows(path: str) -> Iterator[Tuple[int, Union[str, dict]]]:
+    """Yield the line number and the raw row (a CSV row or a JSON line) of each item."""
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if path.endswith(".csv"):
+            yield from enumerate(csv.DictReader(file), start=2)
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield line_number, line
+
+
+def read_manifest(path: str) -> List[ManifestItem]:
+    """
+    Read the items of a batch job from a JSONL or CSV manifest.
+
+    Each row has a `type` (youtube, url, text or pdf), a `source` (a video URL,
+    webpage URL(s), raw text or a PDF path) and an optional `id`, which defaults
+    to a hash of the type and source. The whole manifest is checked before the
+    batch starts, so a bad row can't abort it halfway. A row repeating an
+    earlier one is skipped; an id reused for another source is an error.
+
+    Args:
+        path (str): The path of the manifest, ending in .jsonl or .csv.
+
+    Returns:
+        List[ManifestItem]: The items of the manifest, in order.
+
+    Raises:
+        ValueError: If any row is invalid, listing all of them.
+    """
+    items: Dict[str, Tuple[int, ManifestItem]] = {}
+    errors: List[str] = []
+    for line_number, row in _read_rows(path):
+        try:
+            item = _to_item(row, line_number)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        if item.id not in items:
+            items[item.id] = (line_number, item)
+            continue
+        first_line, first = items[item.id]
+        if (first.type, first.source) == (item.type, item.source):
+            logger.warning(
+                f"Line {line_number}: skipping a repeat of line {first_line}"
+            )
+        else:
+            errors.append(
+                f"Line {line_number}: id {item.id!r} is already used on line"
+                f" {first_line} for another source"
+            )
+
+    if errors:
+        raise ValueError(f"Invalid manifest {path}:\n" + "\n".join(errors))
+    return [item for _, item in items.values()]
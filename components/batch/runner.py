@@ -0,0 +1,171 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Set
+
+from loguru import logger
+
+from components.summarizer import Summarizer
+
+from .manifest import ManifestItem
+
+_DONE = object()
+
+
+@dataclass
+class BatchStats:
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of finished items per minute."""
+        elapsed = time.monotonic() - self.started_at
+        return (self.succeeded + self.failed) * 60 / elapsed if elapsed else 0.0
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """Return the ids of the items already summarized in a results file."""
+    if not os.path.exists(output_path):
+        return set()
+    completed = set()
+    with open(output_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run.
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+
+    return completed
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        summarizers: Dict[str, Summarizer],
+        fetchers: Dict[str, Callable[[str], str]],
+        fetch_workers: int = 8,
+        summarize_workers: int = 4,
+    ) -> None:
+        """
+        Initialize a headless runner that fetches and summarizes many sources.
+
+        Fetching and summarizing run as a pipeline: fetch workers feed a bounded
+        queue that summarize workers drain, so slow downloads and slow LLM
+        calls overlap. The LLM calls are rate limited by the chat model itself
+        (see `components.ratelimit`).
+
+        Args:
+            summarizers (Dict[str, Summarizer]): The summarizer of each source type.
+            fetchers (Dict[str, Callable[[str], str]]): The function returning the text of each source type.
+            fetch_workers (int): The number of concurrent fetches.
+            summarize_workers (int): The number of concurrent summaries.
+        """
+        self.summarizers = summarizers
+        self.fetchers = fetchers
+        self.fetch_workers = fetch_workers
+        self.summarize_workers = summarize_workers
+
+    def run(self, items: Iterable[ManifestItem], output_path: str) -> BatchStats:
+        """
+        Summarize all items, appending one JSON line per item to the output file.
+
+        Items already summarized in the output file are skipped, so an
+        interrupted run resumes where it stopped; failed items are retried.
+        An id repeated in `items` is only summarized once.
+
+        Args:
+            items (Iterable[ManifestItem]): The items to summarize.
+            output_path (str): The path of the JSONL results file.
+
+        Returns:
+            BatchStats: The number of succeeded, failed and skipped items.
+        """
+        completed = load_completed_ids(output_path)
+        stats = BatchStats()
+        texts: "queue.Queue" = queue.Queue(maxsize=2 * self.summarize_workers)
+        in_flight = threading.BoundedSemaphore(2 * self.fetch_workers)
+        write_lock = threading.Lock()
+
+        with open(output_path, "a", encoding="utf-8") as output:
+
+            def write(item: ManifestItem, **fields) -> None:
+                record = {"id": item.id, "type": item.type, "source": item.source, **fields}
+                with write_lock:
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    if fields["status"] == "ok":
+                        stats.succeeded += 1
+                    else:
+                        stats.failed += 1
+                    finished = stats.succeeded + stats.failed
+                    if finished % 10 == 0:
+                        logger.info(
+                            f"{finished} items done ({stats.failed} failed),"
+                            f" {stats.throughput:.1f} items/min"
+                        )
+
+            def fetch(item: ManifestItem) -> None:
+                try:
+                    text = self.fetchers[item.type](item.source)
+                    if not text:
+                        raise ValueError("No text found")
+                    texts.put((item, text))
+                except Exception as e:
+                    write(item, status="error", error=f"fetch: {e}")
+                finally:
+                    in_flight.release()
+
+            def summarize_worker() -> None:
+                while True:
+                    entry = texts.get()
+                    if entry is _DONE:
+                        return
+                    item, text = entry
+                    start = time.monotonic()
+                    try:
+                        summary = self.summarizers[item.type].summarize(text)
+                        write(
+                            item,
+                            status="ok",
+                            summary=summary,
+                            elapsed_s=round(time.monotonic() - start, 3),
+                        )
+                    except Exception as e:
+                        write(item, status="error", error=f"summarize: {e}")
+
+            workers = [
+                threading.Thread(target=summarize_worker, daemon=True)
+                for _ in range(self.summarize_workers)
+            ]
+            for worker in workers:
+                worker.start()
+
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool:
+                for item in items:
+                    if item.id in completed:
+                        stats.skipped += 1
+                        continue
+                    completed.add(item.id)
+                    in_flight.acquire()
+                    fetch_pool.submit(fetch, item)
+
+            for _ in workers:
+                texts.put(_DONE)
+            for worker in workers:
+                worker.join()
+
+        logger.info(
+            f"Batch finished: {stats.succeeded} succeeded, {stats.failed} failed,"
+            f" {stats.skipped} skipped"
+        )
+        return stats
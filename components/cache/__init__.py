@@ -0,0 +1,35 @@
+import importlib
+
+from .backends import BaseCache, LRUCache, SQLiteCache, TieredCache
+from .keys import hash_bytes, make_key, normalize_text
+from .redis_cache import RedisCache
+from .singleflight import SingleFlight
+
+# Imported on first use: the near-duplicate index needs NumPy.
+_LAZY_IMPORTS = {
+    "MinHasher": ".similarity",
+    "SemanticCache": ".similarity",
+    "SimilarityIndex": ".similarity",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "BaseCache",
+    "LRUCache",
+    "MinHasher",
+    "RedisCache",
+    "SQLiteCache",
+    "SemanticCache",
+    "SimilarityIndex",
+    "SingleFlight",
+    "TieredCache",
+    "hash_bytes",
+    "make_key",
+    "normalize_text",
+]
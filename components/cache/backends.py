@@ -0,0 +1,364 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+
+class BaseCache(ABC):
+    """A key-value cache with per-entry expiry. Values must be JSON-serializable."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        Return the cached value and its remaining time-to-live in seconds, None
+        if it doesn't expire or the backend doesn't know.
+        """
+        return self.get(key), None
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value. `ttl` overrides the default time-to-live in seconds."""
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """
+        Store a value only if the key is missing or expired, e.g. to take a lock.
+
+        Backends shared by several processes make the check and the write atomic.
+
+        Returns:
+            bool: Whether the value was stored.
+        """
+        if self.get(key) is not None:
+            return False
+        self.set(key, value, ttl=ttl)
+        return True
+
+    def renew(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """
+        Reset the time-to-live of a key only if it still holds `value`, e.g. to
+        extend a lock. Backends shared by several processes make it atomic.
+
+        Returns:
+            bool: Whether the key was renewed.
+        """
+        if self.get(key) != value:
+            return False
+        self.set(key, value, ttl=ttl)
+        return True
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        """
+        Remove a key only if it still holds `value`, e.g. to release a lock.
+        Backends shared by several processes make it atomic.
+
+        Returns:
+            bool: Whether the key was removed.
+        """
+        if self.get(key) != value:
+            return False
+        self.delete(key)
+        return True
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a value if present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all values."""
+
+    def get_or_set(
+        self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached value, or compute and store it on a miss.
+
+        Empty results (None, "", []) are returned but not stored.
+
+        Args:
+            key (str): The cache key.
+            compute (Callable[[], Any]): Computes the value on a miss.
+            ttl (Optional[float]): Overrides the default time-to-live in seconds.
+
+        Returns:
+            Any: The cached or computed value.
+        """
+        value = self.get(key)
+        if value is not None:
+            logger.info(f"Cache hit: {key}")
+            return value
+        value = compute()
+        if value:
+            self.set(key, value, ttl=ttl)
+        return value
+
+
+def _expires_at(ttl: Optional[float]) -> Optional[float]:
+    return time.time() + ttl if ttl else None
+
+
+def _expired(expires_at: Optional[float], now: float) -> bool:
+    return expires_at is not None and expires_at < now
+
+
+def _remaining(expires_at: Optional[float], now: float) -> Optional[float]:
+    # Expiring now still needs a positive TTL, since 0 means the default TTL.
+    return max(expires_at - now, 1e-3) if expires_at is not None else None
+
+
+class LRUCache(BaseCache):
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None) -> None:
+        """
+        Initialize an in-process least-recently-used cache.
+
+        Args:
+            max_entries (int): The maximum number of entries kept.
+            ttl (Optional[float]): The default time-to-live in seconds, None for no expiry.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_with_ttl(key)[0]
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None, None
+            value, expires_at = item
+            if expires_at is not None and expires_at < now:
+                del self._data[key]
+                return None, None
+            self._data.move_to_end(key)
+            return value, _remaining(expires_at, now)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, _expires_at(ttl or self.ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and not _expired(item[1], time.time()):
+                return False
+            self._data[key] = (value, _expires_at(ttl or self.ttl))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return True
+
+    def renew(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] != value or _expired(item[1], time.time()):
+                return False
+            self._data[key] = (value, _expires_at(ttl or self.ttl))
+            return True
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] != value:
+                return False
+            del self._data[key]
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(BaseCache):
+    def __init__(
+        self, path: str, max_entries: int = 10_000, ttl: Optional[float] = None
+    ) -> None:
+        """
+        Initialize an on-disk cache stored in a SQLite file.
+
+        The file can be shared by several processes. When the cache grows past
+        `max_entries`, the least recently accessed entries are evicted.
+
+        Args:
+            path (str): The path of the SQLite file.
+            max_entries (int): The maximum number of entries kept.
+            ttl (Optional[float]): The default time-to-live in seconds, None for no expiry.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_with_ttl(key)[0]
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None, None
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(value), _remaining(expires_at, now)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), _expires_at(ttl or self.ttl), now),
+            )
+            self._evict(now)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        # The first statement takes the write lock of the file, so another
+        # process can't add the key in between.
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key = ? AND expires_at < ?", (key, now)
+            )
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), _expires_at(ttl or self.ttl), now),
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE cache SET expires_at = ?, accessed_at = ?"
+                " WHERE key = ? AND value = ?"
+                " AND (expires_at IS NULL OR expires_at >= ?)",
+                (
+                    _expires_at(ttl or self.ttl),
+                    now,
+                    key,
+                    json.dumps(value, ensure_ascii=False),
+                    now,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE key = ? AND value = ?",
+                (key, json.dumps(value, ensure_ascii=False)),
+            )
+            return cursor.rowcount == 1
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        )
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+
+class TieredCache(BaseCache):
+    def __init__(self, layers: List[BaseCache]) -> None:
+        """
+        Initialize a cache that looks up several caches in order, e.g. an
+        in-process LRU in front of a SQLite file. Hits in a slower layer are
+        copied to the faster layers, until they expire in the slower layer.
+
+        Args:
+            layers (List[BaseCache]): The caches, fastest first.
+        """
+        self.layers = layers
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_with_ttl(key)[0]
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        for i, layer in enumerate(self.layers):
+            value, ttl = layer.get_with_ttl(key)
+            if value is not None:
+                for faster in self.layers[:i]:
+                    faster.set(key, value, ttl=ttl)
+                return value, ttl
+        return None, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        for layer in self.layers:
+            layer.set(key, value, ttl=ttl)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        # The slowest layer is the one shared between processes.
+        return self.layers[-1].add(key, value, ttl=ttl)
+
+    def renew(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return self.layers[-1].renew(key, value, ttl=ttl)
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        if not self.layers[-1].delete_if(key, value):
+            return False
+        for layer in self.layers[:-1]:
+            layer.delete(key)
+        return True
+
+    def delete(self, key: str) -> None:
+        for layer in self.layers:
+            layer.delete(key)
+
+    def clear(self) -> None:
+        for layer in self.layers:
+            layer.clear()
@@ -0,0 +1,32 @@
+import hashlib
+import json
+import re
+from typing import Any
+
+
+def normalize_text(text: str) -> str:
+    """Normalize line endings and surrounding whitespace so equal inputs hash equally."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    return text.strip()
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw bytes (e.g. an uploaded PDF)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(namespace: str, *parts: Any) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        namespace (str): The kind of value cached, e.g. "summary" or "subtitles".
+        *parts (Any): JSON-serializable values the cached value depends on.
+
+    Returns:
+        str: The key, `namespace:<sha256 of parts>`.
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
@@ -0,0 +1,111 @@
+import json
+from typing import Any, Optional, Tuple
+
+from .backends import BaseCache
+
+# Compare-and-set scripts, atomic on the server. KEYS[1] is the key, ARGV[1]
+# the expected value and ARGV[2] the new time-to-live in milliseconds or "".
+RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then return 0 end
+if ARGV[2] == "" then redis.call("PERSIST", KEYS[1])
+else redis.call("PEXPIRE", KEYS[1], ARGV[2]) end
+return 1
+"""
+DELETE_IF_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then return 0 end
+return redis.call("DEL", KEYS[1])
+"""
+
+
+class RedisCache(BaseCache):
+    def __init__(
+        self, client, prefix: str = "gptsummary:", ttl: Optional[float] = None
+    ) -> None:
+        """
+        Initialize a cache stored in Redis, shared by every app process and host.
+
+        Any client with the API of `redis.Redis` works (`get`, `set` with `px`
+        and `nx`, `pttl`, `delete`, `scan_iter`, and `eval` of Lua scripts),
+        e.g. for Valkey or KeyDB, or a local stand-in for tests.
+
+        Args:
+            client: The Redis client.
+            prefix (str): Prepended to the keys, to share a server with other data.
+            ttl (Optional[float]): The default time-to-live in seconds, None for no expiry.
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        """Create a cache from a URL like redis://localhost:6379/0; needs `redis`."""
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError(
+                "The Redis result store needs the redis package: pip install redis"
+            ) from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _px(self, ttl: Optional[float]) -> Optional[int]:
+        ttl = ttl or self.ttl
+        return max(1, int(ttl * 1000)) if ttl else None
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        value = self.get(key)
+        if value is None:
+            return None, None
+        # -1 for no expiry, -2 if the key expired in between.
+        ttl_ms = self.client.pttl(self.prefix + key)
+        return value, ttl_ms / 1000 if ttl_ms >= 0 else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.client.set(
+            self.prefix + key,
+            json.dumps(value, ensure_ascii=False),
+            px=self._px(ttl),
+        )
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(
+            self.client.set(
+                self.prefix + key,
+                json.dumps(value, ensure_ascii=False),
+                px=self._px(ttl),
+                nx=True,
+            )
+        )
+
+    def renew(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        px = self._px(ttl)
+        return bool(
+            self.client.eval(
+                RENEW_SCRIPT,
+                1,
+                self.prefix + key,
+                json.dumps(value, ensure_ascii=False),
+                "" if px is None else str(px),
+            )
+        )
+
+    def delete_if(self, key: str, value: Any) -> bool:
+        return bool(
+            self.client.eval(
+                DELETE_IF_SCRIPT,
+                1,
+                self.prefix + key,
+                json.dumps(value, ensure_ascii=False),
+            )
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(key)
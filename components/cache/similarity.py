@@ -0,0 +1,331 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+MAX_HASH = np.uint64((1 << 32) - 1)
+# Shingles hashed at once, to bound the memory of the (permutations x shingles) matrix.
+SHINGLE_BLOCK = 4096
+# Signature values compared against every entry before the full comparison.
+PREFILTER_SIZE = 16
+
+
+class MinHasher:
+    def __init__(
+        self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1
+    ) -> None:
+        """
+        Initialize a MinHash fingerprinter of texts.
+
+        The fraction of equal values in the signatures of two texts estimates the
+        Jaccard similarity of their sets of word shingles, so texts differing by a
+        few lines have close signatures.
+
+        Args:
+            num_perm (int): The number of hash permutations, i.e. the signature length.
+            shingle_size (int): The number of consecutive words in a shingle.
+            seed (int): The seed of the permutations; signatures are only comparable
+                with the same seed and number of permutations.
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Multiply-shift hashing: the high 32 bits of a * x + b, with a odd.
+        rng = np.random.RandomState(seed)
+        high, low = rng.randint(0, 1 << 32, size=(2, 2, num_perm), dtype=np.uint64)
+        self._a = high[0] << np.uint64(32) | low[0] | np.uint64(1)
+        self._b = (high[1] << np.uint64(32) | low[1])[:, np.newaxis]
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Return the lowercase words of a text."""
+        return WORD_PATTERN.findall(text.lower())
+
+    def shingles(self, words: List[str]) -> np.ndarray:
+        """Return the distinct 32-bit hashes of the word shingles of a text."""
+        hashes = np.fromiter(
+            (zlib.crc32(word.encode("utf-8")) for word in words),
+            dtype=np.uint64,
+            count=len(words),
+        )
+        size = max(1, min(self.shingle_size, len(words)))
+        shingles = hashes[: len(hashes) - size + 1].copy()
+        for offset in range(1, size):
+            shingles *= SHINGLE_MULTIPLIER
+            shingles += hashes[offset : offset + len(shingles)]
+        return np.unique((shingles ^ shingles >> np.uint64(32)) & MAX_HASH)
+
+    def signature(self, words: List[str]) -> np.ndarray:
+        """Return the MinHash signature of a text, as `num_perm` uint32 values."""
+        signature = np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        shingles = self.shingles(words)
+        for start in range(0, len(shingles), SHINGLE_BLOCK):
+            block = shingles[start : start + SHINGLE_BLOCK]
+            hashed = np.multiply.outer(self._a, block)
+            hashed += self._b
+            hashed >>= np.uint64(32)
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+class SimilarityIndex:
+    def __init__(self, num_perm: int = 128, max_entries: int = 200_000) -> None:
+        """
+        Initialize an in-memory index of MinHash signatures, searched with
+        vectorized comparisons against all entries.
+
+        Signatures are stored column by column, so the first values of every
+        entry are compared first and only the entries close enough on those are
+        compared in full.
+
+        Args:
+            num_perm (int): The signature length.
+            max_entries (int): The maximum number of entries; the oldest are dropped.
+        """
+        self.num_perm = num_perm
+        self.max_entries = max_entries
+        self._signatures = np.empty((num_perm, 1024), dtype=np.uint32)
+        self._keys: List[str] = []
+        self._columns: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        """
+        Add the signature of the value stored under `key`. A key already in
+        the index gets the new signature and keeps its place among the oldest.
+        """
+        column = self._columns.get(key)
+        if column is not None:
+            self._signatures[:, column] = signature
+            return
+
+        size = len(self._keys)
+        if size == self.max_entries:
+            # Drop the oldest tenth at once rather than shifting on every add.
+            drop = max(1, self.max_entries // 10)
+            self._signatures[:, : size - drop] = self._signatures[:, drop:size]
+            del self._keys[:drop]
+            self._columns = {existing: i for i, existing in enumerate(self._keys)}
+            size -= drop
+        if size == self._signatures.shape[1]:
+            columns = min(2 * size, self.max_entries)
+            grown = np.empty((self.num_perm, columns), dtype=np.uint32)
+            grown[:, :size] = self._signatures[:, :size]
+            self._signatures = grown
+        self._signatures[:, size] = signature
+        self._columns[key] = size
+        self._keys.append(key)
+
+    def query(
+        self, signature: np.ndarray, min_similarity: float = 0.0
+    ) -> Tuple[Optional[str], float]:
+        """
+        Return the key of the most similar entry and its estimated Jaccard similarity.
+
+        Args:
+            signature (np.ndarray): The signature to look up.
+            min_similarity (float): Entries whose first signature values show they
+                are very likely less similar are skipped.
+
+        Returns:
+            Tuple[Optional[str], float]: The key, None if no entry is similar
+                enough, and the similarity.
+        """
+        size = len(self._keys)
+        prefilter = min(PREFILTER_SIZE, self.num_perm)
+        # Allow three standard deviations of the estimate on the prefilter values.
+        deviation = 3 * np.sqrt(prefilter * min_similarity * (1 - min_similarity))
+        needed = int(np.floor(prefilter * min_similarity - deviation))
+
+        if needed > 0:
+            matches = np.zeros(size, dtype=np.uint8)
+            for row in range(prefilter):
+                matches += self._signatures[row, :size] == signature[row]
+            candidates = np.flatnonzero(matches >= needed)
+        else:
+            candidates = np.arange(size)
+        if not len(candidates):
+            return None, 0.0
+
+        columns = self._signatures[:, :size][:, candidates]
+        matches = np.count_nonzero(columns == signature[:, np.newaxis], axis=0)
+        best = int(matches.argmax())
+        return self._keys[candidates[best]], float(matches[best]) / self.num_perm
+
+
+@dataclass
+class SemanticCacheStats:
+    hits: int = 0
+    misses: int = 0
+    lookup_seconds: List[float] = field(default_factory=list)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        latencies = sorted(self.lookup_seconds) or [0.0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "lookup_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+            "lookup_p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+        }
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        min_words: int = 50,
+        max_entries: int = 200_000,
+    ) -> None:
+        """
+        Initialize a near-duplicate index of cached inputs, e.g. the same article
+        from a mirror, or a transcript differing by a few captions.
+
+        The index maps an input to the cache key of its result; the results stay
+        in the regular cache. Entries are grouped by scope (e.g. prompt, model and
+        language), and only inputs of the same scope are compared.
+
+        Args:
+            path (Optional[str]): A SQLite file the signatures are persisted to,
+                so the index survives restarts; in memory only if None.
+            threshold (float): The minimum estimated Jaccard similarity of a hit.
+            num_perm (int): The MinHash signature length.
+            min_words (int): Shorter inputs are never matched; their fingerprints
+                are too coarse.
+            max_entries (int): The maximum number of entries per scope, in memory
+                and in the SQLite file; the oldest are dropped.
+        """
+        self.threshold = threshold
+        self.min_words = min_words
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm)
+        self.stats = SemanticCacheStats()
+        self._indexes: Dict[str, SimilarityIndex] = defaultdict(
+            lambda: SimilarityIndex(num_perm, max_entries)
+        )
+        self._lock = threading.Lock()
+        self._conn = None
+        # The number of rows of each scope in the SQLite file, at most.
+        self._persisted: Dict[str, int] = defaultdict(int)
+
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS signatures ("
+                    " scope TEXT NOT NULL,"
+                    " key TEXT NOT NULL,"
+                    " signature BLOB NOT NULL)"
+                )
+                # Files written before keys were unique may have duplicates.
+                self._conn.execute(
+                    "DELETE FROM signatures WHERE rowid NOT IN ("
+                    " SELECT MAX(rowid) FROM signatures GROUP BY scope, key)"
+                )
+                self._conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS signatures_scope_key"
+                    " ON signatures (scope, key)"
+                )
+                scopes = [
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT DISTINCT scope FROM signatures"
+                    )
+                ]
+                for scope in scopes:
+                    self._trim(scope)
+                rows = self._conn.execute(
+                    "SELECT scope, key, signature FROM signatures ORDER BY rowid"
+                ).fetchall()
+            for scope, key, blob in rows:
+                signature = np.frombuffer(blob, dtype=np.uint32)
+                self._persisted[scope] += 1
+                if len(signature) == num_perm:
+                    self._indexes[scope].add(key, signature)
+
+    def _trim(self, scope: str) -> None:
+        """Delete the oldest rows of a scope beyond `max_entries`."""
+        self._conn.execute(
+            "DELETE FROM signatures WHERE scope = ? AND rowid NOT IN ("
+            " SELECT rowid FROM signatures WHERE scope = ?"
+            " ORDER BY rowid DESC LIMIT ?)",
+            (scope, scope, self.max_entries),
+        )
+        self._persisted[scope] = min(self._persisted[scope], self.max_entries)
+
+    def _signature(self, text: str) -> Optional[np.ndarray]:
+        words = self.hasher.tokenize(text)
+        if len(words) < self.min_words:
+            return None
+        return self.hasher.signature(words)
+
+    def lookup(self, text: str, scope: str) -> Optional[str]:
+        """
+        Return the cache key of a near-duplicate of a text, if any.
+
+        Args:
+            text (str): The input text.
+            scope (str): Only inputs added with the same scope are compared.
+
+        Returns:
+            Optional[str]: The cache key of the most similar input, if similar enough.
+        """
+        start = time.perf_counter()
+        signature = self._signature(text)
+        key, similarity = None, 0.0
+        if signature is not None:
+            with self._lock:
+                if scope in self._indexes:
+                    key, similarity = self._indexes[scope].query(
+                        signature, self.threshold
+                    )
+        hit = key is not None and similarity >= self.threshold
+        with self._lock:
+            self.stats.lookup_seconds.append(time.perf_counter() - start)
+            del self.stats.lookup_seconds[:-10_000]
+            if hit:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+        return key if hit else None
+
+    def add(self, text: str, scope: str, key: str) -> None:
+        """Index a text whose result is cached under `key`."""
+        signature = self._signature(text)
+        if signature is None:
+            return
+        with self._lock:
+            self._indexes[scope].add(key, signature)
+            if self._conn is not None:
+                with self._conn:
+                    # Replacing moves the key to the newest end, like a new row.
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO signatures (scope, key, signature)"
+                        " VALUES (?, ?, ?)",
+                        (scope, key, signature.tobytes()),
+                    )
+                    self._persisted[scope] += 1
+                    # Trim a tenth at once rather than on every add.
+                    if self._persisted[scope] > self.max_entries * 1.1:
+                        self._trim(scope)
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from .backends import BaseCache, TieredCache
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(
+        self, cache: BaseCache, lease_ttl: float = 60.0, poll_interval: float = 0.5
+    ) -> None:
+        """
+        Initialize a store of results computed once for every caller, across the
+        threads and processes sharing `cache`.
+
+        The first caller of a key takes a lease in the cache and computes the
+        result, renewing the lease until it's done. Concurrent callers in the
+        same process wait for it; callers in other processes poll the cache
+        until the result is stored, or until the lease is gone (its holder
+        failed or died) and they take it themselves.
+
+        Args:
+            cache (BaseCache): The shared cache of results and leases, e.g. a
+                SQLite file for the processes of one host or Redis for several hosts.
+            lease_ttl (float): The time after which the lease of a process that
+                died expires, in seconds; it's renewed every third of it.
+            poll_interval (float): The time between two checks of another
+                process's computation, in seconds.
+        """
+        self.cache = cache
+        # A lease copied to the memory of a process by a tiered cache could
+        # outlive the shared one, so leases only live in the shared layer.
+        self.leases = cache.layers[-1] if isinstance(cache, TieredCache) else cache
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored result of a key, or None."""
+        return self.cache.get(key)
+
+    def do(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the stored result of a key, or compute it once for all callers.
+
+        Empty results (None, "", []) are returned but not stored.
+
+        Args:
+            key (str): Identifies the computation and its inputs.
+            compute (Callable[[], Any]): Computes the result.
+            ttl (Optional[float]): Overrides the time-to-live of the result in seconds.
+            cache_if (Optional[Callable[[Any], bool]]): Whether to store a result,
+                e.g. not partial ones; callers already waiting get it either way.
+
+        Returns:
+            Any: The stored or computed result.
+        """
+        value = self.cache.get(key)
+        if value is not None:
+            logger.info(f"Shared result hit: {key}")
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._do(key, compute, ttl, cache_if)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _do(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[float],
+        cache_if: Optional[Callable[[Any], bool]],
+    ) -> Any:
+        lease_key = f"{key}:lease"
+        while True:
+            if self.leases.add(lease_key, self.owner, ttl=self.lease_ttl):
+                done = threading.Event()
+                renewer = threading.Thread(
+                    target=self._renew_lease,
+                    args=(lease_key, done),
+                    name="lease-renewer",
+                    daemon=True,
+                )
+                renewer.start()
+                try:
+                    # Stored by another process between the first check and the lease.
+                    value = self.cache.get(key)
+                    if value is not None:
+                        return value
+                    value = compute()
+                    if value and (cache_if is None or cache_if(value)):
+                        self.cache.set(key, value, ttl=ttl)
+                    return value
+                finally:
+                    done.set()
+                    renewer.join()
+                    # The lease may have been lost and taken by another process.
+                    self.leases.delete_if(lease_key, self.owner)
+
+            logger.info(f"Waiting for the result of {key} from another process")
+            while self.leases.get(lease_key) is not None:
+                time.sleep(self.poll_interval)
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+
+    def _renew_lease(self, lease_key: str, done: threading.Event) -> None:
+        while not done.wait(self.lease_ttl / 3):
+            if not self.leases.renew(lease_key, self.owner, ttl=self.lease_ttl):
+                logger.warning(f"Lost the lease {lease_key}; it may be computed twice")
+                return
@@ -0,0 +1,4 @@
+from .queue import JobQueue
+from .store import Job, JobStore
+
+__all__ = ["Job", "JobQueue", "JobStore"]
@@ -0,0 +1,55 @@
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+from .queue import JobQueue
+from .store import DONE, ERROR
+
+
+def poll_job(
+    queue: JobQueue,
+    job_key: str,
+    result_key: str,
+    interval: float = 1.0,
+    on_done: Optional[Callable[[Any], None]] = None,
+) -> None:
+    """
+    Show the progress of the job whose ID is in `st.session_state[job_key]`,
+    refreshing every `interval` seconds without rerunning the page.
+
+    When the job is done, its result is stored in `st.session_state[result_key]`
+    and the page is rerun. Does nothing if there's no job.
+
+    Args:
+        queue (JobQueue): The queue the job was submitted to.
+        job_key (str): The session state key of the job ID.
+        result_key (str): The session state key the result is stored in.
+        interval (float): The polling interval, in seconds.
+        on_done (Optional[Callable[[Any], None]]): Stores the result instead, e.g.
+            to split it between several session state keys.
+    """
+
+    @st.fragment(run_every=interval)
+    def poll() -> None:
+        job_id = st.session_state.get(job_key)
+        job = queue.get(job_id) if job_id else None
+        if job is None or job.status in (DONE, ERROR):
+            if job is not None and job.status == DONE:
+                if on_done is not None:
+                    on_done(job.result)
+                else:
+                    st.session_state[result_key] = job.result
+            else:
+                st.session_state[error_key] = job.error if job else "Job not found"
+            st.session_state.pop(job_key, None)
+            st.rerun()
+
+        st.caption(f"{job.kind.capitalize()} job {job.status}...")
+        if job.progress:
+            st.markdown(job.progress)
+
+    error_key = f"{job_key}_error"
+    if error_key in st.session_state:
+        st.error(f"The job failed: {st.session_state.pop(error_key)}")
+    if job_key in st.session_state:
+        poll()
@@ -0,0 +1,90 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from .store import DONE, ERROR, RUNNING, Job, JobStore
+
+# A job function receives a callback to report its progress, e.g. the summary so far.
+JobFunction = Callable[[Callable[[str], None]], Any]
+
+
+class JobQueue:
+    def __init__(
+        self, store: JobStore, max_workers: int = 4, progress_interval: float = 0.5
+    ) -> None:
+        """
+        Initialize a queue that runs summarize and diagram jobs on a worker pool.
+
+        Jobs outlive the Streamlit script run that submitted them: a rerun or a
+        widget interaction doesn't cancel them, and the page polls their state.
+
+        Args:
+            store (JobStore): The persistent state of the jobs.
+            max_workers (int): The number of jobs run at once.
+            progress_interval (float): The minimum time between two progress
+                writes of a job, in seconds.
+        """
+        self.store = store
+        self.progress_interval = progress_interval
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._active: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: str, fn: JobFunction) -> str:
+        """
+        Submit a job, or join the job already running for the same key.
+
+        Args:
+            kind (str): The kind of job, e.g. "summary" or "diagram".
+            key (str): Identifies the input; submissions with the key of an
+                active job are coalesced into it.
+            fn (JobFunction): The work, called with a progress callback; its
+                JSON-serializable return value is the result of the job.
+
+        Returns:
+            str: The job ID.
+        """
+        with self._lock:
+            job_id = self._active.get(key)
+            if job_id is not None:
+                logger.info(f"Joining active {kind} job {job_id}")
+                return job_id
+            job = self.store.create(kind, key)
+            self._active[key] = job.id
+
+        # Run in the submitter's context, so the job keeps its request ID and
+        # rate limit owner.
+        context = contextvars.copy_context()
+        self._executor.submit(context.run, self._run, job, fn)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the current state of a job."""
+        return self.store.get(job_id)
+
+    def _run(self, job: Job, fn: JobFunction) -> None:
+        self.store.update(job.id, status=RUNNING)
+        last_write = 0.0
+
+        def progress(text: str) -> None:
+            nonlocal last_write
+            now = time.monotonic()
+            if now - last_write >= self.progress_interval:
+                self.store.update(job.id, progress=text)
+                last_write = now
+
+        try:
+            result = fn(progress)
+            self.store.update(job.id, status=DONE, result=result)
+        except Exception as e:
+            logger.exception(f"{job.kind} job {job.id} failed")
+            self.store.update(job.id, status=ERROR, error=str(e))
+        finally:
+            with self._lock:
+                self._active.pop(job.key, None)
@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+ACTIVE_STATUSES = (PENDING, RUNNING)
+FINISHED_STATUSES = (DONE, ERROR)
+COLUMNS = "id, kind, key, status, progress, result, error, created_at, updated_at"
+
+
+def _owner_alive(owner: Optional[str], current: str) -> bool:
+    """Whether the process that owns a job, "<pid>-<id>", is still running."""
+    if owner == current:
+        return True
+    try:
+        pid = int((owner or "").split("-")[0])
+    except ValueError:
+        return False
+    # A previous process of the app with the same PID, e.g. PID 1 in a container.
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: str
+    status: str = PENDING
+    progress: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+
+class JobStore:
+    def __init__(
+        self,
+        path: str,
+        retention: float = 7 * 24 * 3600,
+        prune_interval: float = 3600,
+    ) -> None:
+        """
+        Initialize the persistent state of jobs, stored in a SQLite file that
+        may be shared by the app processes of a host.
+
+        Each job records the process running it. Jobs left pending or running
+        by a process that is gone are marked as failed, since nothing will
+        finish them; the jobs of the other live processes are left alone.
+
+        Args:
+            path (str): The path of the SQLite file.
+            retention (float): The time finished jobs are kept, in seconds.
+            prune_interval (float): The minimum time between two deletions of
+                old finished jobs, in seconds.
+        """
+        self.path = path
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " progress TEXT NOT NULL DEFAULT '',"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)"
+            )
+        self._fail_orphans()
+        self._prune()
+
+    def _fail_orphans(self) -> None:
+        """Mark the active jobs of processes that are gone as failed."""
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN (?, ?)", ACTIVE_STATUSES
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                [
+                    (ERROR, "Interrupted by a restart", now, job_id)
+                    for job_id, owner in rows
+                    if not _owner_alive(owner, self.owner)
+                ],
+            )
+
+    def _prune(self) -> None:
+        """Delete the jobs finished more than `retention` seconds ago."""
+        now = time.time()
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*FINISHED_STATUSES, now - self.retention),
+            )
+
+    def create(self, kind: str, key: str) -> Job:
+        """Create a pending job, owned by this process."""
+        self._prune()
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, kind=kind, key=key, created_at=now, updated_at=now)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs"
+                " (id, kind, key, status, owner, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, kind, key, job.status, self.owner, now, now),
+            )
+        return job
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Update the status, progress, result or error of a job."""
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job, or None if it doesn't exist."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def recent(self, limit: int = 20) -> List[Job]:
+        """Return the most recently created jobs."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def _to_job(self, row: tuple) -> Job:
+        job_id, kind, key, status, progress, result, error, created_at, updated_at = row
+        return Job(
+            id=job_id,
+            kind=kind,
+            key=key,
+            status=status,
+            progress=progress,
+            result=json.loads(result) if result is not None else None,
+            error=error,
+            created_at=created_at,
+            updated_at=updated_at,
+        )
@@ -0,0 +1,90 @@
+from components.ratelimit import get_rate_limiter
+from config import settings
+
+MODELS = {
+    "Gemini": [
+        "gemini-1.5-flash-latest",
+        "gemini-1.5-pro-latest",
+        "gemini-1.5-pro-exp-0801",
+    ],
+    "Yi": ["yi-large"],
+    "Groq": ["llama3-70b-8192", "mixtral-8x7b-32768"],
+    "Auto": ["fastest-available"],
+}
+
+
+def create_llm(provider: str, model_name: str):
+    """
+    Create a chat model client.
+
+    The calls of every client of a model share one process-wide rate limiter,
+    so concurrent sessions stay within the provider quota together.
+
+    Args:
+        provider (str): The model provider, one of the keys of `MODELS`. "Auto" routes
+            each call to the fastest healthy provider.
+        model_name (str): The name of the model.
+
+    Returns:
+        BaseChatModel: The chat model.
+    """
+    # LangChain and the provider SDKs are imported here, so only the providers
+    # actually used are loaded and listing the models stays cheap.
+    from components.ratelimit import RateLimitedChatModel
+    from components.router import RouterChatModel
+
+    if provider == "Auto":
+        return RouterChatModel(
+            backends={
+                f"{name}/{models[0]}": create_llm(name, models[0])
+                for name, models in MODELS.items()
+                if name != "Auto"
+            }
+        )
+    return RateLimitedChatModel(
+        llm=_create_client(provider, model_name),
+        limiter=get_rate_limiter(provider, model_name),
+        model_name=model_name,
+    )
+
+
+def _create_client(provider: str, model_name: str):
+    if provider == "Gemini":
+        from langchain_google_genai import (
+            ChatGoogleGenerativeAI,
+            HarmBlockThreshold,
+            HarmCategory,
+        )
+
+        safety_settings = {
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
+        }
+        return ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=0,
+            google_api_key=settings.GOOGLE_API_KEY,
+            safety_settings=safety_settings,
+        )
+    if provider == "Yi":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model_name,
+            temperature=0,
+            api_key=settings.YI_API_KEY,
+            base_url=settings.YI_BASE_URL,
+        )
+    if provider == "Groq":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model_name,
+            temperature=0,
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL,
+        )
+    raise ValueError(f"Unknown model provider: {provider}")
@@ -1,4 +1,28 @@
-from .diagram_generator import DiagramGenerator
-from .show_diagram import show_diagram
+import importlib
 
-__all__ = ["DiagramGenerator", "show_diagram"]
+from .render import DiagramRenderer
+from .show_diagram import render_diagram, show_diagram
+
+# Imported on first use: the generator pulls in LangChain and LangGraph, which
+# showing a diagram doesn't need.
+_LAZY_IMPORTS = {
+    "DiagramGenerator": ".diagram_generator",
+    "agenerate_diagram": ".runner",
+    "agenerate_diagrams": ".runner",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "DiagramGenerator",
+    "DiagramRenderer",
+    "agenerate_diagram",
+    "agenerate_diagrams",
+    "render_diagram",
+    "show_diagram",
+]
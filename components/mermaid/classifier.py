@@ -0,0 +1,158 @@
+import re
+import threading
+from typing import Dict, List, NamedTuple, Tuple
+
+from components.metrics import register_metric
+
+WORD_PATTERN = re.compile(r"[a-z][a-z\-]+")
+YEAR_PATTERN = re.compile(r"\b(1[5-9]\d\d|20\d\d)s?\b")
+NUMBERED_STEP_PATTERN = re.compile(r"^\s*(step\s*)?\d+[.)]\s", re.IGNORECASE | re.MULTILINE)
+BULLET_PATTERN = re.compile(r"^\s*[-*+]\s", re.MULTILINE)
+ARROW_PATTERN = re.compile(r"->|→|=>")
+
+# Words hinting at a diagram type; strong keywords count three times as much.
+KEYWORDS = {
+    "Flowchart": "step steps process stage stages then next finally decision if",
+    "Block Diagram": "module modules input output signal component components",
+    "C4 Diagram": "architecture container containers deployment api backend frontend",
+    "Class Diagram": "class classes method methods attribute attributes interface",
+    "Entity Relationship Diagram": "table tables record records primary key",
+    "Mindmap": "concept concepts idea ideas topic topics theme themes aspects insights",
+    "Sequence Diagram": "request requests response client server message messages",
+    "Timeline Diagram": "history historical year years era founded",
+    "User Journey Diagram": "user users customer customers experience",
+}
+STRONG_KEYWORDS = {
+    "Flowchart": "workflow procedure pipeline flowchart",
+    "Block Diagram": "block blocks subsystem hardware circuit",
+    "C4 Diagram": "microservice microservices infrastructure",
+    "Class Diagram": "inheritance inherits subclass object-oriented",
+    "Entity Relationship Diagram": "database entity entities schema one-to-many many-to-many",
+    "Mindmap": "mindmap brainstorm overview",
+    "Sequence Diagram": "sends replies handshake protocol",
+    "Timeline Diagram": "century decade timeline chronological",
+    "User Journey Diagram": "journey satisfaction onboarding persona checkout",
+}
+STRONG_WEIGHT = 3.0
+
+# Best score needed for full confidence; weaker evidence scales confidence down.
+MIN_EVIDENCE = 6.0
+
+DEFAULT_DIAGRAM_TYPE = "Mindmap"
+
+
+def _build_weights() -> Dict[str, List[Tuple[str, float]]]:
+    weights: Dict[str, List[Tuple[str, float]]] = {}
+    for keywords, weight in ((KEYWORDS, 1.0), (STRONG_KEYWORDS, STRONG_WEIGHT)):
+        for diagram_type, words in keywords.items():
+            for word in words.split():
+                weights.setdefault(word, []).append((diagram_type, weight))
+    return weights
+
+
+_WEIGHTS = _build_weights()
+
+
+class Classification(NamedTuple):
+    diagram_type: str
+    confidence: float
+    scores: Dict[str, float]
+
+
+def score_text(text: str) -> Dict[str, float]:
+    """Score each diagram type by weighted keyword counts and structural features."""
+    words = WORD_PATTERN.findall(text.lower())
+    scores = {diagram_type: 0.0 for diagram_type in KEYWORDS}
+    for word in words:
+        for diagram_type, weight in _WEIGHTS.get(word, ()):
+            scores[diagram_type] += weight
+
+    scores["Timeline Diagram"] += 1.5 * len(YEAR_PATTERN.findall(text))
+    scores["Flowchart"] += 1.0 * len(NUMBERED_STEP_PATTERN.findall(text))
+    scores["Sequence Diagram"] += 0.5 * len(ARROW_PATTERN.findall(text))
+    scores["Mindmap"] += 0.2 * len(BULLET_PATTERN.findall(text))
+
+    return scores
+
+
+def classify_text(text: str) -> Classification:
+    """
+    Pick the most suitable diagram type of a text without calling an LLM.
+
+    The confidence is the share of the best score in the total score, scaled
+    down when there is little evidence, so it is high only when one diagram
+    type clearly stands out.
+
+    Args:
+        text (str): The text to classify.
+
+    Returns:
+        Classification: The best diagram type, its confidence and all scores.
+    """
+    scores = score_text(text)
+    total = sum(scores.values())
+    if total == 0:
+        return Classification(DEFAULT_DIAGRAM_TYPE, 0.0, scores)
+
+    diagram_type = max(scores, key=scores.get)
+    best = scores[diagram_type]
+    confidence = best / total * min(1.0, best / MIN_EVIDENCE)
+    return Classification(diagram_type, confidence, scores)
+
+
+class ClassifierStats:
+    """Counts how often the local classifier decides alone and how often it agrees with the LLM."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.local_decisions = 0
+        self.llm_fallbacks = 0
+        self.agreements = 0
+
+    def record_local(self) -> None:
+        with self._lock:
+            self.local_decisions += 1
+
+    def record_fallback(self, local_type: str, llm_type: str) -> None:
+        with self._lock:
+            self.llm_fallbacks += 1
+            self.agreements += local_type == llm_type
+
+    @property
+    def agreement_rate(self) -> float:
+        """Return the share of LLM fallbacks where the LLM chose the local guess."""
+        with self._lock:
+            return self.agreements / self.llm_fallbacks if self.llm_fallbacks else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "local_decisions": self.local_decisions,
+                "llm_fallbacks": self.llm_fallbacks,
+                "agreements": self.agreements,
+            }
+
+    def register_metrics(self) -> None:
+        """Export the counts and the agreement rate to the metrics exporters."""
+        counters = {
+            "local_decisions": "Diagram types chosen by the local classifier alone.",
+            "llm_fallbacks": "Diagram types chosen by the LLM, the classifier unsure.",
+            "agreements": "LLM choices equal to the local classifier's guess.",
+        }
+        for name, description in counters.items():
+            register_metric(
+                f"diagram_classifier_{name}_total",
+                "counter",
+                description,
+                lambda name=name: self.as_dict()[name],
+            )
+        register_metric(
+            "diagram_classifier_agreement_ratio",
+            "gauge",
+            "Share of LLM fallbacks where the LLM chose the local guess.",
+            lambda: self.agreement_rate,
+        )
+
+
+classifier_stats = ClassifierStats()
+classifier_stats.register_metrics()
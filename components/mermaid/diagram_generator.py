@@ -1,45 +1,63 @@
-import json
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
-from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 from loguru import logger
+from pydantic import BaseModel, Field
+
+from components.metrics import Span, tracer
+from components.summarizer.preprocess import preprocess
+from components.summarizer.tokens import (
+    count_tokens,
+    default_chunk_tokens,
+    get_model_name,
+)
+
+from .classifier import classifier_stats, classify_text
+from .examples import get_example_store
+from .validator import HEADERS, extract_code, validate
+
+
+DIAGRAM_TYPE_DESCRIPTIONS = {
+    "Flowchart": "A diagram that represents a process or workflow.",
+    "Block Diagram": "A diagram that shows the main parts or functions of a system.",
+    "C4 Diagram": "A diagram that shows the context, containers, components, and code of a system.",
+    "Class Diagram": "A diagram that shows the classes in a system and their relationships.",
+    "Entity Relationship Diagram": "A diagram that shows the entities in a system and their relationships.",
+    "Mindmap": "A diagram that represents ideas and concepts branching from a central idea.",
+    "Sequence Diagram": "A diagram that shows how objects interact in a particular sequence.",
+    "Timeline Diagram": "A diagram that shows events in chronological order.",
+    "User Journey Diagram": "A diagram that shows the steps a user takes to achieve a goal.",
+}
+
+
+# The part of the final state returned by `DiagramGenerator.generate`.
+DIAGRAM_RESULT_KEYS = ("diagram_type", "mermaid_code", "valid", "errors")
 
 
 class DiagramTypeOutput(BaseModel):
     diagram_type: str = Field(
         description="The type of diagram",
-        enum=[
-            "Flowchart",
-            "Block Diagram",
-            "C4 Diagram",
-            "Class Diagram",
-            "Entity Relationship Diagram",
-            "Mindmap",
-            "Sequence Diagram",
-            "Timeline Diagram",
-            "User Journey Diagram",
-        ],
-        examples={
-            "Flowchart": "A diagram that represents a process or workflow.",
-            "Block Diagram": "A diagram that shows the main parts or functions of a system.",
-            "C4 Diagram": "A diagram that shows the context, containers, components, and code of a system.",
-            "Class Diagram": "A diagram that shows the classes in a system and their relationships.",
-            "Entity Relationship Diagram": "A diagram that shows the entities in a system and their relationships.",
-            "Mindmap": "A diagram that represents ideas and concepts branching from a central idea.",
-            "Sequence Diagram": "A diagram that shows how objects interact in a particular sequence.",
-            "Timeline Diagram": "A diagram that shows events in chronological order.",
-            "User Journey Diagram": "A diagram that shows the steps a user takes to achieve a goal.",
+        json_schema_extra={
+            "enum": list(DIAGRAM_TYPE_DESCRIPTIONS),
+            "examples": DIAGRAM_TYPE_DESCRIPTIONS,
         },
     )
 
 
 class DiagramState(BaseModel):
     text: str
-    diagram_type: Optional[str]
-    mermaid_code: Optional[str]
+    diagram_type: Optional[str] = None
+    local_diagram_type: Optional[str] = None
+    confidence: Optional[float] = None
+    mermaid_code: Optional[str] = None
+    valid: Optional[bool] = None
+    errors: Optional[List[str]] = None
+    repairable: Optional[bool] = None
+    repairs: int = 0
+    regenerations: int = 0
 
 
 class DiagramGenerator:
@@ -48,6 +66,9 @@ class DiagramGenerator:
         llm,
         language: str,
         examples_filepath: str,
+        classifier_threshold: float = 0.6,
+        max_repairs: int = 2,
+        max_regenerations: int = 1,
     ) -> None:
         """
         Initialize the DiagramGenerator with the given language model, parser, and path to Mermaid examples.
@@ -56,26 +77,111 @@ class DiagramGenerator:
             llm (ChatGoogleGenerativeAI): The language model used for generating diagrams.
             language (str): The language to use for generating diagrams.
             examples_filepath (str): The path to the JSON file containing Mermaid examples.
+            classifier_threshold (float): The minimum confidence of the local classifier
+                to skip the LLM when choosing the diagram type.
+            max_repairs (int): The maximum number of targeted repairs of invalid Mermaid code.
+            max_regenerations (int): The maximum number of full regenerations once the
+                repairs failed.
         """
         self.llm = llm
         self.language = language
-        self.load_mermaid_examples(filepath=examples_filepath)
+        self.classifier_threshold = classifier_threshold
+        self.max_repairs = max_repairs
+        self.max_regenerations = max_regenerations
+        self.model_name = get_model_name(llm)
+        self.max_input_tokens = default_chunk_tokens(llm)
+        self.mermaid_examples = get_example_store(examples_filepath)
+        self._graph = None
+
+        parser = PydanticOutputParser(pydantic_object=DiagramTypeOutput)
+        analyze_prompt = PromptTemplate(
+            template="You are a highly skilled visual content generator. Based on the following text, determine the most suitable type of diagram to visually represent the information.\n{format_instructions}\n{text}\n",
+            input_variables=["text"],
+            partial_variables={"format_instructions": parser.get_format_instructions()},
+        )
+        self.analyze_chain = analyze_prompt | llm | parser
+
+        mermaid_prompt = ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    "You are an expert in Mermaid diagramming. Your task is to generate Mermaid code for a {diagram_type} diagram based on the provided summary text. The summary may include an introduction and conclusion, but focus only on the key information for the visual representation.",
+                ),
+                (
+                    "user",
+                    "**Instructions:**\n"
+                    "1. Extract and summarize the core information necessary for the diagram.\n"
+                    "2. Generate concise and accurate Mermaid code that reflects the main points.\n"
+                    '3. Enclose text component in quotation marks ""\n'
+                    "4. Name all subgraphs for using later.\n"
+                    "5. Always use the vertical direction (TD) if possible.\n"
+                    "6. Use {language} language to generate the content of the diagram.\n"
+                    "**Text:**\n"
+                    "{text}\n"
+                    "**Example Usage:**\n"
+                    "{example_usage}",
+                ),
+            ]
+        )
+        self.mermaid_chain = mermaid_prompt | llm | StrOutputParser()
 
-    def load_mermaid_examples(self, filepath: str):
+        repair_prompt = ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    "You are an expert in Mermaid diagramming. Fix the syntax errors in the given lines of a Mermaid {diagram_type} diagram.",
+                ),
+                (
+                    "user",
+                    "**Errors:**\n"
+                    "{errors}\n"
+                    "**Lines:**\n"
+                    "{snippet}\n"
+                    "Return only the corrected lines, in the same order, without explanations or code fences.",
+                ),
+            ]
+        )
+        self.repair_chain = repair_prompt | llm | StrOutputParser()
+
+    def classify_text(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Load Mermaid examples from a JSON file.
+        Choose the diagram type with the local classifier.
+
+        The type is only set when the classifier is confident enough; otherwise
+        the graph falls back to `analyze_text`. A type given in the input state
+        (e.g. chosen on the source text by the combined pipeline) is kept.
 
         Args:
-            filepath (str): The path to the JSON file containing Mermaid examples.
+            state (Dict[str, Any]): The current state containing the text to be analyzed.
 
         Returns:
-            Dict[str, Any]: A dictionary containing Mermaid examples.
+            Dict[str, Any]: The updated state with the local guess and its confidence.
         """
-        with open(filepath, "r", encoding="utf-8") as file:
-            self.mermaid_examples = json.load(file)
-        with open("resources/flowchart.txt", "r", encoding="utf-8") as file:
-            self.mermaid_examples["Flowchart"] = file.read()
-            logger.info(f"Flowchart: {self.mermaid_examples['Flowchart']}")
+        if state.diagram_type in self.mermaid_examples:
+            return {}
+
+        with tracer.span("diagram_classify"):
+            classification = classify_text(state.text)
+        logger.info(
+            f"Local diagram type: {classification.diagram_type}"
+            f" (confidence {classification.confidence:.2f})"
+        )
+        update = {
+            "local_diagram_type": classification.diagram_type,
+            "confidence": classification.confidence,
+        }
+        if (
+            classification.confidence >= self.classifier_threshold
+            and classification.diagram_type in self.mermaid_examples
+        ):
+            classifier_stats.record_local()
+            update["diagram_type"] = classification.diagram_type
+
+        return update
+
+    def route_diagram_type(self, state: Dict[str, Any]) -> str:
+        """Return the next node: the LLM analysis unless the type is already chosen."""
+        return "generate_mermaid_code" if state.diagram_type else "analyze_text"
 
     def analyze_text(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -87,21 +193,32 @@ class DiagramGenerator:
         Returns:
             Dict[str, Any]: The updated state with the chosen diagram type.
         """
-        parser = PydanticOutputParser(pydantic_object=DiagramTypeOutput)
-        prompt = PromptTemplate(
-            template="You are a highly skilled visual content generator. Based on the following text, determine the most suitable type of diagram to visually represent the information.\n{format_instructions}\n{text}\n",
-            input_variables=["text"],
-            partial_variables={"format_instructions": parser.get_format_instructions()},
-        )
+        with tracer.span("diagram_analyze") as span:
+            text = self._prepare(state.text, span)
+            output = self.analyze_chain.invoke({"text": text})
+            return self._diagram_type_update(state, output)
+
+    async def aanalyze_text(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of `analyze_text`."""
+        with tracer.span("diagram_analyze") as span:
+            text = self._prepare(state.text, span)
+            output = await self.analyze_chain.ainvoke({"text": text})
+            return self._diagram_type_update(state, output)
 
-        chain = prompt | self.llm | parser
-        output = chain.invoke({"text": state.text})
+    def _diagram_type_update(
+        self, state: Dict[str, Any], output: DiagramTypeOutput
+    ) -> Dict[str, Any]:
         logger.info(f"Chain output: ({type(output)}) {output}")
         diagram_type = output.diagram_type
         logger.info(f"Diagram type: {diagram_type}")
         diagram_type = (
             diagram_type if diagram_type in self.mermaid_examples else "Mindmap"
         )
+        if state.local_diagram_type:
+            classifier_stats.record_fallback(state.local_diagram_type, diagram_type)
+            logger.info(
+                f"Local classifier agreement rate: {classifier_stats.agreement_rate:.2f}"
+            )
 
         return {"diagram_type": diagram_type}
 
@@ -115,58 +232,223 @@ class DiagramGenerator:
         Returns:
             Dict[str, Any]: The updated state with the generated Mermaid code.
         """
-        diagram_type = state.diagram_type
-        example_usage = self.mermaid_examples.get(
-            diagram_type, "Example not found for the specified diagram type."
-        )
+        with tracer.span("diagram_generate") as span:
+            mermaid_code = self.mermaid_chain.invoke(self._mermaid_inputs(state, span))
+            span.set(output_tokens=count_tokens(mermaid_code, self.model_name))
 
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are an expert in Mermaid diagramming. Your task is to generate Mermaid code for a {diagram_type} diagram based on the provided summary text. The summary may include an introduction and conclusion, but focus only on the key information for the visual representation.",
-                ),
-                (
-                    "user",
-                    "**Instructions:**\n"
-                    "1. Extract and summarize the core information necessary for the diagram.\n"
-                    "2. Generate concise and accurate Mermaid code that reflects the main points.\n"
-                    '3. Enclose text component in quotation marks ""\n'
-                    "4. Name all subgraphs for using later.\n"
-                    "5. Always use the vertical direction (TD) if possible.\n"
-                    "6. Use {language} language to generate the content of the diagram.\n"
-                    "**Text:**\n"
-                    "{text}\n"
-                    "**Example Usage:**\n"
-                    "{example_usage}",
-                ),
-            ]
-        )
-        parser = StrOutputParser()
-        chain = prompt | self.llm | parser
-        mermaid_code = chain.invoke(
-            {
-                "language": self.language,
-                "text": state.text,
-                "diagram_type": diagram_type,
-                "example_usage": example_usage,
-            }
-        )
+        return self._generated_update(state, mermaid_code)
+
+    async def agenerate_mermaid_code(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of `generate_mermaid_code`."""
+        with tracer.span("diagram_generate") as span:
+            mermaid_code = await self.mermaid_chain.ainvoke(
+                self._mermaid_inputs(state, span)
+            )
+            span.set(output_tokens=count_tokens(mermaid_code, self.model_name))
+
+        return self._generated_update(state, mermaid_code)
+
+    def _generated_update(self, state: Dict[str, Any], output: str) -> Dict[str, Any]:
+        regenerations = state.regenerations + (state.mermaid_code is not None)
+        return {
+            "mermaid_code": extract_code(output),
+            "repairs": 0,
+            "regenerations": regenerations,
+        }
+
+    def validate_mermaid_code(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Check the syntax of the Mermaid code locally.
+
+        Args:
+            state (Dict[str, Any]): The current state containing the Mermaid code.
+
+        Returns:
+            Dict[str, Any]: The updated state with the validation errors.
+        """
+        with tracer.span("diagram_validate"):
+            result = validate(state.mermaid_code, state.diagram_type)
+        if not result.valid:
+            logger.warning(
+                f"Invalid Mermaid code ({len(result.errors)} errors): {result.errors[0]}"
+            )
+
+        return {
+            "valid": result.valid,
+            "errors": [str(error) for error in result.errors],
+            "repairable": result.repairable,
+        }
+
+    def route_validation(self, state: Dict[str, Any]) -> str:
+        """
+        Return the next node after the validation: done if the code is valid, a
+        targeted repair if the errors are local, then a full regeneration.
+        """
+        if state.valid:
+            return END
+        if state.repairable and state.repairs < self.max_repairs:
+            return "repair_mermaid_code"
+        if state.regenerations < self.max_regenerations:
+            return "generate_mermaid_code"
+        logger.warning("Giving up on repairing the Mermaid code")
+        return END
+
+    def repair_mermaid_code(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send the first invalid lines and their errors to the LLM, and splice the
+        corrected lines back into the code.
+
+        Args:
+            state (Dict[str, Any]): The current state containing the invalid Mermaid code.
+
+        Returns:
+            Dict[str, Any]: The updated state with the repaired Mermaid code.
+        """
+        with tracer.span("diagram_repair") as span:
+            inputs, start, end = self._repair_inputs(state)
+            output = self.repair_chain.invoke(inputs)
+            span.set(output_tokens=count_tokens(output, self.model_name))
+
+        return self._repaired_update(state, output, start, end)
+
+    async def arepair_mermaid_code(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of `repair_mermaid_code`."""
+        with tracer.span("diagram_repair") as span:
+            inputs, start, end = self._repair_inputs(state)
+            output = await self.repair_chain.ainvoke(inputs)
+            span.set(output_tokens=count_tokens(output, self.model_name))
+
+        return self._repaired_update(state, output, start, end)
 
-        return {"mermaid_code": mermaid_code}
+    def _repair_inputs(self, state: Dict[str, Any]):
+        lines = state.mermaid_code.split("\n")
+        result = validate(state.mermaid_code, state.diagram_type)
+        first = result.errors[0].line
+        # The header line is never sent, so the repair can't change the diagram type.
+        start = max(result.header_line + 1, first - 2)
+        end = min(len(lines), first + 2)
+        window_errors = [
+            str(error) for error in result.errors if start <= error.line <= end
+        ]
+        inputs = {
+            "diagram_type": state.diagram_type,
+            "errors": "\n".join(window_errors),
+            "snippet": "\n".join(lines[start - 1 : end]),
+        }
+        return inputs, start, end
+
+    def _repaired_update(
+        self, state: Dict[str, Any], output: str, start: int, end: int
+    ) -> Dict[str, Any]:
+        lines = state.mermaid_code.split("\n")
+        repaired = extract_code(output).split("\n")
+        if repaired and repaired[0].split()[:1] and repaired[0].split()[0] in HEADERS:
+            # The LLM answered with the whole diagram header.
+            repaired = repaired[1:]
+        lines[start - 1 : end] = repaired
+        return {"mermaid_code": "\n".join(lines), "repairs": state.repairs + 1}
+
+    def _prepare(self, text: str, span: Span) -> str:
+        result = preprocess(text, self.model_name, self.max_input_tokens)
+        logger.info(f"Input tokens: {result.tokens_before} -> {result.tokens_after}")
+        span.set(input_tokens=result.tokens_after)
+        return result.text
+
+    def _mermaid_inputs(self, state: Dict[str, Any], span: Span) -> Dict[str, Any]:
+        diagram_type = state.diagram_type
+        example_usage = (
+            self.mermaid_examples.get_examples(diagram_type)
+            or "Example not found for the specified diagram type."
+        )
+        return {
+            "language": self.language,
+            "text": self._prepare(state.text, span),
+            "diagram_type": diagram_type,
+            "example_usage": example_usage,
+        }
 
     def build_graph(self) -> StateGraph:
         """
         Build the state graph for the diagram generation workflow.
 
+        The generated Mermaid code is validated locally; invalid code goes
+        through targeted repairs first, then full regenerations.
+
+        The LLM nodes have sync and async implementations, so the graph can be
+        driven with `stream`/`invoke` as well as `astream`/`ainvoke`.
+
         Returns:
             StateGraph: The compiled state graph.
         """
         workflow = StateGraph(DiagramState)
-        workflow.add_node("analyze_text", self.analyze_text)
-        workflow.add_node("generate_mermaid_code", self.generate_mermaid_code)
-        workflow.set_entry_point("analyze_text")
+        workflow.add_node("classify_text", self.classify_text)
+        workflow.add_node(
+            "analyze_text",
+            RunnableLambda(self.analyze_text, afunc=self.aanalyze_text),
+        )
+        workflow.add_node(
+            "generate_mermaid_code",
+            RunnableLambda(
+                self.generate_mermaid_code, afunc=self.agenerate_mermaid_code
+            ),
+        )
+        workflow.add_node("validate_mermaid_code", self.validate_mermaid_code)
+        workflow.add_node(
+            "repair_mermaid_code",
+            RunnableLambda(self.repair_mermaid_code, afunc=self.arepair_mermaid_code),
+        )
+        workflow.set_entry_point("classify_text")
+        workflow.add_conditional_edges(
+            "classify_text",
+            self.route_diagram_type,
+            ["analyze_text", "generate_mermaid_code"],
+        )
         workflow.add_edge("analyze_text", "generate_mermaid_code")
-        workflow.add_edge("generate_mermaid_code", END)
+        workflow.add_edge("generate_mermaid_code", "validate_mermaid_code")
+        workflow.add_conditional_edges(
+            "validate_mermaid_code",
+            self.route_validation,
+            ["repair_mermaid_code", "generate_mermaid_code", END],
+        )
+        workflow.add_edge("repair_mermaid_code", "validate_mermaid_code")
 
         return workflow.compile()
+
+    def generate(
+        self,
+        text: str,
+        diagram_type: Optional[str] = None,
+        progress: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the diagram workflow on a text.
+
+        Args:
+            text (str): The text to generate the diagram for.
+            diagram_type (Optional[str]): The diagram type, if already chosen.
+            progress (Optional[Callable[[str], None]]): Called with a status message
+                after each step.
+
+        Returns:
+            Dict[str, Any]: The diagram type, Mermaid code, and validation result.
+        """
+        state: Dict[str, Any] = {"text": text, "diagram_type": diagram_type}
+        for event in self.get_graph().stream(state):
+            for node, update in event.items():
+                state.update(update or {})
+                if progress is not None:
+                    progress(f"{node.replace('_', ' ').capitalize()}: done")
+
+        return {key: state.get(key) for key in DIAGRAM_RESULT_KEYS}
+
+    def get_graph(self) -> StateGraph:
+        """
+        Return the compiled state graph, building it on first use.
+
+        Returns:
+            StateGraph: The compiled state graph.
+        """
+        if self._graph is None:
+            self._graph = self.build_graph()
+
+        return self._graph
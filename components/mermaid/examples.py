@@ -0,0 +1,133 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+FLOWCHART_FILEPATH = "resources/flowchart.txt"
+
+CODE_BLOCK_PATTERN = re.compile(
+    r"^```(?:mermaid|mermaid-example)[ \t]*\n(.*?)^```", re.MULTILINE | re.DOTALL
+)
+
+
+def extract_snippets(markdown: str, min_lines: int = 3) -> List[str]:
+    """Return the Mermaid code blocks of a syntax documentation page, in order."""
+    snippets = []
+    for match in CODE_BLOCK_PATTERN.finditer(markdown):
+        snippet = match.group(1).strip("\n")
+        if snippet.count("\n") + 1 >= min_lines and snippet not in snippets:
+            snippets.append(snippet)
+
+    return snippets
+
+
+def trim_snippet(snippet: str, max_lines: int) -> str:
+    """Keep the first `max_lines` lines of a snippet."""
+    lines = snippet.splitlines()
+    return "\n".join(lines[:max_lines])
+
+
+class ExampleStore:
+    def __init__(
+        self,
+        examples_filepath: str,
+        flowchart_filepath: str = FLOWCHART_FILEPATH,
+        max_snippets: int = 3,
+        max_snippet_lines: int = 40,
+    ) -> None:
+        """
+        Initialize a lazily loaded store of Mermaid examples.
+
+        The files are read on first use and read again only when their
+        modification time changes.
+
+        Args:
+            examples_filepath (str): The path to the JSON file with the Mermaid syntax page of each diagram type.
+            flowchart_filepath (str): The path to the hand-written flowchart example.
+            max_snippets (int): The number of code snippets returned per diagram type.
+            max_snippet_lines (int): The maximum number of lines of a snippet.
+        """
+        self.examples_filepath = examples_filepath
+        self.flowchart_filepath = flowchart_filepath
+        self.max_snippets = max_snippets
+        self.max_snippet_lines = max_snippet_lines
+
+        self._lock = threading.Lock()
+        self._mtimes: Optional[Tuple[float, float]] = None
+        self._index: Dict[str, List[str]] = {}
+
+    def _current_mtimes(self) -> Tuple[float, float]:
+        return (
+            os.path.getmtime(self.examples_filepath),
+            os.path.getmtime(self.flowchart_filepath),
+        )
+
+    def _load(self) -> None:
+        mtimes = self._current_mtimes()
+        if mtimes == self._mtimes:
+            return
+
+        with open(self.examples_filepath, "r", encoding="utf-8") as file:
+            pages = json.load(file)
+        with open(self.flowchart_filepath, "r", encoding="utf-8") as file:
+            flowchart = file.read().strip("\n")
+
+        index = {}
+        for diagram_type, page in pages.items():
+            snippets = extract_snippets(page)
+            if diagram_type == "Flowchart":
+                snippets.insert(0, flowchart)
+            index[diagram_type] = [
+                trim_snippet(snippet, self.max_snippet_lines)
+                for snippet in snippets[: self.max_snippets]
+            ]
+
+        self._index, self._mtimes = index, mtimes
+        logger.info(f"Loaded Mermaid examples for {len(index)} diagram types")
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            self._load()
+
+    def __contains__(self, diagram_type: str) -> bool:
+        self._ensure_loaded()
+        return diagram_type in self._index
+
+    def get_snippets(self, diagram_type: str) -> List[str]:
+        """Return the trimmed code snippets of a diagram type."""
+        self._ensure_loaded()
+        return self._index.get(diagram_type, [])
+
+    def get_examples(self, diagram_type: str) -> Optional[str]:
+        """
+        Return the example usage of a diagram type to put in a prompt.
+
+        Args:
+            diagram_type (str): The type of diagram.
+
+        Returns:
+            Optional[str]: The snippets as Mermaid code blocks, or None if the type is unknown.
+        """
+        snippets = self.get_snippets(diagram_type)
+        if not snippets:
+            return None
+
+        return "\n\n".join(f"```mermaid\n{snippet}\n```" for snippet in snippets)
+
+
+_stores: Dict[Tuple[str, str], ExampleStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_example_store(
+    examples_filepath: str, flowchart_filepath: str = FLOWCHART_FILEPATH
+) -> ExampleStore:
+    """Return the process-wide example store of the given files."""
+    key = (os.path.abspath(examples_filepath), os.path.abspath(flowchart_filepath))
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ExampleStore(examples_filepath, flowchart_filepath)
+        return _stores[key]
@@ -0,0 +1,120 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+from loguru import logger
+
+from components.cache import hash_bytes
+from components.metrics import tracer
+
+LOCAL_CLI = os.path.join("node_modules", ".bin", "mmdc")
+FORMATS = ("svg", "png")
+
+
+def find_cli(cli: Optional[str] = None) -> Optional[str]:
+    """
+    Return the path of the Mermaid CLI (mmdc): the given one, the one installed
+    in the project with `npm install @mermaid-js/mermaid-cli`, or the one on the PATH.
+    """
+    for candidate in (cli, LOCAL_CLI, shutil.which("mmdc")):
+        if candidate and os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+class DiagramRenderer:
+    def __init__(
+        self,
+        directory: str,
+        cli: Optional[str] = None,
+        puppeteer_config: Optional[str] = None,
+        timeout: float = 60.0,
+    ) -> None:
+        """
+        Initialize a renderer that turns Mermaid code into SVG/PNG files once.
+
+        Rendered files are stored by the hash of the code, so a diagram shown
+        again (or by another session) is served from disk without rendering.
+
+        Args:
+            directory (str): The directory of the rendered files.
+            cli (Optional[str]): The path of the Mermaid CLI; found automatically if None.
+            puppeteer_config (Optional[str]): The Puppeteer config file passed to the CLI,
+                e.g. to disable the Chrome sandbox in containers.
+            timeout (float): The maximum time of a render, in seconds.
+        """
+        self.directory = directory
+        self.cli = find_cli(cli)
+        self.puppeteer_config = puppeteer_config
+        self.timeout = timeout
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def available(self) -> bool:
+        return self.cli is not None
+
+    def path(self, code: str, fmt: str = "svg") -> str:
+        """Return the path of the rendered file of a diagram."""
+        return os.path.join(self.directory, f"{hash_bytes(code.encode('utf-8'))}.{fmt}")
+
+    def render(self, code: str, fmt: str = "svg") -> Optional[bytes]:
+        """
+        Render Mermaid code, or return the cached file if it was rendered before.
+
+        Args:
+            code (str): The Mermaid code.
+            fmt (str): The output format, "svg" or "png".
+
+        Returns:
+            Optional[bytes]: The rendered file, or None if there's no renderer or it failed.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+        path = self.path(code, fmt)
+        with self._locks_lock:
+            lock = self._locks[path]
+        # Concurrent renders of the same diagram wait for the first one.
+        with lock, tracer.span("diagram_render") as span:
+            if os.path.exists(path):
+                span.set(cache_hit=True)
+                with open(path, "rb") as file:
+                    return file.read()
+            span.set(cache_hit=False)
+            if not self.available:
+                return None
+            return self._render(code, fmt, path)
+
+    def _render(self, code: str, fmt: str, path: str) -> Optional[bytes]:
+        # A temporary directory next to the store, so the file can be moved atomically.
+        with tempfile.TemporaryDirectory(dir=self.directory) as tmp:
+            input_path = os.path.join(tmp, "diagram.mmd")
+            output_path = os.path.join(tmp, f"diagram.{fmt}")
+            with open(input_path, "w", encoding="utf-8") as file:
+                file.write(code)
+
+            command = [self.cli, "-i", input_path, "-o", output_path, "-b", "transparent"]
+            if self.puppeteer_config:
+                command += ["-p", self.puppeteer_config]
+            try:
+                subprocess.run(
+                    command, capture_output=True, timeout=self.timeout, check=True
+                )
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode(errors="replace")
+                logger.warning(f"Failed to render the diagram: {stderr}")
+                return None
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.warning(f"Failed to render the diagram: {e}")
+                return None
+
+            os.replace(output_path, path)
+
+        with open(path, "rb") as file:
+            return file.read()
+
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Dict, List
+
+from .diagram_generator import DiagramGenerator
+
+
+async def agenerate_diagram(generator: DiagramGenerator, text: str) -> Dict[str, Any]:
+    """
+    Run the diagram workflow on the event loop.
+
+    Args:
+        generator (DiagramGenerator): The diagram generator to use.
+        text (str): The text to generate the diagram for.
+
+    Returns:
+        Dict[str, Any]: The final state, with the diagram type and Mermaid code.
+    """
+    state: Dict[str, Any] = {"text": text}
+    async for event in generator.get_graph().astream(state):
+        for update in event.values():
+            state.update(update or {})
+
+    return state
+
+
+async def agenerate_diagrams(
+    generator: DiagramGenerator, texts: List[str], max_concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    """
+    Generate diagrams for many texts concurrently on one event loop.
+
+    Args:
+        generator (DiagramGenerator): The diagram generator to use.
+        texts (List[str]): The texts to generate diagrams for.
+        max_concurrency (int): The maximum number of diagrams generated at once.
+
+    Returns:
+        List[Dict[str, Any]]: The final state of each workflow, in the same order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(text: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await agenerate_diagram(generator, text)
+
+    return await asyncio.gather(*(run(text) for text in texts))
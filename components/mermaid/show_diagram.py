@@ -1,9 +1,30 @@
-from typing import Any
+import os
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import streamlit as st
 from streamlit.components.v1 import html
 
-from components.mermaid import DiagramGenerator
+from .render import DiagramRenderer
+
+if TYPE_CHECKING:
+    from .diagram_generator import DiagramGenerator
+
+# Assets vendored by resources/download_mermaid_assets.py, served by Streamlit
+# static file serving; the CDNs are used when they're missing.
+STATIC_DIR = "static"
+MERMAID_JS = "mermaid/mermaid.min.js"
+FONT_AWESOME_CSS = "fontawesome/css/all.min.css"
+MERMAID_JS_CDN = "https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"
+FONT_AWESOME_CSS_CDN = (
+    "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.1/css/all.min.css"
+)
+
+
+def asset_url(path: str, cdn_url: str) -> str:
+    """Return the URL of a vendored static asset, or its CDN URL if it isn't vendored."""
+    if os.path.exists(os.path.join(STATIC_DIR, path)):
+        return f"app/static/{path}"
+    return cdn_url
 
 
 def mermaid(code: str) -> None:
@@ -16,10 +37,8 @@ def mermaid(code: str) -> None:
             {code}
         </pre>
 
-        <script type="module">
-            import mermaid from 'https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.esm.min.mjs';
-            mermaid.initialize({{ startOnLoad: true }});
-        </script>
+        <script src="{asset_url(MERMAID_JS, MERMAID_JS_CDN)}"></script>
+        <script>mermaid.initialize({{ startOnLoad: true }});</script>
         """,
         height=st.session_state["svg_height"] + 50,
     )
@@ -28,9 +47,9 @@ def mermaid(code: str) -> None:
 def mermaid_chart(code: str):
     html(
         f"""
-        <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.1/css/all.min.css">
+        <link rel="stylesheet" href="{asset_url(FONT_AWESOME_CSS, FONT_AWESOME_CSS_CDN)}">
         <div class="mermaid">{code}</div>
-        <script src="https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js"></script>
+        <script src="{asset_url(MERMAID_JS, MERMAID_JS_CDN)}"></script>
         <script>mermaid.initialize({{startOnLoad:true}});</script>
         """,
         height=1000,
@@ -38,36 +57,72 @@ def mermaid_chart(code: str):
     )
 
 
-def show_diagram(llm: Any, language: str, text: str):
+def show_rendered_diagram(renderer: DiagramRenderer, code: str) -> bool:
     """
-    Show the diagram for the given text.
+    Show a diagram rendered on the server, with download buttons.
 
-    Args:
-        llm (Any): The language model used for generating the diagram.
-        language (str): The language to use for generating the diagram.
-        text (str): The text to generate the diagram for.
+    Returns:
+        bool: False if the diagram couldn't be rendered.
     """
-    generator = DiagramGenerator(
-        llm=llm,
-        language=language,
-        examples_filepath="resources/mermaid_examples.json",
+    svg = renderer.render(code, "svg")
+    if svg is None:
+        return False
+
+    st.image(svg.decode("utf-8"))
+    columns = st.columns(2)
+    columns[0].download_button(
+        "Download SVG", svg, file_name="diagram.svg", mime="image/svg+xml"
     )
-    graph = generator.build_graph()
-    state = {"text": text}
-    show_type = True
-    for event in graph.stream(state):
-        state.update(event)
-        if show_type and "analyze_text" in state:
-            diagram_type = state["analyze_text"]["diagram_type"]
-            st.markdown(f"Chosen Diagram Type: **{diagram_type}**")
-            show_type = False
-        if "generate_mermaid_code" in state:
-            mermaid_code = state["generate_mermaid_code"]["mermaid_code"]
-            with st.expander("See Mermaid code:"):
-                st.markdown(mermaid_code)
-            mermaid_code = mermaid_code.replace("`", "").lstrip("\n").lstrip("mermaid")
+    png = renderer.render(code, "png")
+    if png is not None:
+        columns[1].download_button(
+            "Download PNG", png, file_name="diagram.png", mime="image/png"
+        )
+    return True
+
+
+def render_diagram(diagram: Dict[str, Any], renderer: Optional[DiagramRenderer] = None):
+    """
+    Show a generated diagram.
+
+    Args:
+        diagram (Dict[str, Any]): The result of `DiagramGenerator.generate`.
+        renderer (Optional[DiagramRenderer]): Renders the diagram to SVG on the server;
+            the diagram is rendered in the browser if None or if rendering fails.
+    """
+    if diagram.get("diagram_type"):
+        st.markdown(f"Chosen Diagram Type: **{diagram['diagram_type']}**")
+    mermaid_code = diagram.get("mermaid_code")
+    if not mermaid_code:
+        st.error("Failed to generate the diagram. Please try again.")
+        return
+    with st.expander("See Mermaid code:"):
+        st.code(mermaid_code, language="mermaid")
+    if not diagram.get("valid"):
+        st.warning(
+            "The diagram may not render correctly:\n\n"
+            + "\n".join(f"- {error}" for error in diagram.get("errors") or [])
+        )
+
+    if renderer is not None and show_rendered_diagram(renderer, mermaid_code):
+        return
 
     try:
         mermaid_chart(mermaid_code)
     except Exception as e:
         st.error(f"Failed to render the diagram. Please try again. Error:\n{e}")
+
+
+def show_diagram(
+    generator: "DiagramGenerator", text: str, renderer: Optional[DiagramRenderer] = None
+):
+    """
+    Generate and show the diagram for the given text.
+
+    Args:
+        generator (DiagramGenerator): The diagram generator to use.
+        text (str): The text to generate the diagram for.
+        renderer (Optional[DiagramRenderer]): Renders the diagram to SVG on the server;
+            the diagram is rendered in the browser if None or if rendering fails.
+    """
+    render_diagram(generator.generate(text), renderer)
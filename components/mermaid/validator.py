@@ -0,0 +1,491 @@
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+FENCE_PATTERN = re.compile(r"```[ \t]*(?:mermaid)?[ \t]*\n?(.*?)(?:```|\Z)", re.DOTALL)
+DIRECTIVE_PATTERN = re.compile(r"%%\{.*?\}%%", re.DOTALL)
+
+# Header keyword -> diagram type
+HEADERS = {
+    "flowchart": "Flowchart",
+    "graph": "Flowchart",
+    "block-beta": "Block Diagram",
+    "C4Context": "C4 Diagram",
+    "C4Container": "C4 Diagram",
+    "C4Component": "C4 Diagram",
+    "C4Dynamic": "C4 Diagram",
+    "C4Deployment": "C4 Diagram",
+    "classDiagram": "Class Diagram",
+    "classDiagram-v2": "Class Diagram",
+    "erDiagram": "Entity Relationship Diagram",
+    "mindmap": "Mindmap",
+    "sequenceDiagram": "Sequence Diagram",
+    "timeline": "Timeline Diagram",
+    "journey": "User Journey Diagram",
+}
+
+BRACKETS = {"(": ")", "[": "]", "{": "}"}
+DIRECTIONS = {"TB", "TD", "BT", "RL", "LR"}
+
+FLOWCHART_KEYWORDS = re.compile(
+    r"^(classDef|class|style|linkStyle|click|direction|title|accTitle|accDescr)\b"
+)
+# Node shape delimiters, the longest first.
+SHAPES = [
+    ("(((", ")))"),
+    ("((", "))"),
+    ("([", "])"),
+    ("[[", "]]"),
+    ("[(", ")]"),
+    ("{{", "}}"),
+    ("[/", "/]"),
+    ("[\\", "\\]"),
+    ("[/", "\\]"),
+    ("[\\", "/]"),
+    ("(", ")"),
+    ("[", "]"),
+    ("{", "}"),
+    (">", "]"),
+]
+HTML_TAG = re.compile(r"</?\w+[^>]*>")
+# Quoted strings, then the text of node shapes, which may contain "end".
+QUOTED = re.compile(r'"[^"]*"')
+SHAPE_TEXT = re.compile(r"\[[^\]]*\]|\([^)]*\)|\{[^}]*\}")
+END_NODE = re.compile(r"(^|[\s>-])end($|[\s;&-])")
+
+SEQUENCE_BLOCKS = {"loop", "alt", "opt", "par", "critical", "break", "rect", "box"}
+SEQUENCE_BRANCHES = {"else": "alt", "and": "par", "option": "critical"}
+SEQUENCE_STATEMENT = re.compile(
+    r"^(participant|actor|create|destroy|activate|deactivate|autonumber|title|links?|properties|details)\b"
+    r"|^[Nn]ote\s+(left of|right of|over)\s+[^:]+:"
+)
+SEQUENCE_MESSAGE = re.compile(
+    r"^[^-<>:]+?\s*(-->>|->>|-->|->|--x|-x|--\)|-\)|<<-->>|<<->>)\s*[+-]?[^:]+:.*$"
+)
+
+ER_RELATIONSHIP = re.compile(
+    r'^("[^"]+"|[\w-]+)\s+(\|o|\|\||\}o|\}\||o\||\|\{|o\{)(--|\.\.)(o\||\|\||o\{|\|\{|\|o|\}\||\}o)\s+("[^"]+"|[\w-]+)\s*:\s*.+$'
+)
+# The cardinality may also be spelled out, e.g. "only one to zero or more".
+ER_RELATIONSHIP_WORDS = re.compile(r'^("[^"]+"|[\w-]+)\s+[\w ()+]+\s+to\s+[\w ()+]+\s+("[^"]+"|[\w-]+)\s*:\s*.+$')
+ER_ENTITY = re.compile(r'^("[^"]+"|[\w-]+)(\[[^\]]*\])?\s*\{?$')
+ER_ATTRIBUTE = re.compile(r"^[\w()\[\],-]+\s+[\w-]+(\s+(PK|FK|UK)(\s*,\s*(PK|FK|UK))*)?(\s+\".*\")?$")
+
+C4_STATEMENT = re.compile(r"^\w+\(.*\)\s*\{?$")
+C4_KEYWORDS = re.compile(r"^(title|accTitle|accDescr)\b")
+
+JOURNEY_TASK = re.compile(r"^[^:]+:\s*(\d+)\s*(:.*)?$")
+
+
+@dataclass
+class MermaidError:
+    line: int
+    message: str
+    snippet: str = ""
+
+    def __str__(self) -> str:
+        return f"Line {self.line}: {self.message}" + (
+            f"\n    {self.snippet}" if self.snippet else ""
+        )
+
+
+@dataclass
+class ValidationResult:
+    diagram_type: Optional[str]
+    errors: List[MermaidError] = field(default_factory=list)
+    header_line: int = 1
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    @property
+    def repairable(self) -> bool:
+        """Whether the errors are local; a wrong diagram type needs a new diagram."""
+        return all(error.line != self.header_line for error in self.errors)
+
+
+def extract_code(text: str) -> str:
+    """
+    Return the Mermaid code of an LLM answer, without the Markdown code fence
+    and the text around it.
+    """
+    match = FENCE_PATTERN.search(text)
+    code = match.group(1) if match else text
+    code = code.strip("\n").rstrip()
+    # A fence language left on its own line, e.g. when the backticks were dropped.
+    first_line, _, rest = code.partition("\n")
+    if first_line.strip() == "mermaid":
+        code = rest.strip("\n")
+    return code
+
+
+def _strip_comment(line: str) -> str:
+    return "" if line.lstrip().startswith("%%") else line
+
+
+def _check_brackets(line: str) -> Optional[str]:
+    """Return an error if the brackets or quotes of a line are unbalanced."""
+    stack = []
+    in_quotes = False
+    for char in line:
+        if char == '"':
+            in_quotes = not in_quotes
+        elif in_quotes:
+            continue
+        elif char in BRACKETS:
+            stack.append(BRACKETS[char])
+        elif char in BRACKETS.values():
+            if not stack or stack.pop() != char:
+                return f"Unexpected '{char}'"
+    if in_quotes:
+        return "Unclosed quotation mark"
+    if stack:
+        return f"Missing '{stack[-1]}'"
+    return None
+
+
+def _join_markdown_strings(lines: List[str]) -> List[str]:
+    """Join the lines of multi-line "`markdown strings`", keeping the line numbers."""
+    joined = []
+    i = 0
+    while i < len(lines):
+        line, extra = lines[i], 0
+        while line.count('"`') > line.count('`"') and i + 1 < len(lines):
+            i += 1
+            extra += 1
+            line += " " + lines[i].strip()
+        joined.append(line)
+        joined.extend([""] * extra)
+        i += 1
+    return joined
+
+
+def _unquoted_label(line: str) -> Optional[str]:
+    """Return the first node label containing brackets without quotes, if any."""
+    i = 1
+    while i < len(line):
+        if line[i] == '"':
+            end = line.find('"', i + 1)
+            i = len(line) if end == -1 else end + 1
+            continue
+        if line[i] in "([{>" and (line[i - 1].isalnum() or line[i - 1] == "_"):
+            for open_, close in SHAPES:
+                if not line.startswith(open_, i):
+                    continue
+                start = i + len(open_)
+                if line[start : start + 1] == '"':
+                    quote_end = line.find('"', start + 1)
+                    start = quote_end + 1 if quote_end != -1 else start
+                end = line.find(close, start)
+                if end == -1:
+                    break
+                label = line[i + len(open_) : end]
+                if not label.startswith('"') and any(c in label for c in "()[]{}"):
+                    return label
+                i = end + len(close) - 1
+                break
+        i += 1
+    return None
+
+
+def _check_flowchart(lines: List[str], errors: List[MermaidError]) -> None:
+    header = lines[0].split()
+    # Statements may end with a semicolon, e.g. "graph TD;".
+    if len(header) > 1 and header[1].rstrip(";") not in DIRECTIONS:
+        errors.append(MermaidError(1, f"Unknown direction '{header[1]}'", lines[0]))
+
+    subgraphs = []
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("subgraph"):
+            subgraphs.append(number)
+            continue
+        if line == "end":
+            if not subgraphs:
+                errors.append(MermaidError(number, "'end' without 'subgraph'", raw))
+            else:
+                subgraphs.pop()
+            continue
+        if FLOWCHART_KEYWORDS.match(line):
+            continue
+        line = HTML_TAG.sub("", line)
+        # The asymmetric shape id>label] has no opening bracket.
+        error = _check_brackets(re.sub(r"(\w)>", r"\1[", line))
+        if error:
+            errors.append(MermaidError(number, error, raw))
+        elif _unquoted_label(line):
+            errors.append(
+                MermaidError(
+                    number,
+                    f"Quote the label '{_unquoted_label(line)}', it contains brackets",
+                    raw,
+                )
+            )
+        elif END_NODE.search(SHAPE_TEXT.sub("", QUOTED.sub("", line))):
+            errors.append(
+                MermaidError(number, "'end' can't be used as a node ID", raw)
+            )
+    for number in subgraphs:
+        errors.append(MermaidError(number, "'subgraph' without 'end'", lines[number - 1]))
+
+
+def _check_block(lines: List[str], errors: List[MermaidError]) -> None:
+    blocks = []
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line:
+            continue
+        if re.match(r"^block(:[\w-]+)*(\[.*\])?$", line):
+            blocks.append(number)
+            continue
+        if line == "end":
+            if not blocks:
+                errors.append(MermaidError(number, "'end' without 'block'", raw))
+            else:
+                blocks.pop()
+            continue
+        error = _check_brackets(re.sub(r"(\w)>", r"\1[", line))
+        if error:
+            errors.append(MermaidError(number, error, raw))
+    for number in blocks:
+        errors.append(MermaidError(number, "'block' without 'end'", lines[number - 1]))
+
+
+def _check_c4(lines: List[str], errors: List[MermaidError]) -> None:
+    depth = 0
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line or C4_KEYWORDS.match(line):
+            continue
+        if line == "}":
+            depth -= 1
+            if depth < 0:
+                errors.append(MermaidError(number, "Unexpected '}'", raw))
+                depth = 0
+            continue
+        error = _check_brackets(line.rstrip("{"))
+        if error:
+            errors.append(MermaidError(number, error, raw))
+        elif not C4_STATEMENT.match(line):
+            errors.append(
+                MermaidError(number, "Expected an element like Person(alias, \"label\")", raw)
+            )
+        elif line.endswith("{"):
+            depth += 1
+    if depth > 0:
+        errors.append(MermaidError(len(lines), "Missing '}'", lines[-1]))
+
+
+def _check_class(lines: List[str], errors: List[MermaidError]) -> None:
+    open_class = None
+    namespaces = []
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line:
+            continue
+        if open_class is not None:
+            if line == "}":
+                open_class = None
+            elif "{" in line:
+                errors.append(MermaidError(number, "Missing '}' before this line", raw))
+            continue
+        if re.match(r"^class\s+\S+.*\{$", line):
+            open_class = number
+            continue
+        if re.match(r"^namespace\s+\S+\s*\{$", line):
+            namespaces.append(number)
+            continue
+        if line == "}":
+            if namespaces:
+                namespaces.pop()
+            else:
+                errors.append(MermaidError(number, "Unexpected '}'", raw))
+            continue
+        error = _check_brackets(line.replace("<", "").replace(">", ""))
+        if error and not re.match(r"^(note|direction|classDef|style|click|link|callback)\b", line):
+            errors.append(MermaidError(number, error, raw))
+    for number in namespaces + ([open_class] if open_class is not None else []):
+        errors.append(MermaidError(number, "Missing '}'", lines[number - 1]))
+
+
+def _check_er(lines: List[str], errors: List[MermaidError]) -> None:
+    in_entity = None
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line or re.match(r"^(title|direction|accTitle|accDescr)\b", line):
+            continue
+        if in_entity is not None:
+            if line == "}":
+                in_entity = None
+            elif not ER_ATTRIBUTE.match(line):
+                errors.append(
+                    MermaidError(number, "Expected an attribute like 'string name'", raw)
+                )
+            continue
+        if ER_RELATIONSHIP.match(line) or ER_RELATIONSHIP_WORDS.match(line):
+            continue
+        if ER_ENTITY.match(line):
+            if line.endswith("{"):
+                in_entity = number
+            continue
+        errors.append(
+            MermaidError(
+                number,
+                "Expected a relationship like 'CUSTOMER ||--o{ ORDER : places'",
+                raw,
+            )
+        )
+    if in_entity is not None:
+        errors.append(MermaidError(in_entity, "Missing '}'", lines[in_entity - 1]))
+
+
+def _check_mindmap(lines: List[str], errors: List[MermaidError]) -> None:
+    nodes = [
+        (number, raw)
+        for number, raw in enumerate(lines[1:], start=2)
+        if raw.strip() and not raw.strip().startswith("::")
+    ]
+    if not nodes:
+        errors.append(MermaidError(1, "The mindmap has no root"))
+        return
+    root_indent = len(nodes[0][1]) - len(nodes[0][1].lstrip())
+    for number, raw in nodes:
+        indent = len(raw) - len(raw.lstrip())
+        if number != nodes[0][0] and indent <= root_indent:
+            errors.append(
+                MermaidError(number, "A mindmap has a single root; indent this node", raw)
+            )
+        # The bang ))label(( and cloud )label( shapes open with ')'.
+        line = re.sub(r"\)\)(.*)\(\($|\)(.*)\($", "[]", raw.strip())
+        error = _check_brackets(line)
+        if error:
+            errors.append(MermaidError(number, error, raw))
+
+
+def _check_sequence(lines: List[str], errors: List[MermaidError]) -> None:
+    blocks = []
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line:
+            continue
+        keyword = line.split()[0]
+        if keyword in SEQUENCE_BLOCKS:
+            blocks.append((keyword, number))
+        elif keyword == "end":
+            if not blocks:
+                errors.append(MermaidError(number, "'end' without a block", raw))
+            else:
+                blocks.pop()
+        elif keyword in SEQUENCE_BRANCHES:
+            if not blocks or blocks[-1][0] != SEQUENCE_BRANCHES[keyword]:
+                errors.append(
+                    MermaidError(
+                        number,
+                        f"'{keyword}' outside of '{SEQUENCE_BRANCHES[keyword]}'",
+                        raw,
+                    )
+                )
+        elif not SEQUENCE_STATEMENT.match(line) and not SEQUENCE_MESSAGE.match(line):
+            errors.append(
+                MermaidError(number, "Expected a message like 'Alice->>Bob: Hello'", raw)
+            )
+    for keyword, number in blocks:
+        errors.append(MermaidError(number, f"'{keyword}' without 'end'", lines[number - 1]))
+
+
+def _check_timeline(lines: List[str], errors: List[MermaidError]) -> None:
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line or re.match(r"^(title|section|accTitle|accDescr)\b", line):
+            continue
+        if line.startswith(":"):
+            # An event continuing the previous period.
+            continue
+        if ":" not in line:
+            errors.append(
+                MermaidError(number, "Expected a period like '2004 : Facebook'", raw)
+            )
+
+
+def _check_journey(lines: List[str], errors: List[MermaidError]) -> None:
+    for number, raw in enumerate(lines[1:], start=2):
+        line = raw.strip()
+        if not line or re.match(r"^(title|section|accTitle|accDescr)\b", line):
+            continue
+        match = JOURNEY_TASK.match(line)
+        if not match:
+            errors.append(
+                MermaidError(number, "Expected a task like 'Make tea: 5: Me'", raw)
+            )
+        elif not 1 <= int(match.group(1)) <= 5:
+            errors.append(MermaidError(number, "The score must be between 1 and 5", raw))
+
+
+CHECKERS: Dict[str, Callable[[List[str], List[MermaidError]], None]] = {
+    "Flowchart": _check_flowchart,
+    "Block Diagram": _check_block,
+    "C4 Diagram": _check_c4,
+    "Class Diagram": _check_class,
+    "Entity Relationship Diagram": _check_er,
+    "Mindmap": _check_mindmap,
+    "Sequence Diagram": _check_sequence,
+    "Timeline Diagram": _check_timeline,
+    "User Journey Diagram": _check_journey,
+}
+
+
+def validate(code: str, diagram_type: Optional[str] = None) -> ValidationResult:
+    """
+    Check the syntax of Mermaid code without rendering it.
+
+    This is a lightweight line-based parser for the diagram types in
+    `DIAGRAM_TYPE_DESCRIPTIONS`: it catches the usual LLM mistakes (unbalanced
+    brackets and blocks, unquoted labels, malformed statements), not every
+    error Mermaid would report.
+
+    Args:
+        code (str): The Mermaid code, without the Markdown code fence.
+        diagram_type (Optional[str]): The expected diagram type, if any.
+
+    Returns:
+        ValidationResult: The detected diagram type and the errors found.
+    """
+    # Drop the %%{init: ...}%% directives, keeping the line numbers.
+    code = DIRECTIVE_PATTERN.sub(lambda match: "\n" * match.group(0).count("\n"), code)
+    lines = _join_markdown_strings(
+        [_strip_comment(line.rstrip()) for line in code.split("\n")]
+    )
+    # Skip the front matter and leading blank lines, keeping line numbers.
+    start = 0
+    if lines and lines[0].strip() == "---":
+        end = next((i for i in range(1, len(lines)) if lines[i].strip() == "---"), None)
+        start = end + 1 if end is not None else 0
+    while start < len(lines) and not lines[start].strip():
+        start += 1
+    if start == len(lines):
+        return ValidationResult(None, [MermaidError(1, "The diagram is empty")])
+
+    header = lines[start].split()[0]
+    detected = HEADERS.get(header)
+    result = ValidationResult(detected, header_line=start + 1)
+    if detected is None:
+        result.errors.append(
+            MermaidError(start + 1, f"Unknown diagram type '{header}'", lines[start])
+        )
+        return result
+    if diagram_type and detected != diagram_type:
+        result.errors.append(
+            MermaidError(
+                start + 1, f"Expected a {diagram_type}, got a {detected}", lines[start]
+            )
+        )
+
+    errors: List[MermaidError] = []
+    CHECKERS[detected](lines[start:], errors)
+    for error in errors:
+        error.line += start
+    result.errors.extend(errors)
+    return result
@@ -0,0 +1,17 @@
+from .exporters import MetricsFileExporter, render_prometheus, start_metrics_server
+from .registry import Metric, register_metric, registered_metrics
+from .tracer import Span, SpanRecord, StageStats, Tracer, tracer
+
+__all__ = [
+    "Metric",
+    "MetricsFileExporter",
+    "Span",
+    "SpanRecord",
+    "StageStats",
+    "Tracer",
+    "register_metric",
+    "registered_metrics",
+    "render_prometheus",
+    "start_metrics_server",
+    "tracer",
+]
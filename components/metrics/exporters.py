@@ -0,0 +1,125 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from .registry import registered_metrics
+from .tracer import Tracer, tracer as default_tracer
+
+PREFIX = "gptsummary_stage"
+METRIC_PREFIX = "gptsummary"
+
+
+def render_prometheus(tracer: Optional[Tracer] = None) -> str:
+    """
+    Render the stage aggregates and the registered metrics in the Prometheus
+    text exposition format.
+
+    Args:
+        tracer (Optional[Tracer]): The tracer to export. Defaults to the process-wide tracer.
+
+    Returns:
+        str: The metrics text.
+    """
+    tracer = tracer or default_tracer
+    stats = tracer.stats()
+    lines: List[str] = [
+        f"# HELP {PREFIX}_duration_seconds Wall time of each pipeline stage.",
+        f"# TYPE {PREFIX}_duration_seconds histogram",
+    ]
+    for stage, stage_stats in stats.items():
+        label = f'stage="{stage}"'
+        for bound, count in zip(tracer.buckets, stage_stats.bucket_counts):
+            lines.append(f'{PREFIX}_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'{PREFIX}_duration_seconds_bucket{{{label},le="+Inf"}} {stage_stats.count}')
+        lines.append(f"{PREFIX}_duration_seconds_sum{{{label}}} {stage_stats.total_s:.6f}")
+        lines.append(f"{PREFIX}_duration_seconds_count{{{label}}} {stage_stats.count}")
+
+    counters = [
+        ("errors_total", "Failed calls of each stage.", "errors"),
+        ("cache_hits_total", "Cache hits of each stage.", "cache_hits"),
+        ("cache_misses_total", "Cache misses of each stage.", "cache_misses"),
+        ("input_tokens_total", "Input tokens sent by each stage.", "input_tokens"),
+        ("output_tokens_total", "Output tokens received by each stage.", "output_tokens"),
+    ]
+    for name, description, attribute in counters:
+        lines.append(f"# HELP {PREFIX}_{name} {description}")
+        lines.append(f"# TYPE {PREFIX}_{name} counter")
+        for stage, stage_stats in stats.items():
+            lines.append(f'{PREFIX}_{name}{{stage="{stage}"}} {getattr(stage_stats, attribute)}')
+
+    for metric in registered_metrics():
+        lines.append(f"# HELP {METRIC_PREFIX}_{metric.name} {metric.description}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{metric.name} {metric.kind}")
+        lines.append(f"{METRIC_PREFIX}_{metric.name} {metric.value()}")
+
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve the metrics at `/metrics` from a background thread.
+
+    Args:
+        port (int): The port to listen on.
+        host (str): The address to bind.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class MetricsFileExporter:
+    def __init__(self, path: str, interval: float = 15.0) -> None:
+        """
+        Initialize an exporter that rewrites a metrics file periodically,
+        e.g. for the node_exporter textfile collector.
+
+        Args:
+            path (str): The path of the metrics file.
+            interval (float): The number of seconds between writes.
+        """
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def write(self) -> None:
+        """Write the current metrics, replacing the file atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(render_prometheus())
+        os.replace(tmp_path, self.path)
+
+    def start(self) -> "MetricsFileExporter":
+        def run() -> None:
+            while not self._stop.wait(self.interval):
+                self.write()
+
+        threading.Thread(target=run, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.write()
@@ -0,0 +1,54 @@
+import streamlit as st
+
+from .registry import registered_metrics
+from .tracer import tracer
+
+
+def show_metrics_panel() -> None:
+    """
+    Show the per-stage latency, token and cache statistics, and the registered
+    metrics, in the sidebar.
+    """
+    with st.sidebar.expander("Debug: pipeline metrics"):
+        metrics = registered_metrics()
+        if metrics:
+            st.dataframe(
+                [
+                    {"metric": metric.name, "value": round(metric.value(), 3)}
+                    for metric in metrics
+                ],
+                hide_index=True,
+            )
+        stats = tracer.stats()
+        if not stats:
+            st.caption("No stages recorded yet.")
+            return
+        st.dataframe(
+            [
+                {
+                    "stage": stage,
+                    "calls": s.count,
+                    "mean (s)": round(s.mean_s, 3),
+                    "errors": s.errors,
+                    "cache hits": s.cache_hits,
+                    "input tokens": s.input_tokens,
+                    "output tokens": s.output_tokens,
+                }
+                for stage, s in stats.items()
+            ],
+            hide_index=True,
+        )
+        st.caption("Recent spans")
+        st.dataframe(
+            [
+                {
+                    "request": r.request_id,
+                    "stage": r.stage,
+                    "time (s)": round(r.duration_s, 3),
+                    "cache hit": r.cache_hit,
+                    "error": r.error,
+                }
+                for r in tracer.recent(20)
+            ],
+            hide_index=True,
+        )
@@ -0,0 +1,36 @@
+import threading
+from typing import Callable, Dict, List, NamedTuple
+
+
+class Metric(NamedTuple):
+    name: str
+    kind: str  # "counter" or "gauge"
+    description: str
+    value: Callable[[], float]
+
+
+_metrics: Dict[str, Metric] = {}
+_lock = threading.Lock()
+
+
+def register_metric(
+    name: str, kind: str, description: str, value: Callable[[], float]
+) -> None:
+    """
+    Export a process-wide value of a component besides the stage statistics,
+    e.g. a counter kept by the component.
+
+    Args:
+        name (str): The metric name, without the "gptsummary_" prefix.
+        kind (str): The Prometheus type, "counter" or "gauge".
+        description (str): The help text.
+        value (Callable[[], float]): Returns the current value.
+    """
+    with _lock:
+        _metrics[name] = Metric(name, kind, description, value)
+
+
+def registered_metrics() -> List[Metric]:
+    """Return the registered metrics, sorted by name."""
+    with _lock:
+        return sorted(_metrics.values())
@@ -0,0 +1,156 @@
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+current_request_id: ContextVar[Optional[str]] = ContextVar(
+    "current_request_id", default=None
+)
+
+
+@dataclass
+class SpanRecord:
+    stage: str
+    request_id: Optional[str]
+    started_at: float
+    duration_s: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_hit: Optional[bool] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class StageStats:
+    count: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    total_s: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * len(DEFAULT_BUCKETS))
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+
+class Span:
+    """A stage being timed. Set token counts and cache hits on it inside the `with` block."""
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_hit: Optional[bool] = None
+
+    def set(self, **attributes: Any) -> None:
+        for name, value in attributes.items():
+            setattr(self, name, value)
+
+
+class Tracer:
+    def __init__(self, max_records: int = 1000, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """
+        Initialize a tracer that times pipeline stages and aggregates them per stage.
+
+        Args:
+            max_records (int): The number of recent spans kept for inspection.
+            buckets (Tuple[float, ...]): The upper bounds of the latency histogram, in seconds.
+        """
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stats: Dict[str, StageStats] = {}
+        self._records: Deque[SpanRecord] = deque(maxlen=max_records)
+
+    @contextmanager
+    def request(self) -> Iterator[str]:
+        """Tag the spans recorded inside the block with a new request ID."""
+        request_id = uuid.uuid4().hex[:12]
+        token = current_request_id.set(request_id)
+        try:
+            yield request_id
+        finally:
+            current_request_id.reset(token)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[Span]:
+        """
+        Time a stage, recording its wall time, tokens, cache hit and error.
+
+        Args:
+            stage (str): The name of the stage, e.g. "summarize".
+
+        Yields:
+            Span: The span, to set token counts and cache hits on.
+        """
+        span = Span(stage)
+        started_at = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield span
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(
+                SpanRecord(
+                    stage=stage,
+                    request_id=current_request_id.get(),
+                    started_at=started_at,
+                    duration_s=time.perf_counter() - start,
+                    input_tokens=span.input_tokens,
+                    output_tokens=span.output_tokens,
+                    cache_hit=span.cache_hit,
+                    error=error,
+                )
+            )
+
+    def record(self, record: SpanRecord) -> None:
+        """Add a finished span to the aggregates."""
+        with self._lock:
+            self._records.append(record)
+            stats = self._stats.setdefault(
+                record.stage, StageStats(bucket_counts=[0] * len(self.buckets))
+            )
+            stats.count += 1
+            stats.total_s += record.duration_s
+            stats.input_tokens += record.input_tokens
+            stats.output_tokens += record.output_tokens
+            stats.errors += record.error is not None
+            if record.cache_hit is not None:
+                stats.cache_hits += record.cache_hit
+                stats.cache_misses += not record.cache_hit
+            for i, bound in enumerate(self.buckets):
+                if record.duration_s <= bound:
+                    stats.bucket_counts[i] += 1
+
+    def stats(self) -> Dict[str, StageStats]:
+        """Return a copy of the aggregates of each stage."""
+        with self._lock:
+            return {
+                stage: StageStats(**{**vars(stats), "bucket_counts": list(stats.bucket_counts)})
+                for stage, stats in self._stats.items()
+            }
+
+    def recent(self, limit: int = 100) -> List[SpanRecord]:
+        """Return the most recent spans, newest first."""
+        with self._lock:
+            return list(self._records)[-limit:][::-1]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._records.clear()
+
+
+tracer = Tracer()
+
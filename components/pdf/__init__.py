@@ -0,0 +1,12 @@
+from .chapters import Chapter, split_chapters
+from .extraction import PageText, extract_text, iter_pages, page_count, spooled_pdf
+
+__all__ = [
+    "Chapter",
+    "PageText",
+    "extract_text",
+    "iter_pages",
+    "page_count",
+    "split_chapters",
+    "spooled_pdf",
+]
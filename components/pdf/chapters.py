@@ -0,0 +1,156 @@
+import bisect
+import re
+from typing import List, NamedTuple, Tuple
+
+import fitz
+
+from components.metrics import tracer
+
+from .extraction import PAGE_BREAK, PageText, iter_pages
+
+# Lines like "Chapter 3", "CHAPTER IV: Results", "Part Two" or "Chương 5".
+HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:chapter|part|chương|phần)[ \t]+"
+    r"(?:\d+|[ivxlcdm]+|one|two|three|four|five|six|seven|eight|nine|ten)\b"
+    r"[^\n]{0,60}$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Text before the first chapter is kept only if it's long enough to be more
+# than a title page, copyright notice and table of contents.
+MIN_FRONT_MATTER_WORDS = 300
+# Headings followed by fewer words before the next heading, like the lines of
+# a printed table of contents, don't start a chapter.
+MIN_CHAPTER_WORDS = 50
+FRONT_MATTER_TITLE = "Front matter"
+
+
+class Chapter(NamedTuple):
+    title: str
+    page_number: int  # 1-based, the page the chapter starts on
+    text: str
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _find_heading(page_text: str, title: str) -> int:
+    """Return the offset of the line starting a chapter title in its page, or 0."""
+    title = _normalize(title)[:40]
+    offset = 0
+    for line in page_text.splitlines(keepends=True):
+        normalized = _normalize(line)
+        # Long titles may be wrapped over several lines.
+        if normalized and (
+            normalized.startswith(title)
+            or (len(normalized) >= 8 and title.startswith(normalized))
+        ):
+            return offset
+        offset += len(line)
+    return 0
+
+
+def _join_pages(pages: List[PageText]) -> Tuple[str, List[int]]:
+    """Return the text of all pages and the offset of each page in it."""
+    offsets = [0]
+    for page in pages:
+        offsets.append(offsets[-1] + len(page.text) + len(PAGE_BREAK))
+    return PAGE_BREAK.join(page.text for page in pages), offsets[:-1]
+
+
+def _toc_entries(
+    path: str, page_total: int, min_chapters: int
+) -> List[Tuple[str, int]]:
+    """
+    Return the (title, page) of the chapters listed in the PDF outline: the
+    entries of the highest level with at least `min_chapters` entries, so a
+    single top-level entry with the book title is skipped.
+    """
+    with fitz.open(path) as pdf_doc:
+        toc = pdf_doc.get_toc(simple=True)
+    for level in sorted({entry[0] for entry in toc}):
+        entries = [
+            (title.strip(), page)
+            for entry_level, title, page in toc
+            if entry_level == level and 1 <= page <= page_total
+        ]
+        if len(entries) >= min_chapters:
+            return sorted(entries, key=lambda entry: entry[1])
+    return []
+
+
+def _split_by_toc(
+    pages: List[PageText], entries: List[Tuple[str, int]]
+) -> List[Chapter]:
+    text, offsets = _join_pages(pages)
+
+    starts = [
+        offsets[page - 1] + _find_heading(pages[page - 1].text, title)
+        for title, page in entries
+    ]
+    chapters = []
+    for i, (title, page) in enumerate(entries):
+        stop = starts[i + 1] if i + 1 < len(starts) else len(text)
+        chapters.append(Chapter(title, page, text[starts[i] : max(starts[i], stop)]))
+    return _with_front_matter(text[: starts[0]], chapters)
+
+
+def _split_by_headings(pages: List[PageText]) -> List[Chapter]:
+    text, offsets = _join_pages(pages)
+
+    headings = []
+    for match in HEADING_PATTERN.finditer(text):
+        title = " ".join(match.group().split())
+        # Running headers repeat the chapter heading on each of its pages.
+        if headings and _normalize(headings[-1][1]) == _normalize(title):
+            continue
+        headings.append((match.start(), title))
+    headings = [
+        heading
+        for i, heading in enumerate(headings)
+        if i + 1 == len(headings)
+        or len(text[heading[0] : headings[i + 1][0]].split()) >= MIN_CHAPTER_WORDS
+    ]
+    if not headings:
+        return []
+
+    chapters = []
+    for i, (start, title) in enumerate(headings):
+        stop = headings[i + 1][0] if i + 1 < len(headings) else len(text)
+        page_number = bisect.bisect_right(offsets, start)
+        chapters.append(Chapter(title, page_number, text[start:stop]))
+    return _with_front_matter(text[: headings[0][0]], chapters)
+
+
+def _with_front_matter(front_matter: str, chapters: List[Chapter]) -> List[Chapter]:
+    if len(front_matter.split()) >= MIN_FRONT_MATTER_WORDS:
+        return [Chapter(FRONT_MATTER_TITLE, 1, front_matter)] + chapters
+    return chapters
+
+
+def split_chapters(path: str, min_chapters: int = 2, **kwargs) -> List[Chapter]:
+    """
+    Extract the text of a PDF file, split into chapters.
+
+    The chapters are taken from the PDF outline (table of contents) if it has
+    one, otherwise from chapter headings found in the text. A document without
+    either is returned as a single chapter without title.
+
+    Args:
+        path (str): The path of the PDF file.
+        min_chapters (int): The minimum number of chapters of a usable outline
+            or set of headings.
+        **kwargs: Passed to `iter_pages`.
+
+    Returns:
+        List[Chapter]: The chapters, in reading order.
+    """
+    with tracer.span("pdf_extract"):
+        pages = list(iter_pages(path, **kwargs))
+        entries = _toc_entries(path, len(pages), min_chapters)
+        chapters = _split_by_toc(pages, entries) if entries else []
+        if len(chapters) < min_chapters:
+            chapters = _split_by_headings(pages)
+        if len(chapters) < min_chapters:
+            chapters = [Chapter("", 1, _join_pages(pages)[0])]
+        return [chapter for chapter in chapters if chapter.text.strip()]
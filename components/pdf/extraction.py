@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+import fitz
+
+from components.metrics import tracer
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# Separates the pages of an extracted text, so preprocessing can tell headers
+# and footers from body text. On its own line, so each page still starts one.
+PAGE_BREAK = "\f\n"
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+class PageText(NamedTuple):
+    page_number: int  # 1-based
+    text: str
+
+
+@contextmanager
+def spooled_pdf(pdf_file: BinaryIO) -> Iterator[str]:
+    """
+    Copy an uploaded PDF to a temporary file and yield its path.
+
+    PyMuPDF reads pages from the file on demand, so the worker processes
+    don't need a copy of the whole upload in memory. The file is removed
+    on exit.
+
+    Args:
+        pdf_file (BinaryIO): The uploaded PDF file.
+
+    Yields:
+        str: The path of the temporary file.
+    """
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(pdf_file, tmp, COPY_BUFFER_SIZE)
+    try:
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+
+def page_count(path: str) -> int:
+    """Return the number of pages of a PDF file."""
+    with fitz.open(path) as pdf_doc:
+        return len(pdf_doc)
+
+
+def _extract_range(path: str, start: int, stop: int) -> List[PageText]:
+    with fitz.open(path) as pdf_doc:
+        return [
+            PageText(page_num + 1, pdf_doc.load_page(page_num).get_text())
+            for page_num in range(start, stop)
+        ]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the process pool of `workers` workers shared by all extractions.
+
+    The workers are spawned rather than forked: the app has threads running,
+    and a forked child only gets a copy of their locks, possibly held.
+    Spawning is slow, so the pool is kept for the next documents.
+    """
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pools[workers]
+
+
+def _discard_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pages(
+    path: str, workers: Optional[int] = None, pages_per_task: int = 32
+) -> Iterator[PageText]:
+    """
+    Yield the text of each page of a PDF file, in page order.
+
+    Small documents are read in this process. Larger ones are split into page
+    ranges extracted by a process pool, shared with the other extractions; at
+    most two ranges per worker are in flight, so memory stays bounded however
+    long the book is.
+
+    Args:
+        path (str): The path of the PDF file.
+        workers (Optional[int]): The number of worker processes. Defaults to the CPU count.
+        pages_per_task (int): The number of pages extracted by one task.
+
+    Yields:
+        PageText: The page number and text of the next page.
+    """
+    total = page_count(path)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or total <= pages_per_task:
+        with fitz.open(path) as pdf_doc:
+            for page_num in range(total):
+                yield PageText(page_num + 1, pdf_doc.load_page(page_num).get_text())
+        return
+
+    ranges = deque(
+        (start, min(start + pages_per_task, total))
+        for start in range(0, total, pages_per_task)
+    )
+    executor = _get_pool(workers)
+    pending = deque()
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < 2 * workers:
+                start, stop = ranges.popleft()
+                pending.append(executor.submit(_extract_range, path, start, stop))
+            yield from pending.popleft().result()
+    except BrokenProcessPool:
+        # A worker died, e.g. killed for its memory; the next call starts afresh.
+        _discard_pool(workers, executor)
+        raise
+    finally:
+        # The reader stopped early or failed: drop the ranges not started yet.
+        for future in pending:
+            future.cancel()
+
+
+def extract_text(path: str, **kwargs) -> str:
+    """
+    Extract the full text of a PDF file.
+
+    Args:
+        path (str): The path of the PDF file.
+        **kwargs: Passed to `iter_pages`.
+
+    Returns:
+        str: The text of all pages, separated by `PAGE_BREAK`.
+    """
+    with tracer.span("pdf_extract"):
+        return PAGE_BREAK.join(page.text for page in iter_pages(path, **kwargs))
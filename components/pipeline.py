@@ -0,0 +1,112 @@
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
+from pydantic import BaseModel
+
+from components.mermaid.diagram_generator import DiagramGenerator, DiagramState
+from components.metrics import tracer
+from components.summarizer import Summarizer
+
+
+class PipelineState(BaseModel):
+    text: str
+    summary: Optional[str] = None
+    diagram_type: Optional[str] = None
+    diagram: Optional[Dict[str, Any]] = None
+
+
+class SummaryDiagramPipeline:
+    def __init__(self, summarizer: Summarizer, generator: DiagramGenerator) -> None:
+        """
+        Initialize a pipeline that summarizes a text and generates the diagram
+        of the summary.
+
+        The diagram type is chosen on the source text while the summary is being
+        generated, so once the summary is done only the Mermaid code is left:
+        the latency is about the longer of the two stages instead of their sum.
+
+        Args:
+            summarizer (Summarizer): The summarizer to use.
+            generator (DiagramGenerator): The diagram generator to use.
+        """
+        self.summarizer = summarizer
+        self.generator = generator
+        self._graph = None
+
+    def summarize(self, state: PipelineState, config: RunnableConfig) -> Dict[str, Any]:
+        """Summarize the text, reporting the summary so far to `progress`."""
+        progress = config.get("configurable", {}).get("progress")
+        summary = ""
+        for part in self.summarizer.stream(state.text):
+            summary += part
+            if progress is not None:
+                progress(summary)
+        if not summary:
+            raise ValueError("The summary is empty.")
+
+        return {"summary": summary}
+
+    def choose_diagram_type(self, state: PipelineState) -> Dict[str, Any]:
+        """Choose the diagram type from the source text, locally or with the LLM."""
+        diagram_state = DiagramState(text=state.text)
+        update = self.generator.classify_text(diagram_state)
+        if "diagram_type" not in update:
+            diagram_state = diagram_state.model_copy(update=update)
+            update.update(self.generator.analyze_text(diagram_state))
+
+        return {"diagram_type": update["diagram_type"]}
+
+    def generate_diagram(self, state: PipelineState) -> Dict[str, Any]:
+        """Generate the Mermaid code of the summary, with the chosen diagram type."""
+        diagram = self.generator.generate(
+            state.summary, diagram_type=state.diagram_type
+        )
+        return {"diagram": diagram}
+
+    def build_graph(self) -> StateGraph:
+        """
+        Build the state graph: `summarize` and `choose_diagram_type` run in
+        parallel, and `generate_diagram` waits for both.
+
+        Returns:
+            StateGraph: The compiled state graph.
+        """
+        workflow = StateGraph(PipelineState)
+        workflow.add_node("summarize", self.summarize)
+        workflow.add_node("choose_diagram_type", self.choose_diagram_type)
+        workflow.add_node("generate_diagram", self.generate_diagram)
+        workflow.add_edge(START, "summarize")
+        workflow.add_edge(START, "choose_diagram_type")
+        workflow.add_edge(["summarize", "choose_diagram_type"], "generate_diagram")
+        workflow.add_edge("generate_diagram", END)
+
+        return workflow.compile()
+
+    def get_graph(self) -> StateGraph:
+        """Return the compiled state graph, building it on first use."""
+        if self._graph is None:
+            self._graph = self.build_graph()
+
+        return self._graph
+
+    def run(
+        self, text: str, progress: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Summarize a text and generate the diagram of the summary.
+
+        Args:
+            text (str): The text to summarize.
+            progress (Optional[Callable[[str], None]]): Called with the summary so far.
+
+        Returns:
+            Dict[str, Any]: The summary, and the diagram as returned by
+                `DiagramGenerator.generate`.
+        """
+        with tracer.span("pipeline"):
+            state = self.get_graph().invoke(
+                {"text": text}, config={"configurable": {"progress": progress}}
+            )
+
+        return {"summary": state["summary"], "diagram": state["diagram"]}
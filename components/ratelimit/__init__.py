@@ -0,0 +1,45 @@
+import importlib
+
+from .limiter import (
+    DEFAULT_QUOTA,
+    DEFAULT_QUOTAS,
+    EXPECTED_OUTPUT_TOKENS,
+    RateLimiter,
+    TokenBucket,
+    backoff_delay,
+    call_with_retries,
+    current_owner,
+    get_quota,
+    get_rate_limiter,
+    is_rate_limit_error,
+    rate_limit_owner,
+    set_quota,
+)
+
+# Imported on first use: the chat model wrapper pulls in LangChain, which the
+# app doesn't need to start.
+_LAZY_IMPORTS = {"RateLimitedChatModel": ".chat_model"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "DEFAULT_QUOTA",
+    "DEFAULT_QUOTAS",
+    "EXPECTED_OUTPUT_TOKENS",
+    "RateLimitedChatModel",
+    "RateLimiter",
+    "TokenBucket",
+    "backoff_delay",
+    "call_with_retries",
+    "current_owner",
+    "get_quota",
+    "get_rate_limiter",
+    "is_rate_limit_error",
+    "rate_limit_owner",
+    "set_quota",
+]
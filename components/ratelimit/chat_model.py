@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from components.summarizer.tokens import count_tokens
+
+from .limiter import (
+    EXPECTED_OUTPUT_TOKENS,
+    backoff_delay,
+    call_with_retries,
+    is_rate_limit_error,
+)
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """
+    A chat model that waits for the shared quota of its model before each call,
+    and retries rate-limit errors with jittered exponential backoff.
+    """
+
+    llm: BaseChatModel
+    limiter: Any
+    model_name: str = ""
+    max_retries: int = 5
+
+    @property
+    def _llm_type(self) -> str:
+        return "rate-limited-chat-model"
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        text = "\n".join(str(message.content) for message in messages)
+        return count_tokens(text, self.model_name) + EXPECTED_OUTPUT_TOKENS
+
+    def _record_usage(self, estimated: int, message: Any) -> None:
+        usage = getattr(message, "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            self.limiter.record_usage(estimated, usage["total_tokens"])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        estimated = self._estimate_tokens(messages)
+
+        def call():
+            self.limiter.acquire(estimated)
+            return self.llm.invoke(messages, stop=stop, **kwargs)
+
+        message = call_with_retries(call, self.max_retries)
+        self._record_usage(estimated, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        estimated = self._estimate_tokens(messages)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.aacquire(estimated)
+            try:
+                message = await self.llm.ainvoke(messages, stop=stop, **kwargs)
+                break
+            except Exception as e:
+                if attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+        self._record_usage(estimated, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        estimated = self._estimate_tokens(messages)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(estimated)
+            started = False
+            try:
+                for chunk in self.llm.stream(messages, stop=stop, **kwargs):
+                    started = True
+                    yield ChatGenerationChunk(message=chunk)
+                return
+            except Exception as e:
+                # Only retry if nothing was streamed yet.
+                if started or attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                time.sleep(backoff_delay(attempt))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        estimated = self._estimate_tokens(messages)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.aacquire(estimated)
+            started = False
+            try:
+                async for chunk in self.llm.astream(messages, stop=stop, **kwargs):
+                    started = True
+                    yield ChatGenerationChunk(message=chunk)
+                return
+            except Exception as e:
+                if started or attempt == self.max_retries or not is_rate_limit_error(e):
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
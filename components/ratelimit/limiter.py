@@ -0,0 +1,253 @@
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+
+# Default (requests/min, tokens/min) quotas per "provider/model" prefix.
+DEFAULT_QUOTAS: Dict[str, Tuple[float, Optional[float]]] = {
+    "Gemini/gemini-1.5-flash": (1000, 4_000_000),
+    "Gemini/gemini-1.5-pro": (360, 4_000_000),
+    "Yi/yi-large": (60, None),
+    "Groq/llama3-70b-8192": (30, 6_000),
+    "Groq/mixtral-8x7b-32768": (30, 5_000),
+}
+DEFAULT_QUOTA: Tuple[float, Optional[float]] = (60, None)
+
+# Output tokens reserved per call until the real usage is known.
+EXPECTED_OUTPUT_TOKENS = 500
+
+# How often a waiting coroutine checks whether it's at the front of the line.
+ASYNC_POLL_INTERVAL = 0.05
+
+current_owner: ContextVar[Optional[str]] = ContextVar("current_owner", default=None)
+
+
+@contextmanager
+def rate_limit_owner(owner: str) -> Iterator[None]:
+    """Attribute the LLM calls made inside the block to `owner`, e.g. a session ID."""
+    token = current_owner.set(owner)
+    try:
+        yield
+    finally:
+        current_owner.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        """
+        Initialize a bucket holding up to one minute of quota, refilled continuously.
+
+        Args:
+            per_minute (float): The quota per minute.
+        """
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Return how long until `amount` is available (amounts above capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """Take `amount` out of the bucket; the level may go negative (debt)."""
+        self.level -= amount
+
+
+class RateLimiter:
+    def __init__(
+        self, requests_per_minute: float, tokens_per_minute: Optional[float] = None
+    ) -> None:
+        """
+        Initialize a process-wide limiter of the requests and tokens sent to one model.
+
+        Waiting callers are grouped by owner (see `rate_limit_owner`) and served
+        round-robin, so a session sending many chunks at once can't starve the others.
+
+        Args:
+            requests_per_minute (float): The request quota per minute.
+            tokens_per_minute (Optional[float]): The token quota per minute, None for no limit.
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._cond = threading.Condition()
+        self._queues: "OrderedDict[Optional[str], Deque[object]]" = OrderedDict()
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = self.requests.wait_time(1, now)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def _is_next(self, ticket: object) -> bool:
+        first_queue = next(iter(self._queues.values()))
+        return first_queue[0] is ticket
+
+    def _serve(self, owner: Optional[str], tokens: int) -> None:
+        self.requests.consume(1)
+        if self.tokens is not None:
+            self.tokens.consume(tokens)
+        queue = self._queues.pop(owner)
+        queue.popleft()
+        if queue:
+            # The owner goes to the back of the line.
+            self._queues[owner] = queue
+        self._cond.notify_all()
+
+    def _abandon(self, owner: Optional[str], ticket: object) -> None:
+        """Give up the place of a caller that stopped waiting, e.g. cancelled."""
+        queue = self._queues[owner]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[owner]
+        self._cond.notify_all()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until a request of `tokens` tokens fits in the quota, and take it.
+
+        Args:
+            tokens (int): The estimated number of tokens of the request.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        owner = current_owner.get()
+        ticket = object()
+        start = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(owner, deque()).append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now)
+                    if self._is_next(ticket) and wait == 0:
+                        break
+                    self._cond.wait(timeout=wait if self._is_next(ticket) else None)
+            except BaseException:
+                self._abandon(owner, ticket)
+                raise
+            self._serve(owner, tokens)
+
+        return time.monotonic() - start
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """
+        Wait without blocking the event loop until a request of `tokens` tokens
+        fits in the quota, and take it.
+
+        Unlike `acquire` in a worker thread, the wait can be cancelled, e.g. for
+        the losing call of a hedged request; the caller then leaves the line
+        without using any quota.
+
+        Args:
+            tokens (int): The estimated number of tokens of the request.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        owner = current_owner.get()
+        ticket = object()
+        start = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(owner, deque()).append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._wait_time(tokens, time.monotonic())
+                    if self._is_next(ticket) and wait == 0:
+                        self._serve(owner, tokens)
+                        return time.monotonic() - start
+                    if not self._is_next(ticket):
+                        wait = ASYNC_POLL_INTERVAL
+                await asyncio.sleep(wait)
+        except BaseException:
+            with self._cond:
+                self._abandon(owner, ticket)
+            raise
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tokens is None:
+            return
+        with self._cond:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_quotas: Dict[str, Tuple[float, Optional[float]]] = {}
+_limiters_lock = threading.Lock()
+
+
+def set_quota(
+    provider: str,
+    model_name: str,
+    requests_per_minute: float,
+    tokens_per_minute: Optional[float] = None,
+) -> None:
+    """Override the quota of a model; applies to limiters created afterwards."""
+    with _limiters_lock:
+        _quotas[f"{provider}/{model_name}"] = (requests_per_minute, tokens_per_minute)
+
+
+def _quota(key: str) -> Tuple[float, Optional[float]]:
+    return _quotas.get(key) or next(
+        (q for prefix, q in DEFAULT_QUOTAS.items() if key.startswith(prefix)),
+        DEFAULT_QUOTA,
+    )
+
+
+def get_quota(provider: str, model_name: str) -> Tuple[float, Optional[float]]:
+    """Return the (requests/min, tokens/min) quota of a model, overridden or default."""
+    with _limiters_lock:
+        return _quota(f"{provider}/{model_name}")
+
+
+def get_rate_limiter(provider: str, model_name: str) -> RateLimiter:
+    """Return the process-wide limiter of a provider and model."""
+    key = f"{provider}/{model_name}"
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(*_quota(key))
+        return _limiters[key]
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return whether an exception from a provider SDK means "too many requests"."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(
+        marker in text
+        for marker in ("429", "rate limit", "ratelimit", "resourceexhausted", "quota")
+    )
+
+
+def backoff_delay(attempt: int, base: float = 1.0, maximum: float = 30.0) -> float:
+    """Return the exponential backoff delay of a retry, with full jitter."""
+    return random.uniform(0, min(maximum, base * 2**attempt))
+
+
+def call_with_retries(fn: Callable[[], Any], max_retries: int = 5) -> Any:
+    """Call `fn`, retrying rate-limit errors with jittered exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or not is_rate_limit_error(e):
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Rate limited, retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
@@ -0,0 +1,325 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from loguru import logger
+from pydantic import PrivateAttr
+
+
+class ProviderHealth:
+    def __init__(
+        self, window: int = 50, cooldown: float = 30.0, error_window: float = 300.0
+    ) -> None:
+        """
+        Initialize the rolling latency and error statistics of one backend.
+
+        Args:
+            window (int): The number of recent calls the statistics are computed on.
+            cooldown (float): How long a backend is skipped after 3 consecutive failures, in seconds.
+            error_window (float): How long a call counts in the error rate, in
+                seconds. A backend ranked last for its errors gets few calls, so
+                its errors must age out for it to be tried again.
+        """
+        self.cooldown = cooldown
+        self.error_window = error_window
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._unhealthy_until = 0.0
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._outcomes.append((time.monotonic(), ok))
+            if ok:
+                self._latencies.append(latency)
+                self._consecutive_failures = 0
+            else:
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= 3:
+                    self._unhealthy_until = time.monotonic() + self.cooldown
+
+    @property
+    def sample_count(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        since = time.monotonic() - self.error_window
+        with self._lock:
+            while self._outcomes and self._outcomes[0][0] < since:
+                self._outcomes.popleft()
+            if not self._outcomes:
+                return 0.0
+            return 1 - sum(ok for _, ok in self._outcomes) / len(self._outcomes)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-100) of recent successful latencies."""
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def is_healthy(self, max_error_rate: float) -> bool:
+        return time.monotonic() >= self._unhealthy_until and self.error_rate <= max_error_rate
+
+
+class RouterChatModel(BaseChatModel):
+    """
+    A chat model that routes each call to the fastest healthy backend.
+
+    Backends are ranked by their rolling median latency; backends with a high
+    error rate or repeated failures are tried last. When hedging is on and the
+    chosen backend hasn't answered after its p95 latency (or `hedge_after`), the
+    same request is sent to the next backend and the first answer wins. Failed
+    calls fail over to the next backend.
+
+    A thread can't be interrupted, so in synchronous calls the losing hedged call
+    runs to completion in the background and is billed like any other call.
+    Asynchronous calls cancel it. Hedging trades this cost for tail latency; turn
+    it off with `hedge=False` for expensive models.
+    """
+
+    backends: Dict[str, BaseChatModel]
+    model_name: str = "router"
+    hedge: bool = True
+    hedge_after: Optional[float] = None
+    min_samples: int = 5
+    max_error_rate: float = 0.5
+    window: int = 50
+    cooldown: float = 30.0
+    error_window: float = 300.0
+
+    _health: Dict[str, ProviderHealth] = PrivateAttr(default_factory=dict)
+    _executor: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._health = {
+            name: ProviderHealth(self.window, self.cooldown, self.error_window)
+            for name in self.backends
+        }
+        self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="router")
+
+    @property
+    def _llm_type(self) -> str:
+        return "router-chat-model"
+
+    def health(self, name: str) -> ProviderHealth:
+        return self._health[name]
+
+    def ranked_backends(self) -> List[str]:
+        """Return the backend names, fastest healthy first and unhealthy last."""
+
+        def sort_key(name: str):
+            health = self._health[name]
+            # Backends without samples rank first so they get measured.
+            return (
+                not health.is_healthy(self.max_error_rate),
+                health.latency_percentile(50) or 0.0,
+            )
+
+        return sorted(self.backends, key=sort_key)
+
+    def _hedge_delay(self, name: str) -> Optional[float]:
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        health = self._health[name]
+        if health.sample_count < self.min_samples:
+            return None
+        return health.latency_percentile(95)
+
+    def _call(self, name: str, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        start = time.perf_counter()
+        try:
+            message = self.backends[name].invoke(messages, **kwargs)
+        except Exception:
+            self._health[name].record(time.perf_counter() - start, ok=False)
+            raise
+        self._health[name].record(time.perf_counter() - start, ok=True)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _acall(
+        self, name: str, messages: List[BaseMessage], **kwargs: Any
+    ) -> ChatResult:
+        start = time.perf_counter()
+        try:
+            message = await self.backends[name].ainvoke(messages, **kwargs)
+        except Exception:
+            self._health[name].record(time.perf_counter() - start, ok=False)
+            raise
+        self._health[name].record(time.perf_counter() - start, ok=True)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        candidates = iter(self.ranked_backends())
+        pending: Dict[Future, str] = {}
+        last_error: Optional[Exception] = None
+
+        def launch() -> bool:
+            name = next(candidates, None)
+            if name is None:
+                return False
+            # Run in the caller's context, so the call keeps its request ID and
+            # rate limit owner.
+            context = contextvars.copy_context()
+            future = self._executor.submit(
+                context.run, self._call, name, messages, stop=stop, **kwargs
+            )
+            pending[future] = name
+            return True
+
+        launch()
+        try:
+            while pending:
+                primary = next(iter(pending.values()))
+                timeout = self._hedge_delay(primary) if len(pending) == 1 else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if launch():
+                        logger.info(f"Hedging slow call to {primary}")
+                    continue
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        logger.warning(f"Backend {name} failed: {e}")
+                        last_error = e
+                if not pending:
+                    launch()
+        finally:
+            # Only drops calls not started yet; a started loser still completes.
+            for future in pending:
+                future.cancel()
+
+        raise last_error or RuntimeError("No backend available")
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        candidates = iter(self.ranked_backends())
+        pending: Dict[asyncio.Task, str] = {}
+        last_error: Optional[Exception] = None
+
+        def launch() -> bool:
+            name = next(candidates, None)
+            if name is None:
+                return False
+            task = asyncio.ensure_future(
+                self._acall(name, messages, stop=stop, **kwargs)
+            )
+            pending[task] = name
+            return True
+
+        launch()
+        try:
+            while pending:
+                primary = next(iter(pending.values()))
+                timeout = self._hedge_delay(primary) if len(pending) == 1 else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if launch():
+                        logger.info(f"Hedging slow call to {primary}")
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        logger.warning(f"Backend {name} failed: {e}")
+                        last_error = e
+                if not pending:
+                    launch()
+        finally:
+            # Cancel the losing hedged call: one still waiting for rate limit quota
+            # leaves the line without using it, but a request already sent may
+            # still be billed.
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        raise last_error or RuntimeError("No backend available")
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        # Streams are not hedged; a backend failing before its first token fails over.
+        last_error: Optional[Exception] = None
+        for name in self.ranked_backends():
+            start = time.perf_counter()
+            started = False
+            try:
+                for chunk in self.backends[name].stream(messages, stop=stop, **kwargs):
+                    started = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                self._health[name].record(time.perf_counter() - start, ok=False)
+                if started:
+                    raise
+                logger.warning(f"Backend {name} failed: {e}")
+                last_error = e
+                continue
+            self._health[name].record(time.perf_counter() - start, ok=True)
+            return
+
+        raise last_error or RuntimeError("No backend available")
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        last_error: Optional[Exception] = None
+        for name in self.ranked_backends():
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in self.backends[name].astream(
+                    messages, stop=stop, **kwargs
+                ):
+                    started = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                self._health[name].record(time.perf_counter() - start, ok=False)
+                if started:
+                    raise
+                logger.warning(f"Backend {name} failed: {e}")
+                last_error = e
+                continue
+            self._health[name].record(time.perf_counter() - start, ok=True)
+            return
+
+        raise last_error or RuntimeError("No backend available")
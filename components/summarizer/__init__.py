@@ -1,3 +1,3 @@
-from .summarizer import Summarizer
+from .summarizer import ChapterSummary, Summarizer
 
-__all__ = ["Summarizer"]
+__all__ = ["ChapterSummary", "Summarizer"]
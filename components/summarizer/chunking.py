@@ -0,0 +1,130 @@
+import hashlib
+from typing import List
+
+from .tokens import estimate_tokens
+
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+
+def _split_on(text: str, max_tokens: int, separators: List[str]) -> List[str]:
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return [text]
+    if not separators:
+        size = max(1, len(text) * max_tokens // tokens)
+        return [text[i : i + size] for i in range(0, len(text), size)]
+
+    separator, rest = separators[0], separators[1:]
+    pieces = []
+    for part in text.split(separator):
+        pieces.extend(_split_on(part, max_tokens, rest))
+    return _merge(pieces, max_tokens, separator)
+
+
+def _merge(pieces: List[str], max_tokens: int, separator: str) -> List[str]:
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    sep_tokens = estimate_tokens(separator)
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + sep_tokens + piece_tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens + (sep_tokens if len(current) > 1 else 0)
+    if current:
+        chunks.append(separator.join(current))
+
+    return chunks
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split a text into chunks of at most `max_tokens` tokens.
+
+    The text is split on paragraphs first, then on lines, sentences and words,
+    and only cut in the middle of a word as a last resort.
+
+    Args:
+        text (str): The text to split.
+        max_tokens (int): The token budget of a single chunk.
+
+    Returns:
+        List[str]: The chunks, in the order they appear in the text.
+    """
+    chunks = _split_on(text, max_tokens, SEPARATORS)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def group_texts(texts: List[str], max_tokens: int, separator: str = "\n\n") -> List[str]:
+    """Join consecutive texts into groups of at most `max_tokens` tokens."""
+    return _merge(texts, max_tokens, separator)
+
+
+def _is_boundary(unit: str, unit_tokens: int, target_tokens: int) -> bool:
+    """Decide from the content of a unit alone whether a chunk may end after it."""
+    digest = hashlib.blake2b(unit.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < unit_tokens / target_tokens
+
+
+def group_stable(texts: List[str], max_tokens: int, separator: str = "\n\n") -> List[str]:
+    """
+    Join consecutive texts into groups of at most `max_tokens` tokens, with
+    content-defined boundaries.
+
+    Unlike `group_texts`, where the groups are packed greedily and an edit
+    shifts every later boundary, a group ends after a text chosen by the hash
+    of the text itself (once the group holds half the budget), so an edit only
+    changes the groups around it.
+
+    Args:
+        texts (List[str]): The texts to group.
+        max_tokens (int): The token budget of a single group.
+        separator (str): The separator the texts of a group are joined with.
+
+    Returns:
+        List[str]: The groups, in order.
+    """
+    groups = []
+    current: List[str] = []
+    current_tokens = 0
+    sep_tokens = estimate_tokens(separator)
+    min_tokens = max_tokens // 2
+    target_tokens = max(1, max_tokens // 4)
+    for text in texts:
+        text_tokens = estimate_tokens(text)
+        if current and current_tokens + sep_tokens + text_tokens > max_tokens:
+            groups.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += text_tokens + (sep_tokens if len(current) > 1 else 0)
+        if current_tokens >= min_tokens and _is_boundary(text, text_tokens, target_tokens):
+            groups.append(separator.join(current))
+            current, current_tokens = [], 0
+    if current:
+        groups.append(separator.join(current))
+
+    return groups
+
+
+def split_text_stable(text: str, max_tokens: int) -> List[str]:
+    """
+    Split a text into chunks of at most `max_tokens` tokens whose boundaries
+    depend on the content around them, not on their position.
+
+    When a text is edited, the chunks away from the edit stay identical, so
+    their cached summaries can be reused.
+
+    Args:
+        text (str): The text to split.
+        max_tokens (int): The token budget of a single chunk.
+
+    Returns:
+        List[str]: The chunks, in the order they appear in the text.
+    """
+    units = []
+    for paragraph in text.split("\n\n"):
+        if paragraph.strip():
+            units.extend(split_text(paragraph, max_tokens))
+    return group_stable(units, max_tokens)
@@ -0,0 +1,164 @@
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; GPTsummary)"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    text: str = ""
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class URLFetcher:
+    def __init__(
+        self,
+        max_workers: int = 16,
+        per_host: int = 4,
+        timeout: float = 15.0,
+        retries: int = 2,
+        backoff_factor: float = 0.5,
+        max_validators: int = 1024,
+    ) -> None:
+        """
+        Initialize a fetcher that downloads many webpages concurrently.
+
+        All requests share one HTTP session, so connections are pooled and reused.
+        Pages seen before are revalidated with conditional requests (ETag or
+        Last-Modified), so an unchanged page isn't downloaded and parsed again.
+
+        Args:
+            max_workers (int): The maximum number of requests in flight.
+            per_host (int): The maximum number of requests in flight to the same host.
+            timeout (float): The connect and read timeout of a request, in seconds.
+            retries (int): The number of retries on connection errors and 429/5xx responses.
+            backoff_factor (float): The exponential backoff factor between retries, in seconds.
+            max_validators (int): The maximum number of pages kept for revalidation.
+        """
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_validators = max_validators
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = os.environ.get(
+            "USER_AGENT", DEFAULT_USER_AGENT
+        )
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = defaultdict(
+            lambda: threading.BoundedSemaphore(self.per_host)
+        )
+        self._lock = threading.Lock()
+        # url -> (etag, last modified, text)
+        self._validators: "OrderedDict[str, Tuple[Optional[str], Optional[str], str]]" = (
+            OrderedDict()
+        )
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            return self._host_slots[urlsplit(url).netloc]
+
+    def fetch(self, url: str) -> FetchResult:
+        """
+        Download a webpage and return its text content.
+
+        Args:
+            url (str): The URL of the webpage.
+
+        Returns:
+            FetchResult: The text of the page, or the error if the download failed.
+        """
+        with self._lock:
+            validator = self._validators.get(url)
+        headers = {}
+        if validator is not None:
+            etag, last_modified, _ = validator
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        try:
+            with self._host_slot(url):
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+            if response.status_code == 304 and validator is not None:
+                logger.info(f"Not modified: {url}")
+                return FetchResult(url=url, text=validator[2])
+            response.raise_for_status()
+            if response.encoding is None or response.encoding == "ISO-8859-1":
+                response.encoding = response.apparent_encoding
+            soup = BeautifulSoup(response.text, "html.parser")
+            text = soup.get_text()
+            self._remember(url, response, text)
+            return FetchResult(url=url, text=text)
+        except Exception as e:
+            logger.warning(f"Failed to fetch {url}: {e}")
+            return FetchResult(url=url, error=str(e))
+
+    def _remember(self, url: str, response: requests.Response, text: str) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._validators[url] = (etag, last_modified, text)
+            self._validators.move_to_end(url)
+            while len(self._validators) > self.max_validators:
+                self._validators.popitem(last=False)
+
+    def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        """
+        Download many webpages concurrently.
+
+        A failed download doesn't fail the others; its result holds the error.
+
+        Args:
+            urls (List[str]): The URLs of the webpages.
+
+        Returns:
+            List[FetchResult]: One result per URL, in the same order.
+        """
+        if len(urls) == 1:
+            return [self.fetch(urls[0])]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as pool:
+            return list(pool.map(self.fetch, urls))
+
+
+_default_fetcher: Optional[URLFetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> URLFetcher:
+    """Return the process-wide fetcher, so every caller shares its connection pool."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = URLFetcher()
+        return _default_fetcher
@@ -0,0 +1,160 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from .tokens import count_tokens
+
+PAGE_NUMBER_PATTERN = re.compile(
+    r"^\s*(page\s*)?[-–]?\s*\d{1,4}\s*[-–]?(\s*(of|/)\s*\d{1,4})?\s*$", re.IGNORECASE
+)
+BOILERPLATE_PATTERN = re.compile(
+    r"^\s*("
+    r"skip to (main )?content|accept (all )?cookies|we use cookies.*|cookie (policy|settings)"
+    r"|all rights reserved.*|©.*|copyright ©.*|privacy policy|terms of (use|service)"
+    r"|sign in|log ?in|sign up|subscribe( now)?|share( this)?|follow us.*"
+    r"|back to top|read more|advertisement|related (posts|articles)"
+    r")\s*$",
+    re.IGNORECASE,
+)
+LEADING_TRAILING_NUMBER_PATTERN = re.compile(r"^\d{1,4}\s+|[\s-]+(page\s*)?\d{1,4}$")
+NAV_SEPARATOR_PATTERN = re.compile(r"\s*[|•·»]\s*")
+TABLE_ROW_PATTERN = re.compile(r"^\|.*\|$")
+
+# Pages are separated by form feeds, see `components.pdf.extract_text`. Headers,
+# footers and page numbers are only looked for in the first and last lines of
+# each page, so body text that happens to look like them is kept.
+PAGE_BREAK = "\f"
+EDGE_LINES = 3
+# Edge lines repeated on at least this many pages are running headers or footers.
+MIN_REPEATS = 3
+MAX_REPEATED_LINE_LENGTH = 80
+
+
+@dataclass
+class PreprocessResult:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    truncated: bool = False
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _line_key(line: str) -> str:
+    # Running headers differ only by their page number, e.g. "12 Book Title".
+    return LEADING_TRAILING_NUMBER_PATTERN.sub("", line.strip().lower())
+
+
+def _is_nav_line(line: str, edge: bool) -> bool:
+    if TABLE_ROW_PATTERN.match(line):
+        return False
+    # "A | B | C" may be a table row without borders; only a menu at a page edge.
+    separators = NAV_SEPARATOR_PATTERN.pattern if edge else r"\s*[•·»]\s*"
+    items = [item for item in re.split(separators, line) if item]
+    return len(items) >= 3 and all(len(item.split()) <= 3 for item in items)
+
+
+def _edge_lines(lines: List[str]) -> Set[int]:
+    """Return the indexes of the first and last non-blank lines of a page."""
+    indexes = [i for i, line in enumerate(lines) if line.strip()]
+    return set(indexes[:EDGE_LINES] + indexes[-EDGE_LINES:])
+
+
+def clean_lines(text: str) -> str:
+    """
+    Remove boilerplate and repeated lines from a text.
+
+    Drops cookie/copyright/sign-in lines and menus anywhere, and page numbers
+    and short lines repeated at the top or bottom of many pages (PDF headers and
+    footers), keeping the first occurrence of a repeated line. Other lines are
+    kept even when they look like a page number or repeat, e.g. a year or a list
+    of identical answers.
+
+    Args:
+        text (str): The text to clean, with pages separated by form feeds.
+
+    Returns:
+        str: The cleaned text.
+    """
+    pages = [page.splitlines() for page in text.split(PAGE_BREAK)]
+    # A text without page breaks, e.g. a webpage or transcript, has no headers.
+    edges = [_edge_lines(lines) if len(pages) > 1 else set() for lines in pages]
+    counts = Counter(
+        key
+        for lines, page_edges in zip(pages, edges)
+        for key in {
+            _line_key(lines[i])
+            for i in page_edges
+            if len(lines[i].strip()) <= MAX_REPEATED_LINE_LENGTH
+        }
+    )
+
+    kept: List[str] = []
+    seen_repeated = set()
+    for lines, page_edges in zip(pages, edges):
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if not stripped:
+                if kept and kept[-1] != "":
+                    kept.append("")
+                continue
+            edge = i in page_edges
+            if BOILERPLATE_PATTERN.match(stripped) or _is_nav_line(stripped, edge):
+                continue
+            if edge:
+                if PAGE_NUMBER_PATTERN.match(stripped):
+                    continue
+                key = _line_key(stripped)
+                if counts.get(key, 0) >= MIN_REPEATS:
+                    if key in seen_repeated:
+                        continue
+                    seen_repeated.add(key)
+            kept.append(line.rstrip())
+
+    return "\n".join(kept).strip()
+
+
+def truncate_to_budget(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """Cut a text to at most `max_tokens` tokens, at a line break when possible."""
+    tokens = count_tokens(text, model_name)
+    while tokens > max_tokens:
+        text = text[: int(len(text) * max_tokens / tokens * 0.98)]
+        line_break = text.rfind("\n")
+        if line_break > len(text) // 2:
+            text = text[:line_break]
+        tokens = count_tokens(text, model_name)
+
+    return text
+
+
+def preprocess(
+    text: str, model_name: Optional[str] = None, max_tokens: Optional[int] = None
+) -> PreprocessResult:
+    """
+    Prepare a text for an LLM call: remove boilerplate and repeated lines, then
+    enforce the token budget.
+
+    Args:
+        text (str): The raw text, e.g. a webpage, transcript or PDF.
+        model_name (Optional[str]): The model the text is sent to, used to count tokens.
+        max_tokens (Optional[int]): The token budget, None for no limit.
+
+    Returns:
+        PreprocessResult: The cleaned text and its token counts before and after.
+    """
+    tokens_before = count_tokens(text, model_name)
+    cleaned = clean_lines(text)
+    truncated = False
+    if max_tokens is not None and count_tokens(cleaned, model_name) > max_tokens:
+        cleaned = truncate_to_budget(cleaned, max_tokens, model_name)
+        truncated = True
+
+    return PreprocessResult(
+        text=cleaned,
+        tokens_before=tokens_before,
+        tokens_after=count_tokens(cleaned, model_name),
+        truncated=truncated,
+    )
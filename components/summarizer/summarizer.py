@@ -1,11 +1,44 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from loguru import logger
+
+from components.cache import BaseCache, SemanticCache, make_key, normalize_text
+from components.metrics import Span, tracer
+from resources.prompts import get_combine_summaries_prompt
+
+from .chunking import group_stable, group_texts, split_text_stable
+from .preprocess import preprocess
+from .tokens import count_tokens, default_chunk_tokens, estimate_tokens, get_model_name
+from .transcripts import TranscriptStore
+from .utils import DocText, fetch_doc, get_youtube_subtitle_string
+
+# Fetched webpages are cached briefly only, so changed pages are picked up.
+DOC_CACHE_TTL = 600
 
-from .utils import get_doc_string, get_youtube_subtitle_string
+
+class ChapterSummary(NamedTuple):
+    index: int
+    title: str
+    summary: Optional[str]
+    error: Optional[str] = None
 
 
 class Summarizer:
-    def __init__(self, llm, system_prompt: str, language: str):
+    def __init__(
+        self,
+        llm,
+        system_prompt: str,
+        language: str,
+        chunk_tokens: Optional[int] = None,
+        max_concurrency: int = 4,
+        cache: Optional[BaseCache] = None,
+        max_input_tokens: Optional[int] = None,
+        similar: Optional[SemanticCache] = None,
+    ):
         """
         Initialize the summarizer with the given language model.
 
@@ -13,9 +46,33 @@ class Summarizer:
             llm: The language model used for summarizing.
             system_prompt: The system prompt to use for summarizing.
             language: The language to use for summarizing.
+            chunk_tokens: The token budget of a single LLM call. Longer texts are
+                summarized chunk by chunk and the partial summaries are combined.
+                Defaults to a budget based on the context window of the model.
+            max_concurrency: The maximum number of chunks summarized in parallel.
+            cache: The cache for fetched texts and summaries. Summaries are keyed
+                by the input text, system prompt, model name and language. The
+                partial summaries of long texts are cached chunk by chunk, so
+                re-summarizing an edited text only sends the changed chunks.
+            max_input_tokens: The token budget of the whole input after boilerplate
+                removal; longer inputs are truncated. None for no limit.
+            similar: The near-duplicate index of summarized texts. A text similar
+                enough to one summarized before with the same prompt, model and
+                language gets its cached summary. Requires `cache`.
         """
         self.language = language
         self.llm = llm
+        self.system_prompt = system_prompt
+        self.chunk_tokens = chunk_tokens or default_chunk_tokens(llm)
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.max_input_tokens = max_input_tokens
+        self.model_name = get_model_name(llm)
+        self.similar = similar if cache is not None else None
+        self.similarity_scope = make_key(
+            "summary", system_prompt, self.model_name, language
+        )
+        self.transcripts = TranscriptStore(cache) if cache is not None else None
 
         prompt = ChatPromptTemplate.from_messages(
             [
@@ -23,9 +80,16 @@ class Summarizer:
                 ("human", "{input}"),
             ]
         )
+        combine_prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", system_prompt),
+                ("human", get_combine_summaries_prompt()),
+            ]
+        )
 
         parser = StrOutputParser()
         self.youtube_chain = prompt | llm | parser
+        self.combine_chain = combine_prompt | llm | parser
 
     def get_subtitles(self, video_url: str) -> str:
         """
@@ -37,23 +101,290 @@ class Summarizer:
         Returns:
             str: The subtitles of the video.
         """
-        return get_youtube_subtitle_string(video_url)
+        with tracer.span("fetch_subtitles"):
+            if self.transcripts is None:
+                return get_youtube_subtitle_string(video_url)
+            return self.transcripts.get_transcript(video_url)
+
+    def fetch_doc(self, text: str) -> DocText:
+        """
+        Get the text of a document or URL(s), and the URLs that couldn't be
+        fetched. Texts with failed URLs aren't cached, so they're retried.
+        """
+        with tracer.span("fetch_doc") as span:
+            key = make_key("doc", normalize_text(text))
+            if self.cache is None:
+                return fetch_doc(text)
+            cached = self.cache.get(key)
+            span.set(cache_hit=cached is not None)
+            if cached is not None:
+                logger.info(f"Cache hit: {key}")
+                return DocText(cached, [])
+            doc = fetch_doc(text)
+            if doc.text and not doc.failed:
+                self.cache.set(key, doc.text, ttl=DOC_CACHE_TTL)
+            return doc
+
+    def summary_key(self, text: str, namespace: str = "summary") -> str:
+        """Return the cache key of the summary of a text."""
+        return make_key(
+            namespace,
+            normalize_text(text),
+            self.system_prompt,
+            self.model_name,
+            self.language,
+        )
+
+    def _cached(self, span: Span, key: str, compute, ttl: Optional[float] = None):
+        if self.cache is None:
+            return compute()
+        value = self.cache.get(key)
+        span.set(cache_hit=value is not None)
+        if value is not None:
+            logger.info(f"Cache hit: {key}")
+            return value
+        value = compute()
+        if value:
+            self.cache.set(key, value, ttl=ttl)
+        return value
 
-    def get_doc_string(self, text: str) -> str:
-        """Get text from a document/url(s)."""
-        return get_doc_string(text)
+    def _near_duplicate(self, text: str, span: Span) -> Optional[str]:
+        """Return the cached summary of a near-duplicate of a text, if any."""
+        if self.similar is None:
+            return None
+        key = self.similar.lookup(text, self.similarity_scope)
+        summary = self.cache.get(key) if key is not None else None
+        if summary is not None:
+            logger.info(f"Near-duplicate cache hit: {key}")
+            span.set(cache_hit=True)
+        return summary
+
+    def _remember(self, text: str, key: str) -> None:
+        """Index a text whose summary was just cached under `key`."""
+        if self.similar is not None:
+            self.similar.add(text, self.similarity_scope, key)
+
+    def _cached_batch(self, chain, texts: List[str], namespace: str) -> List[str]:
+        """Run a chain on many texts, sending only the texts without a cached result."""
+        if self.cache is None:
+            return chain.batch(
+                [{"input": text} for text in texts],
+                config={"max_concurrency": self.max_concurrency},
+            )
+
+        keys = [self.summary_key(text, namespace) for text in texts]
+        results: Dict[str, str] = {}
+        for key in keys:
+            if key not in results:
+                value = self.cache.get(key)
+                if value is not None:
+                    results[key] = value
+        missing = {key: text for key, text in zip(keys, texts) if key not in results}
+        logger.info(f"{len(texts) - len(missing)}/{len(texts)} {namespace} results cached")
+        if missing:
+            outputs = chain.batch(
+                [{"input": text} for text in missing.values()],
+                config={"max_concurrency": self.max_concurrency},
+            )
+            for key, output in zip(missing, outputs):
+                results[key] = output
+                if output:
+                    self.cache.set(key, output)
+        return [results[key] for key in keys]
 
     def summarize(self, text: str) -> str:
         """
         Summarize the subtitles of a YouTube video.
 
+        Texts longer than `chunk_tokens` are split into chunks which are
+        summarized in parallel, then combined (map-reduce).
+
         Args:
             text (str): The text to summarize.
 
         Returns:
             str: The summary of the video subtitles.
         """
-        input_data = {"input": text}
-        summary = self.youtube_chain.invoke(input_data)
+        with tracer.span("summarize") as span:
+            key = self.summary_key(text)
+            return self._cached(
+                span, key, lambda: self._summarize_new(text, key, span)
+            )
 
+    def _summarize_new(self, text: str, key: str, span: Span) -> str:
+        summary = self._near_duplicate(text, span)
+        if summary is None:
+            summary = self._summarize(text, span)
+            if summary:
+                self._remember(text, key)
         return summary
+
+    def stream(self, text: str) -> Iterator[str]:
+        """
+        Summarize a text, yielding the summary token by token as it is generated.
+
+        For texts longer than `chunk_tokens`, the chunks are summarized first and
+        only the final combine step is streamed.
+
+        Args:
+            text (str): The text to summarize.
+
+        Yields:
+            str: The next piece of the summary.
+        """
+        with tracer.span("summarize_stream") as span:
+            key = self.summary_key(text)
+            if self.cache is not None:
+                summary = self.cache.get(key)
+                span.set(cache_hit=summary is not None)
+                if summary is not None:
+                    yield summary
+                    return
+                summary = self._near_duplicate(text, span)
+                if summary is not None:
+                    self.cache.set(key, summary)
+                    yield summary
+                    return
+
+            parts = []
+            for part in self._stream(text, span):
+                parts.append(part)
+                yield part
+
+            summary = "".join(parts)
+            span.set(output_tokens=count_tokens(summary, self.model_name))
+            if self.cache is not None and summary:
+                self.cache.set(key, summary)
+                self._remember(text, key)
+
+    def summarize_chapters(
+        self, chapters: Sequence[Tuple[str, str]]
+    ) -> Iterator[ChapterSummary]:
+        """
+        Summarize the chapters of a book in parallel, yielding each summary as
+        soon as it's done, so not necessarily in order.
+
+        Each chapter is summarized and cached on its own: summarizing the book
+        again only sends the chapters that changed or failed.
+
+        Args:
+            chapters (Sequence[Tuple[str, str]]): The title and text of each chapter.
+
+        Yields:
+            ChapterSummary: The summary of the next finished chapter, or the error
+                it failed with.
+        """
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="chapter"
+        ) as executor:
+            futures = {}
+            for index, (title, text) in enumerate(chapters):
+                text = f"{title}\n\n{text}" if title else text
+                # Copy the context of each task, so spans nest under the caller's.
+                context = contextvars.copy_context()
+                future = executor.submit(context.run, self.summarize, text)
+                futures[future] = (index, title)
+            for future in as_completed(futures):
+                index, title = futures[future]
+                try:
+                    yield ChapterSummary(index, title, future.result())
+                except Exception as e:
+                    logger.warning(f"Failed to summarize chapter {title!r}: {e}")
+                    yield ChapterSummary(index, title, None, str(e))
+
+    def _prepare(self, text: str, span: Span) -> str:
+        result = preprocess(text, self.model_name, self.max_input_tokens)
+        logger.info(
+            f"Input tokens: {result.tokens_before} -> {result.tokens_after}"
+            f" ({result.tokens_saved} saved{', truncated' if result.truncated else ''})"
+        )
+        span.set(input_tokens=result.tokens_after)
+        return result.text
+
+    def _stream(self, text: str, span: Span) -> Iterator[str]:
+        text = self._prepare(text, span)
+        if estimate_tokens(text) <= self.chunk_tokens:
+            yield from self.youtube_chain.stream({"input": text})
+            return
+
+        summaries = self.map_chunks(split_text_stable(text, self.chunk_tokens))
+        summaries = self._reduce_to_one_group(summaries)
+        if len(summaries) == 1:
+            yield summaries[0]
+            return
+
+        combined = "\n\n".join(summaries)
+        key = self.summary_key(combined, "combine")
+        if self.cache is not None:
+            summary = self.cache.get(key)
+            if summary is not None:
+                yield summary
+                return
+
+        parts = []
+        for part in self.combine_chain.stream({"input": combined}):
+            parts.append(part)
+            yield part
+        if self.cache is not None and parts:
+            self.cache.set(key, "".join(parts))
+
+    def _summarize(self, text: str, span: Span) -> str:
+        text = self._prepare(text, span)
+        if estimate_tokens(text) <= self.chunk_tokens:
+            input_data = {"input": text}
+            summary = self.youtube_chain.invoke(input_data)
+        else:
+            summaries = self.map_chunks(split_text_stable(text, self.chunk_tokens))
+            summary = self.reduce_summaries(summaries)
+
+        span.set(output_tokens=count_tokens(summary, self.model_name))
+        return summary
+
+    def map_chunks(self, chunks: List[str]) -> List[str]:
+        """
+        Summarize each chunk of a long text, in parallel. Chunks summarized
+        before are taken from the cache.
+
+        Args:
+            chunks (List[str]): The chunks to summarize.
+
+        Returns:
+            List[str]: The summaries of the chunks, in the same order.
+        """
+        logger.info(f"Summarizing {len(chunks)} chunks")
+        with tracer.span("summarize_map"):
+            return self._cached_batch(self.youtube_chain, chunks, "chunk_summary")
+
+    def reduce_summaries(self, summaries: List[str]) -> str:
+        """
+        Combine partial summaries hierarchically until one summary remains.
+
+        Args:
+            summaries (List[str]): The partial summaries, in order.
+
+        Returns:
+            str: The combined summary.
+        """
+        summaries = self._reduce_to_one_group(summaries)
+        if len(summaries) == 1:
+            return summaries[0]
+
+        return self._cached_batch(
+            self.combine_chain, ["\n\n".join(summaries)], "combine"
+        )[0]
+
+    def _reduce_to_one_group(self, summaries: List[str]) -> List[str]:
+        """Combine summaries until the rest fits in a single combine call."""
+        while True:
+            if len(group_texts(summaries, self.chunk_tokens)) == 1:
+                return summaries
+            groups = group_stable(summaries, self.chunk_tokens)
+            if len(groups) >= len(summaries):
+                # Every summary fills the budget on its own, combine them pairwise.
+                groups = [
+                    "\n\n".join(summaries[i : i + 2])
+                    for i in range(0, len(summaries), 2)
+                ]
+            logger.info(f"Combining {len(summaries)} summaries into {len(groups)}")
+            with tracer.span("summarize_reduce"):
+                summaries = self._cached_batch(self.combine_chain, groups, "combine")
@@ -0,0 +1,101 @@
+import re
+from functools import lru_cache
+from typing import Any, Optional
+
+from loguru import logger
+
+# Rough context windows (in tokens) of the models offered in the sidebar.
+CONTEXT_WINDOWS = {
+    "gemini-1.5-flash": 1_000_000,
+    "gemini-1.5-pro": 2_000_000,
+    "yi-large": 32_768,
+    "llama3-70b-8192": 8_192,
+    "mixtral-8x7b-32768": 32_768,
+}
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+# Upper bound for a single map chunk, so long inputs are still split into
+# several pieces that can be summarized in parallel.
+MAX_CHUNK_TOKENS = 32_000
+
+CHARS_PER_TOKEN = 4
+
+# Chinese, Japanese and Korean characters are usually one token each.
+CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+# Tokenizer used to count tokens for OpenAI-compatible providers (Yi, Groq).
+# Gemini has no local tokenizer, so its tokens are estimated.
+TIKTOKEN_ENCODING = "cl100k_base"
+
+
+def get_model_name(llm: Any) -> str:
+    """Return the model name of a chat model, or its class name if unknown."""
+    name = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    if not name:
+        return type(llm).__name__
+    return str(name).split("/")[-1]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text: one per CJK character and about
+    one per 4 other characters.
+    """
+    cjk = len(CJK_PATTERN.findall(text)) if not text.isascii() else 0
+    return cjk + (len(text) - cjk + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str) -> Optional[Any]:
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # tiktoken is missing or can't download its vocabulary (e.g. offline).
+        logger.warning(f"Falling back to estimated token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """
+    Count the tokens of a text for the given model.
+
+    Uses tiktoken for OpenAI-compatible models when available, and the
+    character-based estimate otherwise.
+
+    Args:
+        text (str): The text to count.
+        model_name (Optional[str]): The name of the model.
+
+    Returns:
+        int: The number of tokens.
+    """
+    if model_name and not model_name.startswith("gemini"):
+        encoding = _get_encoding(TIKTOKEN_ENCODING)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+
+    return estimate_tokens(text)
+
+
+def get_context_window(model_name: str) -> int:
+    """Return the context window of a model, matching on the name prefix."""
+    for prefix, window in CONTEXT_WINDOWS.items():
+        if model_name.startswith(prefix):
+            return window
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def default_chunk_tokens(llm: Any) -> int:
+    """
+    Return the token budget of a single chunk for the given model.
+
+    Half of the context window is kept for the system prompt and the answer.
+    For a router over several models, the smallest context window is used.
+    """
+    backends = getattr(llm, "backends", None)
+    if backends:
+        return min(default_chunk_tokens(backend) for backend in backends.values())
+    window = get_context_window(get_model_name(llm))
+    return min(window // 2, MAX_CHUNK_TOKENS)
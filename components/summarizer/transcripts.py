@@ -0,0 +1,165 @@
+import re
+import threading
+from typing import Any, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from loguru import logger
+from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api._errors import NoTranscriptFound, TranscriptsDisabled
+
+from components.cache import BaseCache, LRUCache, make_key
+
+LANGUAGES = ["en", "en-US", "en-UK", "en-GB", "vi", "ja", "ko", "zh-Hans", "zh-Hant"]
+
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+YOUTUBE_HOSTS = ("youtube.com", "youtube-nocookie.com")
+PATH_PREFIXES = ("shorts", "embed", "live", "v", "e")
+
+
+def extract_video_id(video_url: str) -> Optional[str]:
+    """
+    Return the video ID of a YouTube URL, so all variants of a URL map to one key.
+
+    Handles watch URLs (with extra parameters such as `&t=`), youtu.be links,
+    shorts, embeds, live streams, mobile/music hosts and bare video IDs.
+
+    Args:
+        video_url (str): The URL or ID of the YouTube video.
+
+    Returns:
+        Optional[str]: The 11-character video ID, or None if none is found.
+    """
+    video_url = video_url.strip()
+    if VIDEO_ID_PATTERN.match(video_url):
+        return video_url
+    if "://" not in video_url:
+        video_url = "https://" + video_url
+
+    parts = urlsplit(video_url)
+    host = parts.netloc.lower().split(":")[0]
+    segments = [segment for segment in parts.path.split("/") if segment]
+    candidate = None
+    if host == "youtu.be" or host.endswith(".youtu.be"):
+        candidate = segments[0] if segments else None
+    elif any(host == h or host.endswith("." + h) for h in YOUTUBE_HOSTS):
+        if segments and segments[0] in PATH_PREFIXES and len(segments) > 1:
+            candidate = segments[1]
+        else:
+            candidate = parse_qs(parts.query).get("v", [None])[0]
+
+    if candidate and VIDEO_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+
+
+def _list_transcripts(video_id: str) -> Any:
+    # youtube-transcript-api < 1.0 has a static `list_transcripts`, later versions `list`.
+    if hasattr(YouTubeTranscriptApi, "list_transcripts"):
+        return YouTubeTranscriptApi.list_transcripts(video_id)
+    return YouTubeTranscriptApi().list(video_id)
+
+
+def _transcript_text(transcript: Any) -> str:
+    fetched = transcript.fetch()
+    pieces = fetched.to_raw_data() if hasattr(fetched, "to_raw_data") else fetched
+    texts = []
+    for piece in pieces:
+        text = piece["text"].strip(" ")
+        # Auto-generated captions often repeat the previous caption line.
+        if not texts or text != texts[-1]:
+            texts.append(text)
+    return " ".join(texts)
+
+
+class TranscriptStore:
+    def __init__(
+        self,
+        cache: Optional[BaseCache] = None,
+        languages: Optional[List[str]] = None,
+        ttl: Optional[float] = None,
+        negative_ttl: float = 3600,
+    ) -> None:
+        """
+        Initialize a store of YouTube transcripts keyed by video ID.
+
+        The store caches the transcript with the languages available for the
+        video, and also caches videos without transcripts, so repeated and
+        near-duplicate URLs don't hit YouTube again.
+
+        Args:
+            cache (Optional[BaseCache]): The cache to store transcripts in. Defaults to an in-process LRU.
+            languages (Optional[List[str]]): The preferred transcript languages, in order.
+            ttl (Optional[float]): The time-to-live of transcripts in seconds, None for the cache default.
+            negative_ttl (float): The time-to-live of "no transcript" results, in seconds.
+        """
+        self.cache = cache if cache is not None else LRUCache(max_entries=1024)
+        self.languages = languages or LANGUAGES
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    def get_entry(self, video_url: str) -> dict:
+        """
+        Return the cached or fetched transcript entry of a video.
+
+        Args:
+            video_url (str): The URL or ID of the YouTube video.
+
+        Returns:
+            dict: The `text`, its `language` and the `available_languages` of the video;
+                `text` is empty if the video has no usable transcript.
+        """
+        video_id = extract_video_id(video_url)
+        if video_id is None:
+            return {"text": "", "language": None, "available_languages": []}
+
+        key = make_key("transcript", video_id)
+        entry = self.cache.get(key)
+        if entry is not None:
+            logger.info(f"Transcript cache hit: {video_id}")
+            return entry
+
+        entry = self._fetch(video_id)
+        ttl = self.ttl if entry["text"] else self.negative_ttl
+        self.cache.set(key, entry, ttl=ttl)
+        return entry
+
+    def get_transcript(self, video_url: str) -> str:
+        """Return the transcript of a video, or an empty string if there is none."""
+        return self.get_entry(video_url)["text"]
+
+    def _fetch(self, video_id: str) -> dict:
+        try:
+            transcript_list = _list_transcripts(video_id)
+        except TranscriptsDisabled:
+            return {"text": "", "language": None, "available_languages": []}
+
+        transcripts = list(transcript_list)
+        available = [transcript.language_code for transcript in transcripts]
+        try:
+            transcript = transcript_list.find_transcript(self.languages)
+        except NoTranscriptFound:
+            if not transcripts:
+                return {"text": "", "language": None, "available_languages": []}
+            # None of the preferred languages: fall back to a manual transcript if any.
+            transcripts.sort(key=lambda t: t.is_generated)
+            transcript = transcripts[0]
+
+        logger.info(f"Fetched {transcript.language_code} transcript of {video_id}")
+        return {
+            "text": _transcript_text(transcript),
+            "language": transcript.language_code,
+            "available_languages": available,
+        }
+
+
+_default_store: Optional[TranscriptStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> TranscriptStore:
+    """Return the process-wide transcript store backed by an in-process LRU."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TranscriptStore()
+        return _default_store
@@ -1,10 +1,11 @@
 import re
-from typing import Optional
+from typing import List, NamedTuple, Optional
 
 import validators
-from langchain_community.document_loaders import WebBaseLoader, YoutubeLoader
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import NoTranscriptFound, TranscriptsDisabled
+from loguru import logger
+
+from .fetch import FetchResult, get_fetcher
+from .transcripts import get_transcript_store
 
 
 def get_youtube_subtitle_string(video_url: str) -> str:
@@ -13,16 +14,7 @@ def get_youtube_subtitle_string(video_url: str) -> str:
     Args:
         video_url (str): The URL of the YouTube video.
     """
-    try:
-        loader = YoutubeLoader.from_youtube_url(
-            video_url,
-            language=["en", "en-US", "en-UK", "en-GB", "vi", "ja", "ko", "zh-Hans","zh-Hant"],
-        )
-        transcript = loader.load()[0].page_content
-
-        return transcript
-    except (NoTranscriptFound, TranscriptsDisabled):
-        return ""
+    return get_transcript_store().get_transcript(video_url)
 
 
 def check_input_type(input_str):
@@ -42,16 +34,34 @@ def check_input_type(input_str):
     return input_str, "text"
 
 
-def get_doc_string(input_str):
+class DocText(NamedTuple):
+    text: str
+    failed: List[FetchResult]  # The URLs that couldn't be fetched, with their error
+
+
+def fetch_doc(input_str: str) -> DocText:
+    """
+    Get the text of a document, or of the webpage(s) at the given URL(s).
+
+    Args:
+        input_str (str): The text, or one URL per line.
+
+    Returns:
+        DocText: The text of the pages fetched, and the failed fetches.
+    """
     res, input_type = check_input_type(input_str)
+    if input_type == "text":
+        return DocText(res, [])
+
+    results = get_fetcher().fetch_all([res] if input_type == "url" else res)
+    failed = [result for result in results if not result.ok]
+    if failed:
+        logger.warning(
+            f"Failed to fetch {len(failed)}/{len(results)} URLs: "
+            f"{[result.url for result in failed]}"
+        )
+    return DocText("\n\n".join(result.text for result in results if result.ok), failed)
 
-    if input_type == "url":
-        loader = WebBaseLoader(res)
-        docs = loader.load()
-        res = docs[0].page_content
-    elif input_type == "urls":
-        loader = WebBaseLoader(res)
-        docs = loader.load()
-        res = "\n\n".join([doc.page_content for doc in docs])
 
-    return res
+def get_doc_string(input_str):
+    return fetch_doc(input_str).text
@@ -1,5 +1,5 @@
 import os
-from typing import Union
+from typing import Optional, Union
 
 from pydantic_settings import BaseSettings
 
@@ -19,6 +19,35 @@ class Base(BaseSettings):
     GROQ_API_KEY: str
     GROQ_BASE_URL: str
 
+    CACHE_DIR: str = ".cache"
+    CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_MEMORY_ENTRIES: int = 256
+    # Minimum similarity (0-1) of a text to one summarized before to reuse its
+    # summary; None to only reuse summaries of identical texts.
+    SEMANTIC_CACHE_THRESHOLD: Optional[float] = 0.9
+
+    METRICS_PORT: Optional[int] = None
+    METRICS_FILE: Optional[str] = None
+    DEBUG_PANEL: bool = False
+
+    JOB_WORKERS: int = 4
+    # Finished jobs are deleted from the job history after this time.
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+    # Job results are shared by all sessions and processes: in a SQLite file in
+    # CACHE_DIR by default, or on a Redis server, e.g. redis://localhost:6379/0.
+    RESULT_STORE_URL: Optional[str] = None
+    RESULT_TTL_SECONDS: int = 24 * 3600
+    # Webpages may change, so their summaries are shared for a short time only.
+    WEBPAGE_RESULT_TTL_SECONDS: int = 600
+    # A job's lease is renewed while it runs; this is how long the lease of a
+    # process that died blocks the other processes.
+    RESULT_LEASE_SECONDS: int = 60
+
+    MERMAID_SERVER_RENDER: bool = True
+    MERMAID_CLI: Optional[str] = None
+    MERMAID_PUPPETEER_CONFIG: Optional[str] = None
+
     class Config:
         case_sensitive = True
 
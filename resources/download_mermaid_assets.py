@@ -0,0 +1,36 @@
+import os
+
+import requests
+
+MERMAID_VERSION = "10.9.1"
+FONT_AWESOME_VERSION = "5.15.1"
+
+MERMAID_URL = f"https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js"
+FONT_AWESOME_URL = (
+    f"https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{FONT_AWESOME_VERSION}"
+)
+FONT_AWESOME_FILES = ["css/all.min.css"] + [
+    f"webfonts/{font}.{extension}"
+    for font in ("fa-brands-400", "fa-regular-400", "fa-solid-900")
+    for extension in ("eot", "svg", "ttf", "woff", "woff2")
+]
+
+
+def download(url: str, path: str) -> None:
+    response = requests.get(url)
+    if response.status_code != 200:
+        raise Exception(f"Failed to download file from {url}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(response.content)
+
+
+def download_mermaid_assets():
+    """Vendor mermaid.js and Font Awesome into static/, for deployments without internet access."""
+    download(MERMAID_URL, "static/mermaid/mermaid.min.js")
+    for file in FONT_AWESOME_FILES:
+        download(f"{FONT_AWESOME_URL}/{file}", f"static/fontawesome/{file}")
+
+
+if __name__ == "__main__":
+    download_mermaid_assets()
@@ -41,3 +41,14 @@ def get_webpage_summary_prompt(language: str) -> str:
         f" Use {language} language to summarize."
         "\n\n"
     )
+
+
+def get_combine_summaries_prompt() -> str:
+    """Return the human prompt for combining partial summaries into one."""
+    return (
+        "The following are summaries of consecutive parts of a longer text, in order."
+        " Combine them into a single summary of the whole text,"
+        " following the same instructions and keeping the original order of the content."
+        "\n\n"
+        "{input}"
+    )
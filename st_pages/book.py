@@ -1,53 +1,112 @@
-import fitz
 import streamlit as st
 
-from components.mermaid import show_diagram
-from components.summarizer import Summarizer
+from components.cache import hash_bytes, make_key
+from components.jobs.panel import poll_job
+from components.mermaid import render_diagram
 from resources.prompts import get_book_system_prompt
+from utils import (
+    get_cache,
+    get_diagram_generator,
+    get_diagram_renderer,
+    get_job_queue,
+    get_pipeline,
+    get_summarizer,
+    store_summary_result,
+    submit_book_job,
+    submit_diagram_job,
+    submit_pipeline_job,
+    submit_summary_job,
+)
 
 
-def extract_text_from_pdf(pdf_file):
-    """Extract text from a PDF file."""
-    full_text = ""
-    with fitz.open(stream=pdf_file.read(), filetype="pdf") as pdf_doc:
-        for page_num in range(len(pdf_doc)):
-            page = pdf_doc.load_page(page_num)
-            full_text += page.get_text()
+def load_chapters(pdf_file, doc_hash):
+    """Return the chapters of a PDF file, extracted once per file."""
+    # PyMuPDF is only loaded once a PDF is uploaded.
+    from components.pdf import Chapter, spooled_pdf, split_chapters
 
-    return full_text
+    def extract():
+        with spooled_pdf(pdf_file) as path:
+            return split_chapters(path)
+
+    chapters = get_cache().get_or_set(make_key("pdf_chapters", doc_hash), extract)
+    return [Chapter(*chapter) for chapter in chapters]
+
+
+def submit_book(chapters):
+    """Summarize a book chapter by chapter, or as a whole if it has no chapters."""
+    summarizer = get_summarizer(provider, model_name, system_prompt, language)
+    if len(chapters) > 1:
+        generator = None
+        if st.session_state.auto_diagram:
+            generator = get_diagram_generator(provider, model_name, language)
+        return submit_book_job(summarizer, doc_hash, chapters, generator)
+
+    def get_text(text=chapters[0].text):
+        return text
+
+    if st.session_state.auto_diagram:
+        pipeline = get_pipeline(provider, model_name, system_prompt, language)
+        return submit_pipeline_job(pipeline, doc_hash, get_text)
+    return submit_summary_job(summarizer, doc_hash, get_text)
+
+
+def store_book_result(result):
+    """Store the result of a book job, and the chapters that failed."""
+    store_summary_result("book_summary", "book_diagram")(result)
+    if isinstance(result, dict) and result.get("failed"):
+        st.session_state.book_failed = result["failed"]
 
 
 st.header("Book Summary")
-llm = st.session_state.llm
+provider = st.session_state.model_provider
+model_name = st.session_state.model_name
 language = st.session_state.language
 system_prompt = get_book_system_prompt(language)
-summarizer = Summarizer(llm=llm, system_prompt=system_prompt, language=language)
+queue = get_job_queue()
 
 doc = st.file_uploader("Upload PDF", accept_multiple_files=False, type="pdf")
 
-full_text = ""
+chapters = []
+doc_hash = ""
 if doc:
-    full_text = extract_text_from_pdf(doc)
-
-if st.button("Summarize", key="summarize_book"):
-    if "book_summary" in st.session_state:
-        del st.session_state["book_summary"]
-    with st.spinner("Summarizing..."):
-        if not full_text:
-            st.warning("Can't extract text from PDF.")
-        else:
-            summary = summarizer.summarize(full_text)
-            st.session_state.book_summary = summary
+    doc_hash = hash_bytes(doc.getvalue())
+    chapters = load_chapters(doc, doc_hash)
+    if len(chapters) > 1:
+        st.caption(f"{len(chapters)} chapters found, summarized in parallel.")
 
-if "book_summary" in st.session_state:
+retry = False
+if st.session_state.get("book_failed") and "book_job" not in st.session_state:
+    failed = st.session_state.book_failed
+    st.warning(f"{len(failed)} chapter(s) couldn't be summarized: {', '.join(failed)}")
+    retry = st.button("Retry failed chapters", key="retry_book_chapters")
+
+if st.button("Summarize", key="summarize_book") or retry:
+    for key in ("book_summary", "book_diagram", "book_failed"):
+        st.session_state.pop(key, None)
+    if not chapters:
+        st.warning("Can't extract text from PDF.")
+    else:
+        st.session_state.book_job = submit_book(chapters)
+
+if "book_job" in st.session_state or "book_summary" in st.session_state:
     st.subheader("Summary")
+poll_job(
+    queue,
+    "book_job",
+    "book_summary",
+    interval=0.5,
+    on_done=store_book_result,
+)
+
+if "book_summary" in st.session_state:
     st.write(st.session_state.book_summary)
 
     st.subheader("Diagram")
     if st.button("Generate Diagram", key="book_generate_diagram"):
-        with st.spinner("Generating diagram..."):
-            show_diagram(
-                llm=summarizer.llm,
-                language=summarizer.language,
-                text=st.session_state.book_summary,
-            )
+        st.session_state.pop("book_diagram", None)
+        st.session_state.book_diagram_job = submit_diagram_job(
+            provider, model_name, language, st.session_state.book_summary
+        )
+    poll_job(queue, "book_diagram_job", "book_diagram")
+    if "book_diagram" in st.session_state:
+        render_diagram(st.session_state.book_diagram, get_diagram_renderer())
@@ -1,38 +1,91 @@
 import streamlit as st
 
-from components.mermaid import show_diagram
-from components.summarizer import Summarizer
+from components.jobs.panel import poll_job
+from components.mermaid import render_diagram
+from config import settings
 from resources.prompts import get_webpage_summary_prompt
+from utils import (
+    get_diagram_renderer,
+    get_job_queue,
+    get_pipeline,
+    get_summarizer,
+    store_summary_result,
+    submit_diagram_job,
+    submit_pipeline_job,
+    submit_summary_job,
+)
+
+
+def store_doc_result(result):
+    """Store the result of a summary job, and the URLs that couldn't be fetched."""
+    store_summary_result("doc_summary", "doc_diagram")(result)
+    if isinstance(result, dict) and result.get("failed"):
+        st.session_state.doc_failed = result["failed"]
+
 
 st.header("Document/Webpage Summary")
-llm = st.session_state.llm
+provider = st.session_state.model_provider
+model_name = st.session_state.model_name
 language = st.session_state.language
 system_prompt = get_webpage_summary_prompt(language)
-summarizer = Summarizer(llm=llm, system_prompt=system_prompt, language=language)
+queue = get_job_queue()
 
-text = None
 doc_input = st.text_area("Enter document text or URL(s)")
 if st.button("Summarize", key="summarize_doc"):
-    if "doc_summary" in st.session_state:
-        del st.session_state["doc_summary"]
-    with st.spinner("Summarizing..."):
-        if not doc_input:
-            st.warning("Please enter some text or URL(s) to summarize.")
+    for key in ("doc_summary", "doc_diagram", "doc_failed"):
+        st.session_state.pop(key, None)
+    if not doc_input:
+        st.warning("Please enter some text or URL(s) to summarize.")
+    else:
+        from components.summarizer.utils import check_input_type
+
+        # Webpages change: an edited page is re-summarized (only its changed
+        # chunks), not matched to the summary of its previous version.
+        reuse_similar = check_input_type(doc_input)[1] == "text"
+        summarizer = get_summarizer(
+            provider, model_name, system_prompt, language, reuse_similar
+        )
+
+        def get_text():
+            return summarizer.fetch_doc(doc_input)
+
+        if st.session_state.auto_diagram:
+            pipeline = get_pipeline(
+                provider, model_name, system_prompt, language, reuse_similar
+            )
+            st.session_state.doc_job = submit_pipeline_job(
+                pipeline, doc_input, get_text, ttl=settings.WEBPAGE_RESULT_TTL_SECONDS
+            )
         else:
-            text = summarizer.get_doc_string(doc_input)
-            if text:
-                summary = summarizer.summarize(text)
-                st.session_state.doc_summary = summary
+            st.session_state.doc_job = submit_summary_job(
+                summarizer, doc_input, get_text, ttl=settings.WEBPAGE_RESULT_TTL_SECONDS
+            )
 
-if "doc_summary" in st.session_state:
+if "doc_job" in st.session_state or "doc_summary" in st.session_state:
     st.subheader("Summary")
+poll_job(
+    queue,
+    "doc_job",
+    "doc_summary",
+    interval=0.5,
+    on_done=store_doc_result,
+)
+if st.session_state.get("doc_failed"):
+    failed = st.session_state.doc_failed
+    st.warning(
+        f"{len(failed)} URL(s) couldn't be fetched and are left out of the summary:\n\n"
+        + "\n".join(f"- {error}" for error in failed)
+    )
+
+if "doc_summary" in st.session_state:
     st.write(st.session_state.doc_summary)
 
     st.subheader("Diagram")
     if st.button("Generate Diagram", key="doc_generate_diagram"):
-        with st.spinner("Generating diagram..."):
-            show_diagram(
-                llm=summarizer.llm,
-                language=summarizer.language,
-                text=st.session_state.doc_summary,
-            )
+        st.session_state.pop("doc_diagram", None)
+        st.session_state.doc_diagram_job = submit_diagram_job(
+            provider, model_name, language, st.session_state.doc_summary
+        )
+    poll_job(queue, "doc_diagram_job", "doc_diagram")
+    if "doc_diagram" in st.session_state:
+        render_diagram(st.session_state.doc_diagram, get_diagram_renderer())
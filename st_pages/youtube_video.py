@@ -1,39 +1,63 @@
 import streamlit as st
 
-from components.mermaid import show_diagram
-from components.summarizer import Summarizer
+from components.jobs.panel import poll_job
+from components.mermaid import render_diagram
 from resources.prompts import get_youtube_system_prompt
+from utils import (
+    get_diagram_renderer,
+    get_job_queue,
+    get_pipeline,
+    get_summarizer,
+    store_summary_result,
+    submit_diagram_job,
+    submit_pipeline_job,
+    submit_summary_job,
+)
 
 st.header("YouTube Video Summary")
-llm = st.session_state.llm
+provider = st.session_state.model_provider
+model_name = st.session_state.model_name
 language = st.session_state.language
 system_prompt = get_youtube_system_prompt(language)
-summarizer = Summarizer(llm=llm, system_prompt=system_prompt, language=language)
+queue = get_job_queue()
 
-text = None
 video_url = st.text_input("Enter the YouTube video URL")
 if st.button("Summarize", key="summarize_video"):
-    st.video(data=video_url)
-    if "video_summary" in st.session_state:
-        del st.session_state["video_summary"]
+    for key in ("video_summary", "video_diagram"):
+        st.session_state.pop(key, None)
+    summarizer = get_summarizer(provider, model_name, system_prompt, language)
 
-    with st.spinner("Summarizing..."):
-        text = summarizer.get_subtitles(video_url)
-        if not text:
-            st.warning("No subtitles available for this video.")
-        else:
-            summary = summarizer.summarize(text)
-            st.session_state.video_summary = summary
+    def get_text():
+        return summarizer.get_subtitles(video_url)
 
-if "video_summary" in st.session_state:
+    if st.session_state.auto_diagram:
+        pipeline = get_pipeline(provider, model_name, system_prompt, language)
+        st.session_state.video_job = submit_pipeline_job(pipeline, video_url, get_text)
+    else:
+        st.session_state.video_job = submit_summary_job(summarizer, video_url, get_text)
+
+if video_url and (
+    "video_job" in st.session_state or "video_summary" in st.session_state
+):
+    st.video(data=video_url)
     st.subheader("Summary")
+poll_job(
+    queue,
+    "video_job",
+    "video_summary",
+    interval=0.5,
+    on_done=store_summary_result("video_summary", "video_diagram"),
+)
+
+if "video_summary" in st.session_state:
     st.write(st.session_state.video_summary)
 
     st.subheader("Diagram")
     if st.button("Generate Diagram", key="video_generate_diagram"):
-        with st.spinner("Generating diagram..."):
-            show_diagram(
-                llm=summarizer.llm,
-                language=summarizer.language,
-                text=st.session_state.video_summary,
-            )
+        st.session_state.pop("video_diagram", None)
+        st.session_state.video_diagram_job = submit_diagram_job(
+            provider, model_name, language, st.session_state.video_summary
+        )
+    poll_job(queue, "video_diagram_job", "video_diagram")
+    if "video_diagram" in st.session_state:
+        render_diagram(st.session_state.video_diagram, get_diagram_renderer())
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from components.batch import BatchRunner, ManifestItem, read_manifest
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+class _Summarizer:
+    def __init__(self):
+        self.texts = []
+
+    def summarize(self, text):
+        self.texts.append(text)
+        return f"summary of {text}"
+
+
+def test_read_jsonl_manifest(tmp_path):
+    path = _write(
+        tmp_path,
+        "manifest.jsonl",
+        '{"id": "a", "type": "text", "source": "Some text"}\n'
+        "\n"
+        '{"type": "URL", "source": " https://example.com "}\n',
+    )
+
+    items = read_manifest(path)
+
+    assert items[0] == ManifestItem("a", "text", "Some text")
+    assert (items[1].type, items[1].source) == ("url", "https://example.com")
+    assert items[1].id
+
+
+def test_read_csv_manifest(tmp_path):
+    path = _write(
+        tmp_path, "manifest.csv", "id,type,source\na,text,Some text\n,pdf,book.pdf\n"
+    )
+
+    assert [item.type for item in read_manifest(path)] == ["text", "pdf"]
+
+
+def test_invalid_rows_are_all_reported_up_front(tmp_path):
+    path = _write(
+        tmp_path,
+        "manifest.jsonl",
+        '{"type": "text", "source": "ok"}\n'
+        '{"type": "video", "source": "x"}\n'
+        "not json\n"
+        '{"type": "text"}\n'
+        '["text", "x"]\n',
+    )
+
+    with pytest.raises(ValueError) as error:
+        read_manifest(path)
+
+    message = str(error.value)
+    for line_number in (2, 3, 4, 5):
+        assert f"Line {line_number}:" in message
+    assert "Line 1:" not in message
+
+
+def test_repeated_rows_are_skipped(tmp_path):
+    row = '{"type": "text", "source": "Some text"}\n'
+    other = '{"type": "text", "source": "b"}\n'
+    path = _write(tmp_path, "manifest.jsonl", row + other + row)
+
+    assert [item.source for item in read_manifest(path)] == ["Some text", "b"]
+
+
+def test_id_reused_for_another_source_is_an_error(tmp_path):
+    path = _write(
+        tmp_path,
+        "manifest.jsonl",
+        '{"id": "a", "type": "text", "source": "first"}\n'
+        '{"id": "a", "type": "text", "source": "second"}\n',
+    )
+
+    with pytest.raises(ValueError, match="Line 2: id 'a' is already used on line 1"):
+        read_manifest(path)
+
+
+def test_runner_summarizes_each_id_once_and_resumes(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    summarizer = _Summarizer()
+    runner = BatchRunner(
+        summarizers={"text": summarizer},
+        fetchers={"text": lambda source: source},
+        fetch_workers=2,
+        summarize_workers=2,
+    )
+    items = [
+        ManifestItem("a", "text", "first"),
+        ManifestItem("b", "text", ""),
+        ManifestItem("a", "text", "first"),
+    ]
+
+    stats = runner.run(items, output)
+
+    assert (stats.succeeded, stats.failed, stats.skipped) == (1, 1, 1)
+    assert summarizer.texts == ["first"]
+    with open(output, encoding="utf-8") as file:
+        records = {record["id"]: record for record in map(json.loads, file)}
+    assert records["a"]["summary"] == "summary of first"
+    assert records["b"]["status"] == "error"
+
+    stats = runner.run(items, output)
+
+    assert (stats.succeeded, stats.failed, stats.skipped) == (0, 1, 2)
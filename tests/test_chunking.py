@@ -0,0 +1,115 @@
+import random
+
+from components.summarizer.chunking import (
+    group_stable,
+    group_texts,
+    split_text,
+    split_text_stable,
+)
+from components.summarizer.tokens import (
+    count_tokens,
+    default_chunk_tokens,
+    estimate_tokens,
+)
+
+
+def _paragraphs(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "summary", "chapter", "model"]
+    return [
+        " ".join(rng.choice(words) for _ in range(rng.randint(20, 80))) + "."
+        for _ in range(n)
+    ]
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("日本語") == 3
+
+
+def test_count_tokens_estimates_for_gemini():
+    text = "The quick brown fox jumps over the lazy dog."
+
+    assert count_tokens(text, "gemini-1.5-flash") == estimate_tokens(text)
+
+
+def test_default_chunk_tokens_uses_smallest_router_backend():
+    class Model:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+    class Router:
+        backends = {"a": Model("gemini-1.5-flash"), "b": Model("llama3-70b-8192")}
+
+    assert default_chunk_tokens(Model("llama3-70b-8192")) == 4096
+    assert default_chunk_tokens(Model("gemini-1.5-pro")) == 32_000
+    assert default_chunk_tokens(Router()) == 4096
+
+
+def test_split_text_respects_budget_and_keeps_content():
+    text = "\n\n".join(_paragraphs(50))
+
+    chunks = split_text(text, 200)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert "\n\n".join(chunks).split() == text.split()
+
+
+def test_split_text_cuts_long_words_as_last_resort():
+    chunks = split_text("x" * 1000, 10)
+
+    assert all(estimate_tokens(chunk) <= 10 for chunk in chunks)
+    assert "".join(chunks) == "x" * 1000
+
+
+def test_split_text_short_text_is_one_chunk():
+    assert split_text("A short text.", 100) == ["A short text."]
+
+
+def test_group_texts_packs_greedily():
+    assert group_texts(["a" * 40, "b" * 40, "c" * 40], 25) == [
+        "a" * 40 + "\n\n" + "b" * 40,
+        "c" * 40,
+    ]
+
+
+def test_group_stable_respects_budget():
+    groups = group_stable(_paragraphs(100), 300)
+
+    assert len(groups) > 1
+    assert all(estimate_tokens(group) <= 300 for group in groups)
+
+
+def test_split_text_stable_respects_budget():
+    text = "\n\n".join(_paragraphs(100))
+
+    chunks = split_text_stable(text, 300)
+
+    assert all(estimate_tokens(chunk) <= 300 for chunk in chunks)
+    assert "\n\n".join(chunks).split() == text.split()
+
+
+def test_split_text_stable_keeps_chunks_after_an_edit():
+    paragraphs = _paragraphs(200)
+    edited = ["An inserted paragraph."] + paragraphs
+
+    before = split_text_stable("\n\n".join(paragraphs), 300)
+    after = split_text_stable("\n\n".join(edited), 300)
+
+    assert len(set(before) & set(after)) >= len(before) - 2
+
+
+def test_split_text_stable_keeps_chunks_after_a_change_in_the_middle():
+    paragraphs = _paragraphs(200)
+    edited = paragraphs[:100] + ["A changed paragraph."] + paragraphs[101:]
+
+    before = split_text_stable("\n\n".join(paragraphs), 300)
+    after = split_text_stable("\n\n".join(edited), 300)
+
+    assert before[:3] == after[:3]
+    assert before[-3:] == after[-3:]
+    # The boundaries resynchronize a few chunks after the change.
+    assert len(set(before) & set(after)) >= len(before) - 5
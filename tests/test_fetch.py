@@ -0,0 +1,130 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from components.summarizer import utils
+from components.summarizer.fetch import URLFetcher
+
+PAGE = b"<html><body><h1>Title</h1><p>The page content.</p></body></html>"
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/page":
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(200, PAGE, {"ETag": ETAG})
+        elif self.path == "/plain":
+            self._send(200, PAGE)
+        elif self.path == "/slow":
+            time.sleep(1)
+            self._send(200, PAGE)
+        else:
+            self._send(404, b"Not found")
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    _Handler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    fetcher = URLFetcher(timeout=0.3, retries=0)
+    monkeypatch.setattr(utils, "get_fetcher", lambda: fetcher)
+    return fetcher
+
+
+def test_fetch_returns_page_text(site, fetcher):
+    result = fetcher.fetch(f"{site}/page")
+
+    assert result.ok
+    assert "The page content." in result.text
+    assert "<p>" not in result.text
+
+
+def test_fetch_reports_http_errors(site, fetcher):
+    result = fetcher.fetch(f"{site}/missing")
+
+    assert not result.ok
+    assert "404" in result.error
+    assert result.text == ""
+
+
+def test_fetch_times_out(site, fetcher):
+    start = time.perf_counter()
+    result = fetcher.fetch(f"{site}/slow")
+
+    assert not result.ok
+    assert time.perf_counter() - start < 1
+
+
+def test_fetch_revalidates_with_etag(site, fetcher):
+    first = fetcher.fetch(f"{site}/page")
+    second = fetcher.fetch(f"{site}/page")
+
+    assert second.ok
+    assert second.text == first.text
+    assert _Handler.requests == [("/page", None), ("/page", ETAG)]
+
+
+def test_fetch_without_validators_downloads_again(site, fetcher):
+    fetcher.fetch(f"{site}/plain")
+    fetcher.fetch(f"{site}/plain")
+
+    assert _Handler.requests == [("/plain", None), ("/plain", None)]
+
+
+def test_fetch_all_keeps_order_and_failures(site, fetcher):
+    urls = [f"{site}/page", f"{site}/missing", f"{site}/plain"]
+    results = fetcher.fetch_all(urls)
+
+    assert [result.url for result in results] == urls
+    assert [result.ok for result in results] == [True, False, True]
+
+
+def test_fetch_doc_returns_failed_urls(site, fetcher):
+    doc = utils.fetch_doc(f"{site}/page\n{site}/missing")
+
+    assert "The page content." in doc.text
+    assert [result.url for result in doc.failed] == [f"{site}/missing"]
+    assert "404" in doc.failed[0].error
+
+
+def test_fetch_doc_single_failed_url(site, fetcher):
+    doc = utils.fetch_doc(f"{site}/missing")
+
+    assert doc.text == ""
+    assert len(doc.failed) == 1
+
+
+def test_fetch_doc_passes_text_through(fetcher):
+    doc = utils.fetch_doc("Some text to summarize.")
+
+    assert doc == ("Some text to summarize.", [])
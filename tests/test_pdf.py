@@ -0,0 +1,31 @@
+import io
+
+from benchmarks.corpora import make_pdf
+from components.pdf import extract_text, extraction, iter_pages, spooled_pdf
+from components.pdf.extraction import PAGE_BREAK
+
+
+def test_iter_pages_in_worker_processes_keeps_page_order():
+    with spooled_pdf(io.BytesIO(make_pdf(40, words_per_page=50))) as path:
+        in_process = list(iter_pages(path, workers=1))
+        pages = list(iter_pages(path, workers=2, pages_per_task=3))
+
+    assert pages == in_process
+    assert [page.page_number for page in pages] == list(range(1, 41))
+
+
+def test_worker_pool_is_reused():
+    with spooled_pdf(io.BytesIO(make_pdf(10, words_per_page=20))) as path:
+        list(iter_pages(path, workers=2, pages_per_task=2))
+        pool = extraction._pools[2]
+        list(iter_pages(path, workers=2, pages_per_task=2))
+
+    assert extraction._pools[2] is pool
+    assert pool._mp_context.get_start_method() == "spawn"
+
+
+def test_extract_text_separates_pages():
+    with spooled_pdf(io.BytesIO(make_pdf(3, words_per_page=20))) as path:
+        text = extract_text(path, workers=1)
+
+    assert text.count(PAGE_BREAK) == 2
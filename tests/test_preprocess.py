@@ -0,0 +1,79 @@
+from components.pdf.extraction import PAGE_BREAK
+from components.summarizer.preprocess import clean_lines, preprocess
+
+
+def _pages(*pages: str) -> str:
+    return PAGE_BREAK.join(pages)
+
+
+def test_clean_lines_keeps_ordinary_content():
+    text = (
+        "| Name | Age | City |\n"
+        "| Bob | 42 | Paris |\n"
+        "- yes\n- yes\n- yes\n"
+        "1969\n"
+        "The end."
+    )
+
+    assert clean_lines(text) == text
+
+
+def test_clean_lines_keeps_bare_pipe_rows_in_the_body():
+    text = _pages(
+        "Title\nIntro\nMore\nName | Age | City\nBob | 42 | Paris\nText\nOn\nEnd",
+        "Other\nPage\nStarts\nBody\nGoes\nOn\nHere",
+    )
+
+    assert "Name | Age | City" in clean_lines(text)
+    assert "Bob | 42 | Paris" in clean_lines(text)
+
+
+def test_clean_lines_removes_running_headers_and_page_numbers():
+    pages = [
+        f"The Book Title\nChapter text of page {i}.\nIt goes on.\nAnd on.\n{i}"
+        for i in range(1, 6)
+    ]
+
+    cleaned = clean_lines(_pages(*pages)).splitlines()
+
+    assert cleaned.count("The Book Title") == 1
+    assert not any(line.isdigit() for line in cleaned)
+    for i in range(1, 6):
+        assert f"Chapter text of page {i}." in cleaned
+
+
+def test_clean_lines_keeps_repeats_in_the_body():
+    body = "Intro\nMore intro\nYet more\nRefrain\nOutro\nMore outro\nLast"
+    cleaned = clean_lines(_pages(body, body, body, body))
+
+    assert cleaned.splitlines().count("Refrain") == 4
+
+
+def test_clean_lines_keeps_numbers_in_the_body():
+    page = "Header\nIntro\nMore\n1969\nOutro\nMore\nFooter"
+
+    assert "1969" in clean_lines(_pages(page, page))
+
+
+def test_clean_lines_without_pages_only_removes_boilerplate():
+    text = "Accept all cookies\nHome • About • Contact\n12\nIntro\n12\nIntro\nIntro"
+
+    assert clean_lines(text) == "12\nIntro\n12\nIntro\nIntro"
+
+
+def test_preprocess_truncates_to_budget():
+    text = "\n".join(f"Line {i} of the document." for i in range(1000))
+
+    result = preprocess(text, max_tokens=100)
+
+    assert result.truncated
+    assert result.tokens_after <= 100
+    assert text.startswith(result.text)
+    assert result.tokens_saved == result.tokens_before - result.tokens_after
+
+
+def test_preprocess_within_budget_keeps_text():
+    result = preprocess("A short text.", max_tokens=100)
+
+    assert result.text == "A short text."
+    assert not result.truncated
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import FakeChatModel
+from components.ratelimit import (
+    RateLimitedChatModel,
+    RateLimiter,
+    TokenBucket,
+    backoff_delay,
+    call_with_retries,
+    is_rate_limit_error,
+    rate_limit_owner,
+)
+from components.ratelimit import limiter as limiter_module
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__("error")
+        self.status_code = status_code
+
+
+def _empty_limiter(requests_per_minute: float) -> RateLimiter:
+    limiter = RateLimiter(requests_per_minute)
+    limiter.requests.level = 0
+    return limiter
+
+
+def test_token_bucket_starts_full_and_refills():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated_at
+
+    assert bucket.wait_time(60, now) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1) == pytest.approx(0.0)
+    assert bucket.level == pytest.approx(1.0)
+
+
+def test_token_bucket_debt_and_large_amounts():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated_at
+
+    bucket.consume(90)
+    assert bucket.wait_time(1, now) == pytest.approx(31.0)
+    # Amounts above the capacity only wait for a full bucket.
+    bucket.level = 0
+    assert bucket.wait_time(120, now) == pytest.approx(60.0)
+
+
+def test_acquire_waits_for_the_quota():
+    limiter = _empty_limiter(requests_per_minute=600)
+
+    waited = limiter.acquire()
+
+    assert 0.05 < waited < 0.3
+
+
+def test_acquire_counts_tokens():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=6000)
+
+    assert limiter.acquire(5000) < 0.05
+    limiter.record_usage(estimated_tokens=5000, actual_tokens=5500)
+    assert limiter.tokens.level == pytest.approx(500, abs=5)
+    assert 0.05 < limiter.acquire(510) < 0.3
+
+
+def test_waiting_owners_are_served_round_robin():
+    limiter = _empty_limiter(requests_per_minute=1200)
+    served = []
+
+    def request(owner):
+        with rate_limit_owner(owner):
+            limiter.acquire()
+        served.append(owner)
+
+    threads = [threading.Thread(target=request, args=("a",)) for _ in range(3)]
+    threads.append(threading.Thread(target=request, args=("b",)))
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+
+    assert served == ["a", "b", "a", "a"]
+
+
+def test_cancelled_async_acquire_leaves_the_line():
+    limiter = _empty_limiter(requests_per_minute=60)
+
+    async def main():
+        task = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert limiter._queues == {}
+    assert limiter.requests.level < 1
+
+
+def test_cancelled_async_acquire_lets_the_next_caller_through():
+    limiter = _empty_limiter(requests_per_minute=600)
+
+    async def main():
+        with rate_limit_owner("loser"):
+            loser = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        with rate_limit_owner("winner"):
+            winner = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        loser.cancel()
+        return await winner
+
+    assert asyncio.run(main()) < 0.3
+    assert limiter._queues == {}
+
+
+def test_async_acquire_waits_for_the_quota():
+    limiter = _empty_limiter(requests_per_minute=600)
+
+    assert 0.05 < asyncio.run(limiter.aacquire()) < 0.3
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (_StatusError(429), True),
+        (RuntimeError("Error code: 429 - Too Many Requests"), True),
+        (RuntimeError("Rate limit reached for model"), True),
+        (type("ResourceExhausted", (Exception,), {})("exhausted"), True),
+        (_StatusError(500), False),
+        (ValueError("Invalid input"), False),
+    ],
+)
+def test_is_rate_limit_error(error, expected):
+    assert is_rate_limit_error(error) is expected
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, maximum=2) <= 2 for attempt in range(10))
+
+
+def test_call_with_retries_retries_rate_limit_errors(monkeypatch):
+    monkeypatch.setattr(limiter_module.time, "sleep", lambda delay: None)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise _StatusError(429)
+        return "ok"
+
+    assert call_with_retries(fn) == "ok"
+    assert len(calls) == 3
+
+
+def test_call_with_retries_raises_other_errors_at_once(monkeypatch):
+    monkeypatch.setattr(limiter_module.time, "sleep", lambda delay: None)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError("Invalid input")
+
+    with pytest.raises(ValueError):
+        call_with_retries(fn)
+    assert len(calls) == 1
+
+
+def test_call_with_retries_gives_up(monkeypatch):
+    monkeypatch.setattr(limiter_module.time, "sleep", lambda delay: None)
+
+    def fn():
+        raise _StatusError(429)
+
+    with pytest.raises(_StatusError):
+        call_with_retries(fn, max_retries=2)
+
+
+def test_rate_limited_chat_model_takes_quota():
+    limiter = RateLimiter(requests_per_minute=60)
+    model = RateLimitedChatModel(
+        llm=FakeChatModel(latency=0, tokens_per_second=1e6), limiter=limiter
+    )
+    messages = [HumanMessage(content="Summarize this.")]
+
+    assert model.invoke(messages).content
+    assert asyncio.run(model.ainvoke(messages)).content
+    assert limiter.requests.level == pytest.approx(58, abs=0.1)
@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import FakeChatModel
+from components.router import ProviderHealth, RouterChatModel
+
+MESSAGES = [HumanMessage(content="Summarize this.")]
+CALLS = []
+
+
+class RecordingChatModel(FakeChatModel):
+    """A fake model that records the keyword arguments of each call."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        CALLS.append(kwargs)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        CALLS.append(kwargs)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+def _model(name: str, latency: float = 0.01, **kwargs) -> FakeChatModel:
+    return FakeChatModel(
+        model_name=name, latency=latency, output_tokens=5, tokens_per_second=1e6, **kwargs
+    )
+
+
+def _router(**backends) -> RouterChatModel:
+    return RouterChatModel(backends=backends, hedge=False, cooldown=60)
+
+
+def test_fails_over_to_the_next_backend():
+    router = _router(broken=_model("broken", error_rate=1.0), ok=_model("ok"))
+
+    assert router.invoke(MESSAGES).content
+    assert router.health("broken").error_rate == 1.0
+    assert router.health("ok").sample_count == 1
+
+
+def test_raises_when_every_backend_fails():
+    router = _router(a=_model("a", error_rate=1.0), b=_model("b", error_rate=1.0))
+
+    with pytest.raises(RuntimeError, match="injected error"):
+        router.invoke(MESSAGES)
+
+
+async def _ainvoke(router):
+    return await router.ainvoke(MESSAGES)
+
+
+def test_async_fails_over_to_the_next_backend():
+    router = _router(broken=_model("broken", error_rate=1.0), ok=_model("ok"))
+
+    assert asyncio.run(_ainvoke(router)).content
+    assert router.health("broken").error_rate == 1.0
+
+
+def test_hedges_a_slow_call():
+    router = RouterChatModel(
+        backends={"slow": _model("slow", latency=1.0), "fast": _model("fast")},
+        hedge_after=0.05,
+    )
+
+    start = time.perf_counter()
+    router.invoke(MESSAGES)
+
+    assert time.perf_counter() - start < 0.5
+    assert router.health("fast").sample_count == 1
+
+
+def test_async_hedge_cancels_the_slow_call():
+    router = RouterChatModel(
+        backends={"slow": _model("slow", latency=1.0), "fast": _model("fast")},
+        hedge_after=0.05,
+    )
+
+    start = time.perf_counter()
+    asyncio.run(_ainvoke(router))
+
+    assert time.perf_counter() - start < 0.5
+    # The cancelled call is neither a success nor a failure.
+    assert router.health("slow").sample_count == 0
+    assert router.health("slow").error_rate == 0.0
+
+
+def test_no_hedge_without_enough_samples():
+    router = RouterChatModel(
+        backends={"a": _model("a", latency=0.2), "b": _model("b")}, min_samples=5
+    )
+
+    router.invoke(MESSAGES)
+
+    assert router.health("a").sample_count == 1
+    assert router.health("b").sample_count == 0
+
+
+def test_passes_call_options_to_the_backend():
+    CALLS.clear()
+    router = _router(a=RecordingChatModel(latency=0.0))
+
+    router.invoke(MESSAGES, temperature=0.2)
+    asyncio.run(router.ainvoke(MESSAGES, temperature=0.3))
+
+    assert [call.get("temperature") for call in CALLS] == [0.2, 0.3]
+
+
+def test_ranks_the_fastest_healthy_backend_first():
+    router = _router(slow=_model("slow", latency=0.05), fast=_model("fast"))
+    for name in ("slow", "fast"):
+        router.health(name).record(0.05 if name == "slow" else 0.01, ok=True)
+
+    assert router.ranked_backends() == ["fast", "slow"]
+
+    for _ in range(3):
+        router.health("fast").record(0.01, ok=False)
+
+    assert router.ranked_backends() == ["slow", "fast"]
+
+
+def test_health_recovers_after_cooldown_and_error_window():
+    health = ProviderHealth(cooldown=0.1, error_window=0.2)
+    for _ in range(3):
+        health.record(0.01, ok=False)
+
+    assert not health.is_healthy(max_error_rate=0.5)
+    time.sleep(0.15)
+    # The cooldown is over, but the failures still count in the error rate.
+    assert not health.is_healthy(max_error_rate=0.5)
+    time.sleep(0.1)
+    assert health.error_rate == 0.0
+    assert health.is_healthy(max_error_rate=0.5)
+
+
+def test_health_latency_percentile():
+    health = ProviderHealth(window=100)
+    for latency in range(1, 101):
+        health.record(latency / 100, ok=True)
+
+    assert health.latency_percentile(50) == 0.51
+    assert health.latency_percentile(95) == 0.96
+    assert health.error_rate == 0.0
@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+
+from components.cache import MinHasher, SemanticCache, SimilarityIndex
+
+WORDS = "the model learns patterns from data and explains results to an audience".split()
+
+
+def _text(seed: int, n_words: int = 200) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 50)) for _ in range(n_words))
+
+
+def _signature(hasher: MinHasher, text: str) -> np.ndarray:
+    return hasher.signature(hasher.tokenize(text))
+
+
+def test_query_finds_the_most_similar_entry():
+    hasher = MinHasher()
+    index = SimilarityIndex()
+    for i in range(20):
+        index.add(f"key{i}", _signature(hasher, _text(i)))
+
+    key, similarity = index.query(_signature(hasher, _text(7)), min_similarity=0.9)
+
+    assert (key, similarity) == ("key7", 1.0)
+
+
+def test_adding_a_key_again_replaces_its_entry():
+    hasher = MinHasher()
+    index = SimilarityIndex()
+    index.add("a", _signature(hasher, _text(1)))
+    index.add("b", _signature(hasher, _text(2)))
+    index.add("a", _signature(hasher, _text(3)))
+
+    assert len(index) == 2
+    assert index.query(_signature(hasher, _text(3)), 0.9) == ("a", 1.0)
+    assert index.query(_signature(hasher, _text(1)), 0.9)[1] < 0.9
+
+
+def test_oldest_entries_are_dropped_when_full():
+    hasher = MinHasher(num_perm=32)
+    index = SimilarityIndex(num_perm=32, max_entries=10)
+    signatures = [_signature(hasher, _text(i)) for i in range(12)]
+    for i, signature in enumerate(signatures):
+        index.add(f"key{i}", signature)
+
+    assert len(index) == 10
+    assert index.query(signatures[0], 0.9)[1] < 0.9
+    assert index.query(signatures[11], 0.9) == ("key11", 1.0)
+    # Keys re-added after a drop still replace their own entry.
+    index.add("key5", signatures[1])
+    assert len(index) == 10
+    assert index.query(signatures[1], 0.9) == ("key5", 1.0)
+
+
+def test_semantic_cache_matches_near_duplicates(tmp_path):
+    path = str(tmp_path / "signatures.sqlite")
+    cache = SemanticCache(path)
+    text = "\n".join(_text(i, 20) for i in range(20))
+    cache.add(text, "scope", "result-key")
+
+    near_duplicate = text + "\nSubscribe to the channel."
+    assert cache.lookup(near_duplicate, "scope") == "result-key"
+    assert cache.lookup(near_duplicate, "other scope") is None
+    assert cache.lookup(_text(99), "scope") is None
+    assert cache.lookup("Too short.", "scope") is None
+
+    # The index is rebuilt from the file.
+    assert SemanticCache(path).lookup(near_duplicate, "scope") == "result-key"
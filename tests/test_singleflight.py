@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_redis import FakeRedis
+from components.cache import LRUCache, RedisCache, SingleFlight, SQLiteCache, TieredCache
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "results.sqlite")
+
+
+def _run_concurrently(*fns):
+    results = [None] * len(fns)
+
+    def run(i):
+        results[i] = fns[i]()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(fns))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class _Counter:
+    def __init__(self, delay: float = 0.0, value: str = "summary") -> None:
+        self.calls = 0
+        self.delay = delay
+        self.value = value
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.value
+
+
+def test_threads_compute_once():
+    store = SingleFlight(LRUCache())
+    compute = _Counter(delay=0.1)
+
+    results = _run_concurrently(*[lambda: store.do("k", compute)] * 5)
+
+    assert results == ["summary"] * 5
+    assert compute.calls == 1
+    assert store.get("k") == "summary"
+
+
+def test_processes_sharing_a_cache_compute_once(sqlite_path):
+    # Each store stands for a process: its own owner and in-process flights.
+    stores = [
+        SingleFlight(SQLiteCache(sqlite_path), poll_interval=0.02) for _ in range(3)
+    ]
+    compute = _Counter(delay=0.2)
+
+    results = _run_concurrently(*[lambda s=s: s.do("k", compute) for s in stores])
+
+    assert results == ["summary"] * 3
+    assert compute.calls == 1
+
+
+def test_lease_is_renewed_during_a_long_computation(sqlite_path):
+    leader = SingleFlight(SQLiteCache(sqlite_path), lease_ttl=0.3, poll_interval=0.02)
+    follower = SingleFlight(SQLiteCache(sqlite_path), lease_ttl=0.3, poll_interval=0.02)
+    compute = _Counter(delay=1.0)
+
+    def follow():
+        time.sleep(0.6)
+        return follower.do("k", compute)
+
+    results = _run_concurrently(lambda: leader.do("k", compute), follow)
+
+    assert results == ["summary", "summary"]
+    assert compute.calls == 1
+
+
+def test_lease_is_released_after_the_computation():
+    cache = LRUCache()
+    store = SingleFlight(cache)
+
+    store.do("k", _Counter())
+
+    assert cache.get("k:lease") is None
+
+
+def test_lease_is_released_after_an_error():
+    cache = LRUCache()
+    store = SingleFlight(cache)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        store.do("k", fail)
+    assert cache.get("k:lease") is None
+    assert store.do("k", _Counter()) == "summary"
+
+
+def test_only_our_own_lease_is_released():
+    cache = LRUCache()
+    store = SingleFlight(cache, lease_ttl=0.3)
+
+    def lose_lease():
+        # The lease expired and another process took it.
+        cache.delete("k:lease")
+        cache.add("k:lease", "other-owner", ttl=60)
+        time.sleep(0.2)
+        return "summary"
+
+    store.do("k", lose_lease)
+
+    assert cache.get("k:lease") == "other-owner"
+    assert cache.get_with_ttl("k:lease")[1] > 59
+
+
+def test_empty_and_rejected_results_are_not_stored():
+    store = SingleFlight(LRUCache())
+
+    assert store.do("empty", _Counter(value="")) == ""
+    assert store.do("partial", _Counter(), cache_if=lambda value: False) == "summary"
+    assert store.get("empty") is None
+    assert store.get("partial") is None
+
+
+def test_stored_result_is_returned_without_computing():
+    cache = LRUCache()
+    cache.set("k", "stored")
+    compute = _Counter()
+
+    assert SingleFlight(cache).do("k", compute) == "stored"
+    assert compute.calls == 0
+
+
+def test_tiered_cache_followers_do_not_keep_a_copy_of_the_lease(sqlite_path):
+    stores = [
+        SingleFlight(
+            TieredCache([LRUCache(), SQLiteCache(sqlite_path)]),
+            lease_ttl=5,
+            poll_interval=0.02,
+        )
+        for _ in range(2)
+    ]
+    compute = _Counter(delay=0.2)
+
+    start = time.perf_counter()
+    results = _run_concurrently(*[lambda s=s: s.do("k", compute) for s in stores])
+
+    assert results == ["summary", "summary"]
+    assert compute.calls == 1
+    assert time.perf_counter() - start < 2
+
+
+def test_tiered_add_and_delete_if_use_the_shared_layer(sqlite_path):
+    memory, shared = LRUCache(), SQLiteCache(sqlite_path)
+    cache = TieredCache([memory, shared])
+
+    assert cache.add("lease", "me", ttl=60)
+    assert not cache.add("lease", "other", ttl=60)
+    assert memory.get("lease") is None
+    assert shared.get("lease") == "me"
+
+    assert cache.get("lease") == "me"  # Now copied to memory too.
+    assert not cache.delete_if("lease", "other")
+    assert cache.get("lease") == "me"
+    assert cache.delete_if("lease", "me")
+    assert memory.get("lease") is None
+    assert shared.get("lease") is None
+
+
+def test_tiered_renew_uses_the_shared_layer(sqlite_path):
+    cache = TieredCache([LRUCache(), SQLiteCache(sqlite_path)])
+    cache.add("lease", "me", ttl=0.2)
+
+    assert cache.renew("lease", "me", ttl=60)
+    assert not cache.renew("lease", "other", ttl=60)
+    time.sleep(0.3)
+    assert cache.layers[-1].get("lease") == "me"
+
+
+@pytest.mark.parametrize(
+    "make_cache",
+    [LRUCache, lambda: RedisCache(FakeRedis())],
+    ids=["lru", "redis"],
+)
+def test_compare_and_set(make_cache):
+    cache = make_cache()
+
+    assert cache.add("lease", "me", ttl=0.2)
+    assert not cache.add("lease", "other", ttl=60)
+    assert not cache.renew("lease", "other", ttl=60)
+    assert cache.renew("lease", "me", ttl=60)
+    time.sleep(0.3)
+    assert cache.get("lease") == "me"
+    assert cache.get_with_ttl("lease")[1] > 59
+
+    assert not cache.delete_if("lease", "other")
+    assert cache.delete_if("lease", "me")
+    assert cache.get("lease") is None
+    assert not cache.renew("lease", "me", ttl=60)
+
+
+def test_redis_renew_without_ttl_persists():
+    cache = RedisCache(FakeRedis())
+    cache.add("lease", "me", ttl=60)
+
+    assert cache.renew("lease", "me", ttl=None)
+    assert cache.get_with_ttl("lease") == ("me", None)
+
+
+def test_redis_compare_and_set_compares_serialized_values():
+    client = FakeRedis()
+    cache = RedisCache(client, prefix="test:")
+    cache.add("lease", {"owner": "me"}, ttl=60)
+
+    assert client.get("test:lease") == b'{"owner": "me"}'
+    assert cache.delete_if("lease", {"owner": "me"})
+
+
+@pytest.mark.skipif(
+    not os.environ.get("REDIS_URL"), reason="set REDIS_URL to run the Lua scripts"
+)
+def test_lua_scripts_on_a_redis_server():
+    cache = RedisCache.from_url(os.environ["REDIS_URL"], prefix="gptsummary-test:")
+    cache.clear()
+    try:
+        assert cache.add("lease", "me", ttl=0.5)
+        assert not cache.renew("lease", "other", ttl=60)
+        assert cache.renew("lease", "me", ttl=60)
+        time.sleep(0.6)
+        assert cache.get_with_ttl("lease")[1] > 59
+        assert cache.renew("lease", "me", ttl=None)
+        assert cache.get_with_ttl("lease") == ("me", None)
+        assert not cache.delete_if("lease", "other")
+        assert cache.delete_if("lease", "me")
+        assert cache.get("lease") is None
+    finally:
+        cache.clear()
@@ -0,0 +1,125 @@
+import pytest
+
+from components.mermaid.validator import extract_code, validate
+
+VALID = [
+    ("Flowchart", "flowchart TD\n    A[Start] --> B{Ok?}\n    B -->|Yes| C(Done)"),
+    ("Flowchart", "graph TD;\n    A-->B;\n    B-->C;"),
+    ("Flowchart", "graph LR\n    A --> B"),
+    ("Flowchart", 'flowchart LR\n    A["Chapter 1: end of story"] --> B'),
+    ("Flowchart", "flowchart LR\n    A[The end] --> B(Happy end)"),
+    ("Flowchart", "flowchart TD\n    subgraph One\n        a1 --> a2\n    end\n    a2 --> b"),
+    ("Flowchart", 'flowchart TD\n    A["Step (optional)"] --> B'),
+    ("Flowchart", "flowchart TD\n    A --> B\n    classDef red fill:#f00\n    class A red"),
+    ("Flowchart", "flowchart LR\n    A>Flag] --> B[[Subroutine]]"),
+    ("Block Diagram", "block-beta\n    columns 3\n    a b c\n    block:group\n        d\n    end"),
+    (
+        "C4 Diagram",
+        'C4Context\n    title System\n    Person(user, "User")\n'
+        '    System_Boundary(b, "Boundary") {\n        System(s, "System")\n    }\n'
+        '    Rel(user, s, "Uses")',
+    ),
+    (
+        "Class Diagram",
+        "classDiagram\n    class Animal {\n        +String name\n        +eat()\n    }\n"
+        "    Animal <|-- Duck",
+    ),
+    (
+        "Entity Relationship Diagram",
+        "erDiagram\n    CUSTOMER ||--o{ ORDER : places\n    ORDER {\n"
+        "        string id PK\n        int total\n    }",
+    ),
+    ("Entity Relationship Diagram", "erDiagram\n    A only one to zero or more B : has"),
+    ("Mindmap", "mindmap\n  root((Summary))\n    Topic A\n      Detail\n    Topic B"),
+    ("Mindmap", "mindmap\n  root\n    ))Bang((\n    )Cloud("),
+    (
+        "Sequence Diagram",
+        "sequenceDiagram\n    participant A\n    A->>B: Hello\n    alt ok\n"
+        "        B-->>A: Hi\n    else not ok\n        B-xA: Error\n    end\n"
+        "    Note over A,B: Done",
+    ),
+    ("Timeline Diagram", "timeline\n    title History\n    2004 : Facebook\n         : Gmail"),
+    ("User Journey Diagram", "journey\n    title My day\n    section Work\n      Code: 5: Me"),
+    ("Flowchart", "%%{init: {'theme': 'dark'}}%%\nflowchart TD\n    A --> B"),
+    ("Flowchart", "---\ntitle: Example\n---\nflowchart TD\n    A --> B"),
+    ("Flowchart", "flowchart TD\n    %% A comment with (brackets\n    A --> B"),
+]
+
+INVALID = [
+    ("flowchart XY\n    A --> B", 1, "Unknown direction"),
+    ("flowchart TD\n    A[Start --> B", 2, "Missing ']'"),
+    ("flowchart TD\n    A[Step (optional)] --> B", 2, "Quote the label"),
+    ("flowchart TD\n    A --> end", 2, "'end' can't be used as a node ID"),
+    ("flowchart TD\n    subgraph One\n        a --> b", 2, "'subgraph' without 'end'"),
+    ("flowchart TD\n    a --> b\n    end", 3, "'end' without 'subgraph'"),
+    ('flowchart TD\n    A["Unclosed] --> B', 2, "Unclosed quotation mark"),
+    ("block-beta\n    block:group\n        a", 2, "'block' without 'end'"),
+    ('C4Context\n    Person(user, "User"', 2, "Missing ')'"),
+    ("C4Context\n    just text", 2, "Expected an element"),
+    ('C4Context\n    System_Boundary(b, "B") {\n        System(s, "S")', 3, "Missing '}'"),
+    ("classDiagram\n    class Animal {\n        +eat()", 2, "Missing '}'"),
+    ("classDiagram\n    }", 2, "Unexpected '}'"),
+    ("erDiagram\n    CUSTOMER places ORDER", 2, "Expected a relationship"),
+    ("erDiagram\n    ORDER {\n        string\n    }", 3, "Expected an attribute"),
+    ("mindmap\n  root\n  second root", 3, "single root"),
+    ("mindmap", 1, "no root"),
+    ("sequenceDiagram\n    A->>B Hello", 2, "Expected a message"),
+    ("sequenceDiagram\n    loop Every minute\n        A->>B: Ping", 2, "'loop' without 'end'"),
+    ("sequenceDiagram\n    else", 2, "'else' outside of 'alt'"),
+    ("timeline\n    2004 Facebook", 2, "Expected a period"),
+    ("journey\n    Code: 7: Me", 2, "between 1 and 5"),
+    ("journey\n    Code", 2, "Expected a task"),
+    ("pie\n    \"A\" : 1", 1, "Unknown diagram type 'pie'"),
+    ("", 1, "The diagram is empty"),
+]
+
+
+@pytest.mark.parametrize("diagram_type, code", VALID)
+def test_valid_diagrams(diagram_type, code):
+    result = validate(code, diagram_type)
+
+    assert result.valid, [str(error) for error in result.errors]
+    assert result.diagram_type == diagram_type
+
+
+@pytest.mark.parametrize("code, line, message", INVALID)
+def test_invalid_diagrams(code, line, message):
+    result = validate(code)
+
+    assert not result.valid
+    assert any(
+        error.line == line and message in error.message for error in result.errors
+    ), [str(error) for error in result.errors]
+
+
+def test_error_lines_count_from_the_start_of_the_code():
+    result = validate("---\ntitle: T\n---\n%%{init: {}}%%\nflowchart TD\n    A[Start --> B")
+
+    assert [error.line for error in result.errors] == [6]
+
+
+def test_wrong_diagram_type_is_not_repairable():
+    result = validate("flowchart TD\n    A --> B", "Mindmap")
+
+    assert not result.valid
+    assert not result.repairable
+
+
+def test_local_errors_are_repairable():
+    result = validate("flowchart TD\n    A[Start --> B", "Flowchart")
+
+    assert not result.valid
+    assert result.repairable
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Here it is:\n```mermaid\nmindmap\n  root\n```\nEnjoy!",
+        "```\nmindmap\n  root\n```",
+        "mermaid\nmindmap\n  root",
+        "mindmap\n  root",
+    ],
+)
+def test_extract_code(text):
+    assert extract_code(text) == "mindmap\n  root"
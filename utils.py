@@ -1,59 +1,407 @@
-import streamlit as st
-from langchain_google_genai import (
-    ChatGoogleGenerativeAI,
-    HarmBlockThreshold,
-    HarmCategory,
+import os
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
 )
-from langchain_openai import ChatOpenAI
 
+import streamlit as st
+
+from components.cache import (
+    BaseCache,
+    LRUCache,
+    RedisCache,
+    SQLiteCache,
+    SingleFlight,
+    TieredCache,
+    make_key,
+)
+from components.jobs import JobQueue, JobStore
+from components.jobs.queue import JobFunction
+from components.llm import MODELS, create_llm
+from components.mermaid import DiagramRenderer
+from components.metrics import MetricsFileExporter, start_metrics_server
+from components.metrics.panel import show_metrics_panel
 from config import settings
 
+# LangChain, LangGraph, PyMuPDF and NumPy are imported by the functions using
+# them, so starting the app and rendering a page doesn't wait for them.
+if TYPE_CHECKING:
+    from components.cache import SemanticCache
+    from components.mermaid import DiagramGenerator
+    from components.pdf import Chapter
+    from components.pipeline import SummaryDiagramPipeline
+    from components.summarizer import ChapterSummary, Summarizer
+    from components.summarizer.utils import DocText
 
-def sidebar_options():
-    """Sidebar options for the app."""
-    # Sidebar for model selection
-    st.sidebar.title("Model Selection")
-    model_provider = st.sidebar.selectbox(
-        "Choose Model Provider", ["Gemini", "Yi", "Groq"]
+
+@st.cache_resource
+def get_cache() -> BaseCache:
+    """Return the process-wide cache: an in-memory LRU in front of a SQLite file."""
+    return TieredCache(
+        [
+            LRUCache(
+                max_entries=settings.CACHE_MEMORY_ENTRIES,
+                ttl=settings.CACHE_TTL_SECONDS,
+            ),
+            SQLiteCache(
+                path=os.path.join(settings.CACHE_DIR, "cache.sqlite"),
+                max_entries=settings.CACHE_MAX_ENTRIES,
+                ttl=settings.CACHE_TTL_SECONDS,
+            ),
+        ]
     )
 
-    if model_provider == "Gemini":
-        model_name = st.sidebar.selectbox(
-            "Choose Model", ["gemini-1.5-flash-latest", "gemini-1.5-pro-latest", "gemini-1.5-pro-exp-0801"]
-        )
-        safety_settings = safety_settings={
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE
-        }
-        llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=0,
-            google_api_key=settings.GOOGLE_API_KEY,
-            safety_settings=safety_settings
-        )
-    elif model_provider == "Yi":
-        model_name = st.sidebar.selectbox("Choose Model", ["yi-large"])
-        llm = ChatOpenAI(
-            model="yi-large",
-            temperature=0,
-            api_key=settings.YI_API_KEY,
-            base_url=settings.YI_BASE_URL,
-        )
-    elif model_provider == "Groq":
-        model_name = st.sidebar.selectbox(
-            "Choose Model", ["llama3-70b-8192", "mixtral-8x7b-32768"]
+
+@st.cache_resource
+def get_semantic_cache() -> Optional["SemanticCache"]:
+    """Return the process-wide near-duplicate index of summarized texts, if enabled."""
+    from components.cache import SemanticCache
+
+    if settings.SEMANTIC_CACHE_THRESHOLD is None:
+        return None
+    return SemanticCache(
+        path=os.path.join(settings.CACHE_DIR, "similarity.sqlite"),
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+    )
+
+
+@st.cache_resource
+def start_metrics_exporters() -> None:
+    """Start the configured metrics endpoint and file exporter, once per process."""
+    if settings.METRICS_PORT:
+        start_metrics_server(settings.METRICS_PORT)
+    if settings.METRICS_FILE:
+        MetricsFileExporter(settings.METRICS_FILE).start()
+
+
+@st.cache_resource
+def get_llm(provider: str, model_name: str):
+    """Return the shared chat model client of a provider and model."""
+    return create_llm(provider, model_name)
+
+
+@st.cache_resource
+def get_summarizer(
+    provider: str,
+    model_name: str,
+    system_prompt: str,
+    language: str,
+    reuse_similar: bool = True,
+) -> "Summarizer":
+    """
+    Return the shared summarizer (and its compiled chains) for a model, prompt and
+    language; with `reuse_similar`, near-duplicates of summarized texts get their
+    summary.
+    """
+    from components.summarizer import Summarizer
+
+    return Summarizer(
+        llm=get_llm(provider, model_name),
+        system_prompt=system_prompt,
+        language=language,
+        cache=get_cache(),
+        similar=get_semantic_cache() if reuse_similar else None,
+    )
+
+
+@st.cache_resource
+def get_diagram_generator(
+    provider: str, model_name: str, language: str
+) -> "DiagramGenerator":
+    """Return the shared diagram generator (and its compiled graph) for a model and language."""
+    from components.mermaid import DiagramGenerator
+
+    return DiagramGenerator(
+        llm=get_llm(provider, model_name),
+        language=language,
+        examples_filepath="resources/mermaid_examples.json",
+    )
+
+
+@st.cache_resource
+def get_diagram_renderer() -> Optional[DiagramRenderer]:
+    """Return the shared server-side diagram renderer, or None if it's disabled or not installed."""
+    if not settings.MERMAID_SERVER_RENDER:
+        return None
+    renderer = DiagramRenderer(
+        directory=os.path.join(settings.CACHE_DIR, "diagrams"),
+        cli=settings.MERMAID_CLI,
+        puppeteer_config=settings.MERMAID_PUPPETEER_CONFIG,
+    )
+    return renderer if renderer.available else None
+
+
+@st.cache_resource
+def get_pipeline(
+    provider: str,
+    model_name: str,
+    system_prompt: str,
+    language: str,
+    reuse_similar: bool = True,
+) -> "SummaryDiagramPipeline":
+    """Return the shared summary-and-diagram pipeline for a model, prompt and language."""
+    from components.pipeline import SummaryDiagramPipeline
+
+    return SummaryDiagramPipeline(
+        summarizer=get_summarizer(
+            provider, model_name, system_prompt, language, reuse_similar
+        ),
+        generator=get_diagram_generator(provider, model_name, language),
+    )
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Return the process-wide queue of summarize and diagram jobs."""
+    store = JobStore(
+        os.path.join(settings.CACHE_DIR, "jobs.sqlite"),
+        retention=settings.JOB_RETENTION_SECONDS,
+    )
+    return JobQueue(store, max_workers=settings.JOB_WORKERS)
+
+
+@st.cache_resource
+def get_result_store() -> SingleFlight:
+    """Return the store of job results shared by all sessions and app processes."""
+    if settings.RESULT_STORE_URL:
+        cache = RedisCache.from_url(
+            settings.RESULT_STORE_URL, ttl=settings.RESULT_TTL_SECONDS
         )
-        llm = ChatOpenAI(
-            model=model_name,
-            temperature=0,
-            api_key=settings.GROQ_API_KEY,
-            base_url=settings.GROQ_BASE_URL,
+    else:
+        cache = SQLiteCache(
+            path=os.path.join(settings.CACHE_DIR, "results.sqlite"),
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            ttl=settings.RESULT_TTL_SECONDS,
         )
+    return SingleFlight(cache, lease_ttl=settings.RESULT_LEASE_SECONDS)
+
+
+def submit_shared_job(
+    kind: str,
+    key: str,
+    fn: JobFunction,
+    ttl: Optional[float] = None,
+    cache_if: Optional[Callable[[Any], bool]] = None,
+) -> str:
+    """
+    Submit a job whose result is shared by every session: the job returns the
+    stored result if there's one, or waits for the same job running in another
+    process, so concurrent identical requests cost one computation.
+
+    Args:
+        kind (str): The kind of job, e.g. "summary" or "diagram".
+        key (str): Identifies the job and its inputs.
+        fn (JobFunction): The work, called with a progress callback.
+        ttl (Optional[float]): Overrides the time the result is shared, in seconds.
+        cache_if (Optional[Callable[[Any], bool]]): Whether to share a result.
+
+    Returns:
+        str: The job ID.
+    """
+    store = get_result_store()
+
+    def run(progress: Callable[[str], None]) -> Any:
+        return store.do(key, lambda: fn(progress), ttl=ttl, cache_if=cache_if)
+
+    return get_job_queue().submit(kind, key, run)
 
-    st.session_state.llm = llm
+
+# Returns the text to summarize, or the text of a document and its failed URLs.
+TextSource = Callable[[], Union[str, "DocText"]]
+
+
+def _get_text(get_text: TextSource) -> Tuple[str, List[str]]:
+    """Return the text to summarize and the URLs that couldn't be fetched, if any."""
+    doc = get_text()
+    text, failed = (doc, []) if isinstance(doc, str) else doc
+    errors = [f"{result.url}: {result.error}" for result in failed]
+    if not text:
+        if errors:
+            raise ValueError(f"Couldn't fetch {'; '.join(errors)}")
+        raise ValueError("Couldn't get any text from the given input.")
+    return text, errors
+
+
+def _complete(result: Any) -> bool:
+    return not (isinstance(result, dict) and result.get("failed"))
+
+
+def submit_summary_job(
+    summarizer: "Summarizer",
+    source: str,
+    get_text: TextSource,
+    ttl: Optional[float] = None,
+) -> str:
+    """
+    Summarize a source in the background; the progress is the summary so far.
+
+    Args:
+        summarizer (Summarizer): The summarizer to use.
+        source (str): Identifies the input, e.g. a URL or a file hash; jobs for
+            the same source and summarizer are coalesced.
+        get_text (TextSource): Returns the text to summarize, run in the job. If
+            it returns a `DocText` with failed URLs, the result is a dict with
+            the summary of the rest and the "failed" URLs, which isn't shared.
+        ttl (Optional[float]): Overrides the time the summary is shared, in seconds.
+
+    Returns:
+        str: The job ID.
+    """
+
+    def summarize(progress: Callable[[str], None]) -> Any:
+        text, failed = _get_text(get_text)
+        summary = ""
+        for part in summarizer.stream(text):
+            summary += part
+            progress(summary)
+        if failed:
+            return {"summary": summary, "failed": failed, "diagram": None}
+        return summary
+
+    return submit_shared_job(
+        "summary",
+        summarizer.summary_key(source, "summary_job"),
+        summarize,
+        ttl=ttl,
+        cache_if=_complete,
+    )
+
+
+def submit_pipeline_job(
+    pipeline: "SummaryDiagramPipeline",
+    source: str,
+    get_text: TextSource,
+    ttl: Optional[float] = None,
+) -> str:
+    """
+    Summarize a source and generate the diagram of the summary in the background;
+    the progress is the summary so far. See `submit_summary_job`.
+    """
+
+    def run(progress: Callable[[str], None]) -> Dict[str, Any]:
+        text, failed = _get_text(get_text)
+        return {**pipeline.run(text, progress), "failed": failed}
+
+    return submit_shared_job(
+        "summary",
+        pipeline.summarizer.summary_key(source, "pipeline_job"),
+        run,
+        ttl=ttl,
+        cache_if=_complete,
+    )
+
+
+def join_chapter_summaries(
+    chapters: Sequence["Chapter"], summaries: List[Optional["ChapterSummary"]]
+) -> str:
+    """Return the chapter summaries in book order, with placeholders for the rest."""
+    parts = []
+    for chapter, summary in zip(chapters, summaries):
+        if summary is not None and summary.summary:
+            parts.append(summary.summary)
+        elif summary is not None:
+            parts.append(f"**{chapter.title}**: _failed: {summary.error}_")
+        else:
+            parts.append(f"**{chapter.title}**: _summarizing..._")
+    return "\n\n".join(parts)
+
+
+def submit_book_job(
+    summarizer: "Summarizer",
+    source: str,
+    chapters: Sequence["Chapter"],
+    generator: Optional["DiagramGenerator"] = None,
+) -> str:
+    """
+    Summarize a book chapter by chapter in the background; the progress is the
+    summaries of the chapters so far, in book order.
+
+    The result has the summary of the book, the titles of the chapters that
+    failed, which are left out of the summary, and the diagram of the summary
+    if `generator` is given. Submitting the book again only summarizes the
+    failed chapters, the others are cached.
+
+    Args:
+        summarizer (Summarizer): The summarizer to use.
+        source (str): Identifies the book, e.g. the file hash.
+        chapters (Sequence[Chapter]): The chapters of the book.
+        generator (Optional[DiagramGenerator]): Generates the diagram of the
+            summary, once all chapters are summarized.
+
+    Returns:
+        str: The job ID.
+    """
+
+    def run(progress: Callable[[str], None]) -> Dict[str, Any]:
+        summaries: List[Optional[ChapterSummary]] = [None] * len(chapters)
+        pairs = [(chapter.title, chapter.text) for chapter in chapters]
+        for summary in summarizer.summarize_chapters(pairs):
+            summaries[summary.index] = summary
+            progress(join_chapter_summaries(chapters, summaries))
+
+        failed = [summary.title for summary in summaries if summary.error]
+        done = [summary.summary for summary in summaries if not summary.error]
+        if not done:
+            raise ValueError(f"All {len(chapters)} chapters failed.")
+        result = {"summary": "\n\n".join(done), "failed": failed, "diagram": None}
+        if generator is not None and not failed:
+            result["diagram"] = generator.generate(result["summary"])
+        return result
+
+    # Books with failed chapters aren't shared, so retrying summarizes them again.
+    # Results with and without a diagram are shared separately.
+    mode = "book_job" if generator is None else "book_diagram_job"
+    return submit_shared_job(
+        "summary",
+        summarizer.summary_key(source, mode),
+        run,
+        cache_if=lambda result: not result["failed"],
+    )
+
+
+def store_summary_result(summary_key: str, diagram_key: str) -> Callable[[Any], None]:
+    """Return the `poll_job` callback storing the result of a summary or pipeline job."""
+
+    def store(result: Any) -> None:
+        if isinstance(result, dict):
+            st.session_state[summary_key] = result["summary"]
+            if result.get("diagram") is not None:
+                st.session_state[diagram_key] = result["diagram"]
+        else:
+            st.session_state[summary_key] = result
+
+    return store
+
+
+def submit_diagram_job(
+    provider: str, model_name: str, language: str, text: str
+) -> str:
+    """Generate the diagram of a text in the background and return the job ID."""
+    generator = get_diagram_generator(provider, model_name, language)
+    return submit_shared_job(
+        "diagram",
+        make_key("diagram_job", text, provider, model_name, language),
+        lambda progress: generator.generate(text, progress=progress),
+    )
+
+
+def sidebar_options():
+    """Sidebar options for the app."""
+    # Sidebar for model selection
+    st.sidebar.title("Model Selection")
+    model_provider = st.sidebar.selectbox("Choose Model Provider", list(MODELS))
+    model_name = st.sidebar.selectbox("Choose Model", MODELS[model_provider])
+
+    st.session_state.model_provider = model_provider
+    st.session_state.model_name = model_name
 
     # Sidebar for language selection
     st.sidebar.title("Language Selection")
@@ -61,3 +409,12 @@ def sidebar_options():
         "Choose Language", ["English", "Vietnamese", "Chinese", "Japanese"], index=0
     )
     st.session_state.language = language
+
+    st.sidebar.title("Diagram")
+    st.session_state.auto_diagram = st.sidebar.checkbox(
+        "Generate the diagram with the summary",
+        help="Chooses the diagram type while the summary is generated, so both are ready sooner.",
+    )
+
+    if settings.DEBUG_PANEL:
+        show_metrics_panel()